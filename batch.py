@@ -0,0 +1,206 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import simulation
+from processor.data_path import DataPath
+from processor.devices import BufferInput, InputDevice, StreamInput
+from processor.isa import read_code
+from processor.memory import DataMemory
+from processor.vector import simulate_many
+
+# число входов, исполняемых векторной моделью за один пакет
+VECTOR_CHUNK = 1024
+
+
+class BatchWorker:
+    """Исполнитель одной программы на разных входных данных.
+
+    Программа читается и предекодируется один раз при создании, перед
+    каждым запуском память данных восстанавливается из исходного образа,
+    а регистры и счётчики сбрасываются.
+    """
+
+    def __init__(self, data: DataMemory, code: list, engine: str, limit: int):
+        self.data = data
+        self.data_path = DataPath(data.copy(), simulation.REGISTERS, BufferInput([]))
+        self.control_unit = simulation.ENGINES[engine](code, self.data_path)
+        self.limit = limit
+
+    @classmethod
+    def from_file(cls, code_file: str, engine: str, limit: int):
+        data, code = read_code(code_file)
+        return cls(data, code, engine, limit)
+
+    def execute(self, input_device: InputDevice, limit: int = None):
+        """Запуск на входе `input_device`, возвращает (вывод, инструкции, такты)."""
+        self.data_path.reset(self.data, input_device)
+        self.control_unit.reset()
+        return simulation.execute(
+            self.control_unit, 0, self.limit if limit is None else limit
+        )
+
+    def run(self, input_file: str) -> dict:
+        result = {"input": input_file}
+        try:
+            with open(input_file) as f:
+                output, instructions, ticks = self.execute(StreamInput(f))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            return result
+        result.update(output=output, instructions=instructions, ticks=ticks)
+        return result
+
+
+# в каждом процессе или потоке пула свой исполнитель
+_local = threading.local()
+
+
+def _init_worker(code_file: str, engine: str, limit: int):
+    _local.worker = BatchWorker.from_file(code_file, engine, limit)
+
+
+def _init_process(code_file: str, engine: str, limit: int):
+    # предупреждения о конце ввода по каждому входу глушатся только в процессах
+    # пула; в режиме потоков журнал настраивает вызывающее приложение
+    logging.getLogger().setLevel(logging.ERROR)
+    _init_worker(code_file, engine, limit)
+
+
+def _run_input(args):
+    if not hasattr(_local, "worker"):
+        _init_worker(*args[1:])
+    return _local.worker.run(args[0])
+
+
+def batch(
+    code_file: str,
+    input_files: list,
+    engine: str = "compiled",
+    limit: int = 100000,
+    workers: int = None,
+    threads: bool = False,
+    vector: bool = False,
+):
+    """Генератор результатов по входным файлам в порядке их следования."""
+    if vector:
+        yield from _batch_vector(code_file, input_files, limit)
+        return
+    if threads:
+        executor = ThreadPoolExecutor(workers)
+    else:
+        executor = ProcessPoolExecutor(
+            workers, initializer=_init_process, initargs=(code_file, engine, limit)
+        )
+    jobs = ((input_file, code_file, engine, limit) for input_file in input_files)
+    chunksize = 1 if threads else 16
+    with executor:
+        yield from executor.map(_run_input, jobs, chunksize=chunksize)
+
+
+def _batch_vector(code_file: str, input_files: list, limit: int):
+    data, code = read_code(code_file)
+    for start in range(0, len(input_files), VECTOR_CHUNK):
+        chunk = input_files[start : start + VECTOR_CHUNK]
+        texts = []
+        for input_file in chunk:
+            with open(input_file) as f:
+                texts.append(f.read())
+        for input_file, (output, instructions, ticks) in zip(
+            chunk, simulate_many(data, code, texts, limit)
+        ):
+            yield {
+                "input": input_file,
+                "output": output,
+                "instructions": instructions,
+                "ticks": ticks,
+            }
+
+
+def main(
+    code_file: str,
+    input_files: list,
+    engine: str,
+    limit: int,
+    workers: int,
+    threads: bool,
+    results_file: str = None,
+    vector: bool = False,
+):
+    out = open(results_file, "w") if results_file else sys.stdout
+    try:
+        for result in batch(
+            code_file, input_files, engine, limit, workers, threads, vector
+        ):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if results_file:
+            out.close()
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.ERROR)
+
+    parser = argparse.ArgumentParser(
+        description="Пакетная симуляция программы на множестве входных файлов"
+    )
+    parser.add_argument("code_file", help="Имя файла с машинным кодом")
+    parser.add_argument(
+        "input_files",
+        nargs="+",
+        help="Входные файлы; для каталога берутся все файлы в нём",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=simulation.ENGINES.keys(),
+        default="compiled",
+        help="Реализация Control Unit (по умолчанию compiled)",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=100000, help="Лимит тиков (по умолчанию 100000)"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Число процессов или потоков (по умолчанию по CPU)"
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help="Пул потоков вместо процессов (для ввода-вывода, а не вычислений)",
+    )
+    parser.add_argument(
+        "--vector",
+        action="store_true",
+        help="Исполнять входы пакетами в векторной модели на NumPy",
+    )
+    parser.add_argument(
+        "--results", help="Файл результатов JSONL (по умолчанию стандартный вывод)"
+    )
+
+    args = parser.parse_args()
+
+    input_files = []
+    for path in args.input_files:
+        if os.path.isdir(path):
+            input_files += sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            input_files.append(path)
+
+    main(
+        args.code_file,
+        input_files,
+        args.engine,
+        args.limit,
+        args.workers,
+        args.threads,
+        args.results,
+        args.vector,
+    )
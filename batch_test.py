@@ -0,0 +1,82 @@
+"""Тесты пакетной симуляции."""
+
+import logging
+
+import pytest
+
+import batch
+import simulation
+import translator
+from processor.isa import read_code, write_code
+
+INPUTS = ["Alice\n", "", "Bob Marley\n", "x" * 20]
+
+
+@pytest.mark.parametrize("threads", [True, False])
+@pytest.mark.parametrize("task", ["cat", "hello_user"])
+def test_batch_matches_simulation(tmp_path, task, threads):
+    target = tmp_path / "target.o"
+    with open(f"tasks/{task}.txt") as f:
+        write_code(target, *translator.translate(f.read()))
+    input_files = []
+    for i, text in enumerate(INPUTS):
+        input_files.append(str(tmp_path / f"input{i}.txt"))
+        with open(input_files[-1], "w") as f:
+            f.write(text)
+
+    results = list(batch.batch(str(target), input_files, "compiled", 1000, 2, threads))
+
+    assert [result["input"] for result in results] == input_files
+    for result, text in zip(results, INPUTS):
+        data, code = read_code(target)
+        output, instructions, ticks = simulation.simulation(
+            data, code, list(text) + [chr(0)], 0, 1000
+        )
+        assert result == {
+            "input": result["input"],
+            "output": output,
+            "instructions": instructions,
+            "ticks": ticks,
+        }
+
+
+def test_batch_reports_missing_input(tmp_path):
+    target = tmp_path / "target.o"
+    with open("tasks/cat.txt") as f:
+        write_code(target, *translator.translate(f.read()))
+
+    [result] = batch.batch(str(target), [str(tmp_path / "missing")], threads=True)
+
+    assert result["error"].startswith("FileNotFoundError")
+
+
+def test_batch_vector_matches_engine(tmp_path):
+    pytest.importorskip("numpy")
+    target = tmp_path / "target.o"
+    with open("tasks/hello_user.txt") as f:
+        write_code(target, *translator.translate(f.read()))
+    input_files = []
+    for i, text in enumerate(INPUTS):
+        input_files.append(str(tmp_path / f"input{i}.txt"))
+        with open(input_files[-1], "w") as f:
+            f.write(text)
+
+    vector = list(batch.batch(str(target), input_files, vector=True))
+
+    assert vector == list(batch.batch(str(target), input_files, threads=True))
+
+
+def test_thread_batch_keeps_log_level(tmp_path):
+    target = tmp_path / "target.o"
+    with open("tasks/cat.txt") as f:
+        write_code(target, *translator.translate(f.read()))
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("abc")
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.INFO)
+    try:
+        list(batch.batch(str(target), [str(input_file)], "compiled", 1000, 1, True))
+        assert root.level == logging.INFO
+    finally:
+        root.setLevel(level)
@@ -0,0 +1,543 @@
+import argparse
+import gc
+import hashlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import simulation
+import translator
+from processor.devices import StreamInput, StreamOutput
+from processor.isa import (
+    InstructionTable,
+    MachineCode,
+    read_code,
+    write_binary_code,
+    write_code,
+)
+
+# входные данные для программ из tasks
+TASK_INPUTS = {
+    "cat": "inputs/catInput.txt",
+    "hello_user": "inputs/name.txt",
+}
+
+
+def load_task(task_file: str, target: str):
+    with open(task_file) as f:
+        write_code(target, *translator.translate(f.read()))
+    name = os.path.splitext(os.path.basename(task_file))[0]
+    input_text = ""
+    if name in TASK_INPUTS:
+        with open(TASK_INPUTS[name]) as f:
+            input_text = f.read()
+    return name, input_text
+
+
+def measure(target: str, input_text: str, engine: str, limit: int, repeat: int):
+    instructions = ticks = 0
+    elapsed = 0.0
+    for _ in range(repeat):
+        data, code = read_code(target)
+        input_buffer = list(input_text) + [chr(0)]
+        start = time.perf_counter()
+        _, instr, tick = simulation.simulation(
+            data, code, input_buffer, 0, limit, engine
+        )
+        elapsed += time.perf_counter() - start
+        instructions += instr
+        ticks += tick
+    return instructions, ticks, elapsed
+
+
+def compare_engines(task_files: list, engines: list, limit: int, repeat: int):
+    target = "bench_output.o"
+    print(f"{'task':12} {'engine':12} {'instr':>10} {'ticks':>10} {'instr/s':>12}")
+    try:
+        for task_file in task_files:
+            name, input_text = load_task(task_file, target)
+            results = {}
+            for engine in engines:
+                instr, ticks, elapsed = measure(
+                    target, input_text, engine, limit, repeat
+                )
+                results[engine] = (instr, ticks)
+                print(
+                    f"{name:12} {engine:12} {instr:10} {ticks:10} {instr / elapsed:12.0f}"
+                )
+            assert len(set(results.values())) == 1, f"Engines disagree: {results}"
+    finally:
+        if os.path.exists(target):
+            os.remove(target)
+
+
+def cat_scaling(sizes: list, engines: list):
+    # время работы cat должно расти линейно с размером ввода
+    print(f"{'MB':>6} {'engine':12} {'instr':>12} {'seconds':>9} {'MB/s':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        target = os.path.join(tmpdir, "cat.o")
+        _, text = load_task("tasks/cat.txt", target)
+        input_file = os.path.join(tmpdir, "input.txt")
+        for size in sizes:
+            amount = int(size * 2**20)
+            with open(input_file, "w") as f:
+                f.write((text * (amount // len(text) + 1))[:amount])
+            for engine in engines:
+                data, code = read_code(target)
+                with open(input_file) as f, open(os.devnull, "w") as out:
+                    start = time.perf_counter()
+                    _, instr, _ = simulation.simulation(
+                        data,
+                        code,
+                        StreamInput(f),
+                        0,
+                        sys.maxsize,
+                        engine,
+                        StreamOutput(out),
+                    )
+                    elapsed = time.perf_counter() - start
+                print(
+                    f"{size:6} {engine:12} {instr:12} {elapsed:9.2f} {size / elapsed:8.2f}"
+                )
+
+
+def synthetic_lines(amount: int):
+    # блоки из 7 строк кода с переходом вперёд и 2 переменных после кода
+    blocks = max(1, amount // 9)
+    yield ".code:\n"
+    for block in range(blocks):
+        yield f"block_{block}:  ; метка\n"
+        yield f"    LOAD_V r1 var_{block}\n"
+        yield "    CMP r1 0\n"
+        yield f"    JZ block_{block + 1}\n"
+        yield "    LINEAR r1 2 r2 3 r3\n"
+        yield f"    STORE_V var_{block} r1\n"
+        yield "    OUTPUT r1\n"
+    yield f"block_{blocks}:\n"
+    yield "    HLT\n"
+    yield ".data:\n"
+    for block in range(blocks):
+        yield f"NUMBER var_{block} 0\n"
+        yield f"STRING str_{block} hello\n"
+
+
+def translation_throughput(amount: int):
+    # потоковая трансляция против двух стадий над всем текстом
+    print(f"{'mode':8} {'lines':>9} {'seconds':>8} {'lines/s':>10} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, "synthetic.txt")
+        with open(source, "w") as f:
+            f.writelines(synthetic_lines(amount))
+
+        def staged():
+            with open(source) as f:
+                text = f.read()
+            labels, variables, data, tokens = translator.translate_stage_1(text)
+            return data, translator.translate_stage_2(labels, variables, tokens)
+
+        def streamed():
+            with open(source) as f:
+                lines = translator.CountedLines(f)
+                data, code = translator.translate_stream(lines)
+            return data, code, lines.count
+
+        results = {}
+        for mode, translate in (("staged", staged), ("stream", streamed)):
+            start = time.perf_counter()
+            data, code, *rest = translate()
+            elapsed = time.perf_counter() - start
+            # свёртка вместо копии результата: живые объекты замедляют сборщик мусора
+            results[mode] = hash(
+                (len(data), tuple((instr.opcode, tuple(instr.args)) for instr in code))
+            )
+            del data, code
+            gc.collect()
+            # пиковая память - отдельным запуском: tracemalloc замедляет трансляцию
+            tracemalloc.start()
+            translate()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+            print(
+                f"{mode:8} {amount:9} {elapsed:8.2f} {amount / elapsed:10.0f} {peak:8.1f}"
+            )
+        assert results["staged"] == results["stream"], "Translations disagree"
+
+
+def code_memory(amount: int):
+    # память команд: MachineCode на каждую инструкцию (прежнее представление)
+    # против интернированных Instruction
+    print(f"{'mode':12} {'instr':>9} {'objects':>9} {'MB':>8} {'B/instr':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        target = os.path.join(tmpdir, "synthetic.o")
+        write_binary_code(target, *translator.translate_stream(synthetic_lines(amount)))
+        _, code = read_code(target)
+        words = [(instr.opcode, list(instr.args)) for instr in code]
+        del code
+
+        def machine_code():
+            return [
+                MachineCode(index, opcode, list(args))
+                for index, (opcode, args) in enumerate(words)
+            ]
+
+        def instructions():
+            table = InstructionTable()
+            return [table.get(opcode, args) for opcode, args in words]
+
+        for mode, build in (
+            ("MachineCode", machine_code),
+            ("Instruction", instructions),
+        ):
+            gc.collect()
+            tracemalloc.start()
+            code = build()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            objects = len({id(instr) for instr in code})
+            del code
+            print(
+                f"{mode:12} {len(words):9} {objects:9} {size / 2**20:8.1f} "
+                f"{size / len(words):8.1f}"
+            )
+
+
+# Набор замеров: программы из tasks и их увеличенные варианты. Для каждого
+# сценария и реализации Control Unit измеряются время трансляции и загрузки
+# объектного файла, скорость моделирования (лучшее из `repeat` запусков) и
+# пиковая память отдельным запуском под tracemalloc. Результаты сохраняются
+# в JSON и сравниваются с сохранённым эталоном.
+
+SUITE_ENGINES = ["reference", "predecoded", "compiled", "functional", "fused"]
+SUITE_REPEAT = 3
+# программы, которые не исполняются на одном ядре
+SUITE_SKIP = ("prob1_parallel",)
+# метрика -> больше ли лучше
+METRICS = {
+    "translate_s": False,
+    "load_s": False,
+    "instr_per_s": True,
+    "ticks_per_s": True,
+    "peak_mb": False,
+}
+REGRESSION_THRESHOLD = 10.0
+
+
+class OutputDigest:
+    """Поток вывода, от которого хранится только хэш: вывод больших сценариев не копится."""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+
+    def write(self, text: str):
+        self.digest.update(text.encode())
+
+    def flush(self):
+        pass
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()[:16]
+
+
+def suite_cases(scale: float = 1.0) -> list:
+    """Сценарии (имя, исходный код, ввод): задачи из tasks и увеличенные варианты."""
+    sources = {}
+    cases = []
+    for name in sorted(os.listdir("tasks")):
+        task, _ = os.path.splitext(name)
+        with open(os.path.join("tasks", name)) as f:
+            sources[task] = f.read()
+        if task in SUITE_SKIP:
+            continue
+        input_text = ""
+        if task in TASK_INPUTS:
+            with open(TASK_INPUTS[task]) as f:
+                input_text = f.read()
+        cases.append((task, sources[task], input_text))
+
+    bound = int(30000 * scale)
+    source = sources["prob1"].replace("CMP r1 1000", f"CMP r1 {bound}")
+    cases.append((f"prob1_{bound}", source, ""))
+
+    size = int(2 * 2**20 * scale)
+    with open(TASK_INPUTS["cat"]) as f:
+        text = f.read()
+    cases.append(
+        (f"cat_{size}", sources["cat"], (text * (size // len(text) + 1))[:size])
+    )
+
+    length = int(20000 * scale)
+    name = ("Alexander the Great " * (length // 20 + 1))[:length]
+    source = sources["hello_user"].replace(
+        "BUFFER user 40", f"BUFFER user {length + 1}"
+    )
+    cases.append((f"hello_user_{length}", source, name))
+    return cases
+
+
+def measure_case(source: str, input_text: str, engine: str, repeat: int) -> dict:
+    result = {"translate_s": float("inf"), "load_s": float("inf")}
+    run_s = float("inf")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        target = os.path.join(tmpdir, "case.o")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data, code = translator.translate(source)
+            result["translate_s"] = min(
+                result["translate_s"], time.perf_counter() - start
+            )
+            write_code(target, data, code)
+
+            start = time.perf_counter()
+            data, code = read_code(target)
+            result["load_s"] = min(result["load_s"], time.perf_counter() - start)
+
+            digest = OutputDigest()
+            start = time.perf_counter()
+            _, instructions, ticks = simulation.simulation(
+                data,
+                code,
+                StreamInput(io.StringIO(input_text)),
+                0,
+                sys.maxsize,
+                engine,
+                StreamOutput(digest),
+            )
+            run_s = min(run_s, time.perf_counter() - start)
+
+        # пиковая память трансляции, загрузки и исполнения
+        gc.collect()
+        tracemalloc.start()
+        write_code(target, *translator.translate(source))
+        data, code = read_code(target)
+        simulation.simulation(
+            data,
+            code,
+            StreamInput(io.StringIO(input_text)),
+            0,
+            sys.maxsize,
+            engine,
+            StreamOutput(OutputDigest()),
+        )
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    result.update(
+        output=digest.hexdigest(),
+        instructions=instructions,
+        ticks=ticks,
+        run_s=run_s,
+        instr_per_s=instructions / run_s,
+        ticks_per_s=ticks / run_s,
+        peak_mb=peak / 2**20,
+    )
+    return result
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(engines: list, repeat: int, scale: float) -> dict:
+    results = {}
+    print(
+        f"{'case':22} {'engine':12} {'instr':>10} {'translate':>9} {'load':>8} "
+        f"{'instr/s':>10} {'ticks/s':>10} {'peak MB':>8} {'x ref':>6}"
+    )
+    for name, source, input_text in suite_cases(scale):
+        base = None
+        for engine in engines:
+            result = measure_case(source, input_text, engine, repeat)
+            results[f"{name}/{engine}"] = result
+            if base is None:
+                base = result
+            # реализации обязаны совпадать по выводу, инструкциям и тактам
+            for field in ("output", "instructions", "ticks"):
+                assert result[field] == base[field], f"{name}: engines disagree"
+            print(
+                f"{name:22} {engine:12} {result['instructions']:10} "
+                f"{result['translate_s'] * 1000:7.1f}ms {result['load_s'] * 1000:6.1f}ms "
+                f"{result['instr_per_s']:10.0f} {result['ticks_per_s']:10.0f} "
+                f"{result['peak_mb']:8.2f} {result['instr_per_s'] / base['instr_per_s']:6.2f}"
+            )
+    return {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "scale": scale,
+        "results": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list:
+    """Сравнение с эталоном, возвращает список регрессий и изменений поведения.
+
+    Замеры с разными `scale` или `repeat` несравнимы: возвращается только
+    это расхождение. Сценарии, которых нет в одном из файлов, тоже считаются
+    расхождением.
+    """
+    problems = [
+        f"{field} differs: {baseline.get(field)} -> {current.get(field)}"
+        for field in ("scale", "repeat")
+        if baseline.get(field) != current.get(field)
+    ]
+    if problems:
+        return problems
+    for key in baseline["results"].keys() - current["results"].keys():
+        problems.append(f"{key}: missing in current results")
+    for key in current["results"].keys() - baseline["results"].keys():
+        problems.append(f"{key}: missing in baseline")
+    problems.sort()
+    print(
+        f"Baseline {baseline.get('commit')} -> current {current.get('commit')}, "
+        f"threshold {threshold}%"
+    )
+    print(f"{'case':34} {'metric':12} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        for field in ("output", "instructions", "ticks"):
+            if result[field] != base[field]:
+                problems.append(
+                    f"{key}: {field} changed {base[field]} -> {result[field]}"
+                )
+        for metric, higher_is_better in METRICS.items():
+            if not base[metric]:
+                continue
+            change = (result[metric] / base[metric] - 1) * 100
+            worse = -change if higher_is_better else change
+            mark = ""
+            if worse > threshold:
+                mark = " REGRESSION"
+                problems.append(f"{key}: {metric} {change:+.1f}%")
+            print(
+                f"{key:34} {metric:12} {base[metric]:12.4g} {result[metric]:12.4g} "
+                f"{change:+7.1f}%{mark}"
+            )
+    return problems
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.ERROR)
+
+    parser = argparse.ArgumentParser(description="Сравнение скорости моделирования")
+    parser.add_argument(
+        "task_files",
+        nargs="*",
+        default=[os.path.join("tasks", name) for name in sorted(os.listdir("tasks"))],
+        help="Программы для замера (по умолчанию tasks/*.txt)",
+    )
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=simulation.ENGINES.keys(),
+        help="Сравниваемые реализации Control Unit (по умолчанию все, в наборе - "
+        + ", ".join(SUITE_ENGINES)
+        + ")",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=100000, help="Лимит тиков (по умолчанию 100000)"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help=f"Число повторов (по умолчанию 200, в наборе - {SUITE_REPEAT})",
+    )
+
+    parser.add_argument(
+        "--cat-sizes",
+        nargs="+",
+        type=float,
+        help="Замер масштабирования cat на вводе заданных размеров в МБ (например 10 100)",
+    )
+
+    parser.add_argument(
+        "--translate-lines",
+        type=int,
+        help="Замер скорости трансляции синтетической программы из заданного числа строк",
+    )
+
+    parser.add_argument(
+        "--code-memory",
+        type=int,
+        metavar="LINES",
+        help="Сравнить память команд MachineCode и Instruction на синтетической "
+        "программе из заданного числа строк",
+    )
+
+    parser.add_argument(
+        "--suite",
+        action="store_true",
+        help="Набор замеров по tasks и увеличенным сценариям",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Множитель размеров увеличенных сценариев (по умолчанию 1)",
+    )
+    parser.add_argument(
+        "--save", metavar="JSON", help="Сохранить результаты набора замеров в файл"
+    )
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="JSON",
+        help="Сравнить эталон с файлом результатов или с новым запуском набора",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help=f"Порог регрессии в процентах (по умолчанию {REGRESSION_THRESHOLD})",
+    )
+
+    args = parser.parse_args()
+
+    if args.suite or args.compare:
+        engines = args.engines or SUITE_ENGINES
+        repeat = args.repeat or SUITE_REPEAT
+        if args.compare and len(args.compare) > 1:
+            with open(args.compare[1]) as f:
+                current = json.load(f)
+        else:
+            current = run_suite(engines, repeat, args.scale)
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(current, f, indent=2)
+        if args.compare:
+            with open(args.compare[0]) as f:
+                baseline = json.load(f)
+            problems = compare_results(baseline, current, args.threshold)
+            for problem in problems:
+                print(problem)
+            sys.exit(1 if problems else 0)
+    elif args.translate_lines:
+        translation_throughput(args.translate_lines)
+    elif args.code_memory:
+        code_memory(args.code_memory)
+    elif args.cat_sizes:
+        cat_scaling(args.cat_sizes, args.engines or list(simulation.ENGINES.keys()))
+    else:
+        compare_engines(
+            args.task_files,
+            args.engines or list(simulation.ENGINES.keys()),
+            args.limit,
+            args.repeat or 200,
+        )
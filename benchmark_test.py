@@ -0,0 +1,73 @@
+"""Тесты набора замеров."""
+
+import copy
+
+import benchmark
+import simulation
+import translator
+
+
+def test_suite_cases_scale():
+    cases = {name: (source, text) for name, source, text in benchmark.suite_cases(0.01)}
+
+    assert "prob1_parallel" not in cases
+    assert "CMP r1 300" in cases["prob1_300"][0]
+    assert len(cases["cat_20971"][1]) == 20971
+    assert "BUFFER user 201" in cases["hello_user_200"][0]
+
+
+def test_measure_case_matches_simulation():
+    with open("tasks/hello_user.txt") as f:
+        source = f.read()
+    result = benchmark.measure_case(source, "Alice", "predecoded", 1)
+
+    expected = simulation.simulation(
+        *translator.translate(source), list("Alice") + [chr(0)], 0, 100000
+    )
+    assert (result["instructions"], result["ticks"]) == expected[1:]
+    assert result["instr_per_s"] > 0 and result["peak_mb"] > 0
+
+
+def test_compare_flags_regressions():
+    result = {
+        "output": "abc",
+        "instructions": 10,
+        "ticks": 20,
+        "translate_s": 1.0,
+        "load_s": 1.0,
+        "instr_per_s": 100.0,
+        "ticks_per_s": 200.0,
+        "peak_mb": 1.0,
+    }
+    baseline = {"commit": "a", "results": {"prob1/reference": result}}
+    current = copy.deepcopy(baseline)
+    current["results"]["prob1/reference"].update(instr_per_s=105.0, load_s=1.5)
+
+    assert benchmark.compare_results(baseline, baseline, 10) == []
+    assert benchmark.compare_results(baseline, current, 10) == [
+        "prob1/reference: load_s +50.0%"
+    ]
+    current["results"]["prob1/reference"]["ticks"] = 21
+    assert "ticks changed" in benchmark.compare_results(baseline, current, 60)[0]
+
+
+def test_compare_reports_mismatched_runs():
+    result = {field: 1.0 for field in benchmark.METRICS}
+    result.update(output="", instructions=1, ticks=1)
+    baseline = {
+        "scale": 1.0,
+        "repeat": 3,
+        "results": {"cat/reference": result, "hello/reference": result},
+    }
+    current = copy.deepcopy(baseline)
+    del current["results"]["hello/reference"]
+    current["results"]["prob1/reference"] = result
+
+    assert benchmark.compare_results(baseline, current, 10) == [
+        "hello/reference: missing in current results",
+        "prob1/reference: missing in baseline",
+    ]
+    current["scale"] = 0.5
+    assert benchmark.compare_results(baseline, current, 10) == [
+        "scale differs: 1.0 -> 0.5"
+    ]
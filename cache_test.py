@@ -0,0 +1,53 @@
+"""Тесты модели кэша данных."""
+
+import pytest
+
+import simulation
+import translator
+from processor.cache import DataCache
+
+LIMIT = 100000
+
+
+def run(task, input_text, cache=None):
+    with open(f"tasks/{task}.txt") as f:
+        data, code = translator.translate(f.read())
+    return simulation.simulation(
+        data, code, list(input_text) + [chr(0)], 0, LIMIT, cache=cache
+    )
+
+
+@pytest.mark.parametrize("task", ["hello_user", "cat", "prob1", "hello_user_block"])
+def test_cache_without_penalty_keeps_ticks(task):
+    cache = DataCache(16, miss_penalty=0)
+
+    assert run(task, "Alice", cache) == run(task, "Alice")
+
+
+def test_miss_penalty_feeds_ticks():
+    cache = DataCache(16, line_size=4, associativity=2, miss_penalty=10)
+    output, instructions, ticks = run("hello_user", "Alexander the Great", cache)
+    expected = run("hello_user", "Alexander the Great")
+
+    assert (output, instructions) == expected[:2]
+    assert ticks == expected[2] + cache.stall_ticks
+    assert "BUFFER" in cache.report()
+
+
+@pytest.mark.parametrize("eviction, hits", [("lru", 2), ("fifo", 1)])
+def test_eviction_policy(eviction, hits):
+    cache = DataCache(2, line_size=1, associativity=2, eviction=eviction)
+    for addr in (0, 1, 0, 2, 0):
+        cache.access(addr, False)
+
+    assert sum(cache.hits) == hits
+
+
+@pytest.mark.parametrize("write, memory_writes", [("back", 1), ("through", 3)])
+def test_write_policy(write, memory_writes):
+    cache = DataCache(1, line_size=1, associativity=1, write=write)
+    # две записи в слово 0, затем чтение слова 1 вытесняет строку
+    for addr, is_write in ((0, True), (0, True), (1, False), (1, True)):
+        cache.access(addr, is_write)
+
+    assert cache.memory_writes == memory_writes
@@ -0,0 +1,202 @@
+import argparse
+import cmd
+import logging
+import sys
+
+import simulation
+from processor.data_path import DataPath
+from processor.debugger import Debugger
+from processor.devices import BufferInput, BufferOutput, StreamInput
+from processor.isa import read_code
+
+
+class DebuggerShell(cmd.Cmd):
+    """Команды отладчика; из файла команды читаются так же, как с терминала."""
+
+    prompt = "(dbg) "
+
+    def __init__(self, debugger: Debugger, limit: int, stdin=None, stdout=None):
+        super().__init__(stdin=stdin, stdout=stdout)
+        # команды из файла или канала читаются без readline и без приглашения
+        if stdin is not None and not stdin.isatty():
+            self.use_rawinput = False
+            self.prompt = ""
+        self.debugger = debugger
+        self.limit = limit
+
+    def say(self, line: str):
+        self.stdout.write(line + "\n")
+
+    def emptyline(self):
+        pass
+
+    def default(self, line: str):
+        self.say(f"Unknown command: {line}")
+
+    def onecmd(self, line: str):
+        try:
+            return super().onecmd(line)
+        except ValueError as e:
+            self.say(str(e))
+        except (IndexError, KeyError, ArithmeticError) as e:
+            # ошибка исполняемой программы не завершает отладку
+            self.say(f"Program error: {type(e).__name__}: {e}")
+            self.say(self.state())
+
+    def report(self, reason: str):
+        debugger = self.debugger
+        control_unit = debugger.control_unit
+        if reason == "breakpoint":
+            condition = debugger.breakpoints[control_unit.program_counter]
+            suffix = f" if {condition}" if condition is not None else ""
+            self.say(f"Breakpoint at {control_unit.program_counter}{suffix}")
+        elif reason == "watchpoint":
+            for addr, old, new in debugger.changes:
+                self.say(f"Watchpoint {addr}: {old} -> {new}")
+        elif reason == "halt":
+            self.say("Program halted")
+        elif reason == "input":
+            self.say("Input buffer is empty")
+        elif reason == "fault":
+            self.say("Program stopped on error")
+        self.say(self.state())
+
+    def state(self) -> str:
+        debugger = self.debugger
+        control_unit = debugger.control_unit
+        data_path = control_unit.data_path
+        pc = control_unit.program_counter
+        if pc < len(control_unit.program_memory):
+            instr = control_unit.program_memory[pc]
+            current = " ".join([instr.opcode.name] + [str(arg) for arg in instr.args])
+        else:
+            current = "-"
+        return (
+            f"TICK: {control_unit.current_tick()} "
+            f"INSTR: {debugger.instructions} "
+            f"[{pc}: {current}] "
+            f"RG: {data_path.registers} Z: {int(data_path.is_zero)}"
+        )
+
+    def do_break(self, arg: str):
+        """break PC [if rN OP VALUE] - точка останова по адресу команды, OP: == != < <= > >="""
+        pc, _, condition = arg.partition(" if ")
+        self.debugger.break_at(int(pc), condition or None)
+
+    def do_delete(self, arg: str):
+        """delete PC - удалить точку останова"""
+        self.debugger.delete(int(arg))
+
+    def do_watch(self, arg: str):
+        """watch ADDR - остановка после изменения слова памяти данных"""
+        self.debugger.watch(int(arg))
+
+    def do_unwatch(self, arg: str):
+        """unwatch ADDR - удалить точку наблюдения"""
+        self.debugger.unwatch(int(arg))
+
+    def do_continue(self, arg: str):
+        """continue - исполнение до точки останова или наблюдения, конца программы или лимита"""
+        self.report(self.debugger.cont(self.limit))
+
+    def do_step(self, arg: str):
+        """step [N] - исполнить N инструкций (по умолчанию одну)"""
+        self.report(self.debugger.step(int(arg) if arg else 1))
+
+    def do_until(self, arg: str):
+        """until TICK - исполнение до такта TICK"""
+        self.report(self.debugger.until(min(int(arg), self.limit)))
+
+    def do_info(self, arg: str):
+        """info - состояние процессора, точки останова и наблюдения"""
+        debugger = self.debugger
+        self.say(self.state())
+        for pc, condition in sorted(debugger.breakpoints.items()):
+            suffix = f" if {condition}" if condition is not None else ""
+            self.say(f"break {pc}{suffix}")
+        for addr, value in sorted(debugger.watchpoints.items()):
+            self.say(f"watch {addr} = {value}")
+
+    def do_mem(self, arg: str):
+        """mem ADDR [N] - вывести N слов памяти данных с адреса ADDR"""
+        args = arg.split()
+        if not 1 <= len(args) <= 2:
+            raise ValueError("Usage: mem ADDR [N]")
+        addr = int(args[0])
+        amount = int(args[1]) if len(args) > 1 else 1
+        words = self.debugger.control_unit.data_path.data_memory.words
+        self.say(" ".join(str(word) for word in words[addr : addr + amount]))
+
+    def do_output(self, arg: str):
+        """output - выведенное программой"""
+        self.say(self.debugger.control_unit.data_path.output_device.getvalue())
+
+    def do_quit(self, arg: str):
+        """quit - завершить отладку"""
+        return True
+
+    def do_EOF(self, arg: str):
+        return True
+
+    do_b = do_break
+    do_c = do_continue
+    do_s = do_step
+    do_q = do_quit
+
+
+def main(
+    code_file: str,
+    input_file: str,
+    limit: int,
+    engine: str = "reference",
+    commands_file: str = None,
+):
+    data, code = read_code(code_file)
+    input_stream = open(input_file, "r") if input_file else None
+    input_device = StreamInput(input_stream) if input_stream else BufferInput([])
+    data_path = DataPath(data, simulation.REGISTERS, input_device, BufferOutput())
+    debugger = Debugger(simulation.ENGINES[engine](code, data_path))
+
+    # без файла команды читаются со стандартного ввода, в том числе из канала
+    commands = open(commands_file, "r") if commands_file else None
+    try:
+        DebuggerShell(debugger, limit, commands or sys.stdin).cmdloop()
+    finally:
+        if commands is not None:
+            commands.close()
+        if input_stream is not None:
+            input_stream.close()
+
+    print(data_path.output_device.getvalue())
+    print(
+        f"Instructions: {debugger.instructions} Ticks: {debugger.control_unit.current_tick()}"
+    )
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Отладчик программ процессора")
+    parser.add_argument("code_file", help="Имя файла с машинным кодом")
+    parser.add_argument(
+        "input_file", nargs="?", help="Имя входного файла (опционально)"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=100000, help="Лимит тиков (по умолчанию 100000)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=simulation.ENGINES.keys(),
+        default="reference",
+        help="Реализация Control Unit (по умолчанию reference)",
+    )
+    parser.add_argument(
+        "-x",
+        "--commands",
+        metavar="COMMANDS_FILE",
+        help="Выполнить команды из файла вместо ввода с терминала",
+    )
+
+    args = parser.parse_args()
+
+    main(args.code_file, args.input_file, args.limit, args.engine, args.commands)
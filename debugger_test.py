@@ -0,0 +1,119 @@
+"""Тесты отладчика."""
+
+import io
+
+import pytest
+
+import debugger
+import simulation
+import translator
+from processor.data_path import DataPath
+from processor.debugger import Debugger, parse_condition
+from processor.devices import BufferInput, BufferOutput
+
+
+def create_debugger(task, symbols, engine="reference"):
+    with open(f"tasks/{task}.txt") as f:
+        data, code = translator.translate(f.read())
+    data_path = DataPath(
+        data, simulation.REGISTERS, BufferInput(symbols), BufferOutput()
+    )
+    return Debugger(simulation.ENGINES[engine](code, data_path))
+
+
+def test_step_generator():
+    dbg = create_debugger("hello", [])
+    control_unit = dbg.control_unit
+    executed = list(control_unit.step())
+
+    # HLT останавливает генератор и не возвращается
+    assert executed[:3] == [0, 1, 2]
+    assert control_unit.program_memory[executed[-1]].opcode.name == "JZ_R"
+    assert control_unit.data_path.output_device.getvalue() == "hello world"
+
+
+@pytest.mark.parametrize("engine", simulation.ENGINES.keys())
+def test_breakpoints_keep_results(engine):
+    symbols = list("Alice") + [chr(0)]
+    expected = simulation.simulation(
+        *translator.translate(open("tasks/hello_user.txt").read()),
+        list(symbols),
+        0,
+        100000,
+        engine,
+    )
+    dbg = create_debugger("hello_user", list(symbols), engine)
+    dbg.break_at(5)
+
+    stops = 0
+    while dbg.cont(100000) == "breakpoint":
+        assert dbg.control_unit.program_counter == 5
+        stops += 1
+
+    assert stops == 5
+    assert dbg.stopped == "halt"
+    output = dbg.control_unit.data_path.output_device.getvalue()
+    assert (output, dbg.instructions, dbg.control_unit.current_tick()) == expected
+
+
+def test_conditional_breakpoint_and_watchpoint():
+    dbg = create_debugger("prob1", [])
+    # r1 - проверяемое число цикла, sum - по адресу 2
+    dbg.break_at(1, "r1 == 10")
+    assert dbg.cont(100000) == "breakpoint"
+    assert dbg.control_unit.data_path.registers[0] == 10
+
+    dbg.delete(1)
+    dbg.watch(2)
+    assert dbg.cont(100000) == "watchpoint"
+    assert dbg.changes == [(2, 23, 33)]
+    assert dbg.control_unit.data_path.registers[0] == 10
+
+
+def test_step_and_until():
+    dbg = create_debugger("cat", list("abc"))
+
+    assert dbg.step(4) == "step"
+    assert dbg.instructions == 4
+    assert dbg.until(10) == "tick"
+    assert dbg.control_unit.current_tick() >= 10
+    assert dbg.cont(100000) == "input"
+    assert dbg.step() == "input"
+    assert dbg.control_unit.data_path.output_device.getvalue() == "abc"
+
+
+def test_invalid_condition():
+    with pytest.raises(ValueError):
+        parse_condition("r1 = 5")
+    assert parse_condition("r2 >= -3")([0, 0, -3, 0])
+
+
+def test_shell_script():
+    dbg = create_debugger("hello_user", list("Bob") + [chr(0)])
+    commands = io.StringIO("break 5 if r2 == 98\ncontinue\nmem 10 3\ncontinue\n")
+    stdout = io.StringIO()
+    debugger.DebuggerShell(dbg, 100000, commands, stdout).cmdloop()
+
+    lines = stdout.getvalue().splitlines()
+    assert lines[0] == "Breakpoint at 5 if r2 == 98"
+    assert lines[2] == "66 111 98"
+    assert lines[3] == "Program halted"
+
+
+@pytest.mark.parametrize("engine", ["reference", "predecoded"])
+def test_shell_reports_errors_and_continues(engine):
+    data, code = translator.translate(
+        ".code:\n    MOV r1 100000\n    LOAD_R r2 r1\n    HLT\n"
+    )
+    data_path = DataPath(data, simulation.REGISTERS, BufferInput([]), BufferOutput())
+    dbg = Debugger(simulation.ENGINES[engine](code, data_path))
+    commands = io.StringIO("mem\nstep 5\ncontinue\nmem 0\n")
+    stdout = io.StringIO()
+    debugger.DebuggerShell(dbg, 100000, commands, stdout).cmdloop()
+
+    lines = stdout.getvalue().splitlines()
+    assert lines[0] == "Usage: mem ADDR [N]"
+    assert lines[1].startswith("Program error: IndexError")
+    assert lines[3] == "Program stopped on error"
+    assert lines[5] == "1234"
+    assert dbg.stopped == "fault"
@@ -0,0 +1,29 @@
+"""Тесты устройств ввода-вывода."""
+
+import io
+
+import pytest
+
+from processor.devices import BufferInput, StreamInput, StreamOutput, read_all
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 64])
+def test_stream_input_matches_buffer_input(chunk_size):
+    text = "Hello, World!\n"
+    expected = read_all(BufferInput(list(text) + [chr(0)]))
+    assert read_all(StreamInput(io.StringIO(text), chunk_size)) == expected
+
+
+def test_stream_input_empty_stream_gives_terminator():
+    assert read_all(StreamInput(io.StringIO(""))) == [chr(0)]
+
+
+def test_stream_output_flushes_in_chunks():
+    stream = io.StringIO()
+    device = StreamOutput(stream, chunk_size=2)
+    for val in [ord("h"), ord("i"), 1000]:
+        device.write(val)
+    assert stream.getvalue() == "hi"
+    device.flush()
+    assert stream.getvalue() == "hi1000"
+    assert device.getvalue() == ""
@@ -0,0 +1,132 @@
+"""Тесты альтернативных реализаций Control Unit.
+
+Каждая реализация должна давать тот же вывод, число инструкций и тактов,
+что и эталонный `ControlUnit`, и тот же журнал: до `debug_limit` блочные
+реализации исполняют инструкции по одной. Программы берутся из golden тестов.
+"""
+
+import logging
+
+import pytest
+
+import simulation
+import translator
+from processor.cache import DataCache
+from processor.isa import read_code, write_code
+from processor.pipeline import Pipeline
+from processor.profiler import Profiler
+
+DEBUG_LIMIT = 200
+LIMIT = 100000
+
+ENGINES = ["predecoded", "compiled", "functional", "fused"]
+
+
+def run(source, input_text, tmp_path, engine, limit=LIMIT, **kwargs):
+    target = tmp_path / "target.o"
+    write_code(target, *translator.translate(source))
+    data, code = read_code(target)
+    input_buffer = list(input_text) + [chr(0)]
+    return simulation.simulation(
+        data, code, input_buffer, DEBUG_LIMIT, limit, engine, **kwargs
+    )
+
+
+@pytest.mark.golden_test("golden/*.yml")
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engine_matches_reference(golden, tmp_path, caplog, engine):
+    caplog.set_level(logging.DEBUG)
+    source, input_text = golden["in_source"], golden["in_stdin"]
+    expected = run(source, input_text, tmp_path, "reference")
+    expected_log = caplog.text
+    caplog.clear()
+
+    assert run(source, input_text, tmp_path, engine) == expected
+    assert caplog.text == expected_log
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("task", ["prob1", "cat", "hello_user", "hello_user_block"])
+@pytest.mark.parametrize("limit", [1, 2, 7, 50, 333])
+def test_engine_respects_limit(tmp_path, engine, task, limit):
+    with open(f"tasks/{task}.txt") as f:
+        source = f.read()
+    input_text = "Hello"
+
+    expected = run(source, input_text, tmp_path, "reference", limit)
+    assert run(source, input_text, tmp_path, engine, limit) == expected
+
+
+# второе чтение строки упирается в конец ввода
+READ_TWICE = """.data:
+    BUFFER first 10
+    BUFFER second 10
+.code:
+    MOV r1 first
+    INPUT_STR r1
+    OUTPUT_STR r1
+    MOV r2 second
+    INPUT_STR r2
+    OUTPUT_STR r2
+    HLT
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("input_text", ["abc", "abc\0de"])
+def test_engine_block_input_end_of_input(engine, input_text):
+    results = []
+    for name in ("reference", engine):
+        data, code = translator.translate(READ_TWICE)
+        results.append(
+            simulation.simulation(data, code, list(input_text), 0, LIMIT, name)
+        )
+    assert results[0] == results[1]
+
+
+def test_self_check_compares_with_reference():
+    with open("tasks/hello_user.txt") as f:
+        data, code = translator.translate(f.read())
+    output, _, _ = simulation.self_check(
+        data, code, list("Alice") + [chr(0)], LIMIT, "functional"
+    )
+    assert output == "hello, Alice"
+
+
+def test_conflicting_models_rejected():
+    with open("tasks/hello.txt") as f:
+        data, code = translator.translate(f.read())
+    cache = DataCache(16, 4, 2, "lru", "back", 10)
+
+    with pytest.raises(ValueError, match="reference engine, not pipelined"):
+        simulation.simulation(data, code, [], 0, LIMIT, "pipelined", cache=cache)
+    with pytest.raises(ValueError, match="Incompatible models"):
+        simulation.simulation(
+            data, code, [], 0, LIMIT, profiler=Profiler(), pipeline=Pipeline()
+        )
+
+
+# слово памяти данных - int64: 2^62 + 2^62 в него не помещается
+OVERFLOW = """.data:
+    NUMBER n 0
+.code:
+    MOV r1 4611686018427387904
+    STORE_V n r1
+    ADD_MMR n n r1
+    HLT
+"""
+
+
+@pytest.mark.parametrize(
+    "engine, model",
+    [(engine, None) for engine in simulation.ENGINES]
+    + [
+        ("reference", {"profiler": Profiler()}),
+        ("reference", {"cache": DataCache(16, 4, 2, "lru", "back", 10)}),
+    ],
+)
+def test_data_word_overflow(engine, model):
+    data, code = translator.translate(OVERFLOW)
+
+    with pytest.raises(OverflowError, match="out of int64 range at 2"):
+        simulation.simulation(data, code, [], 0, LIMIT, engine, **(model or {}))
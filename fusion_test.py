@@ -0,0 +1,106 @@
+"""Тесты слияния инструкций."""
+
+import pytest
+
+import simulation
+import translator
+from processor.data_path import DataPath
+from processor.devices import BufferInput
+from processor.functional import FunctionalControlUnit
+from processor.fusion import FUSION_RULES, Fusion, FusedControlUnit
+from processor.isa import Instruction, Opcode
+
+
+def translate(task):
+    with open(f"tasks/{task}.txt") as f:
+        return translator.translate(f.read())
+
+
+@pytest.mark.parametrize(
+    "task, sites", [("cat", ["echo"]), ("hello_user", ["read_cstr", "print_cstr"])]
+)
+@pytest.mark.parametrize("terminated", [True, False])
+def test_fused_matches_reference_at_every_limit(task, sites, terminated):
+    input_buffer = list("Bob") + ([chr(0)] if terminated else [])
+    for limit in range(120):
+        expected = simulation.simulation(*translate(task), list(input_buffer), 0, limit)
+        fusion = Fusion()
+        result = simulation.simulation(
+            *translate(task), list(input_buffer), 0, limit, fusion=fusion
+        )
+
+        assert result == expected, limit
+    assert sorted(set(fusion.control_unit.sites.values())) == sorted(sites)
+    assert "fired" in fusion.report()
+
+
+def test_no_fusion_across_jump_target():
+    source = """.code:
+loop:
+    INPUT r2
+    JZ_R end r2
+inside:
+    OUTPUT r2
+    JMP loop
+end:
+    JMP inside
+"""
+    data, code = translator.translate(source)
+    control_unit = FusedControlUnit(code, DataPath(data, 4, BufferInput([])))
+
+    assert control_unit.sites == {}
+
+
+def test_branch_without_operand_fails_only_when_executed():
+    data, code = translator.translate(".code:\n    MOV r1 1\n    HLT\n")
+    code.append(Instruction(Opcode.JZ, ()))
+    expected = simulation.simulation(data.copy(), code, [], 0, 1000)
+
+    assert simulation.simulation(data.copy(), code, [], 0, 1000, "fused") == expected
+    code.insert(1, Instruction(Opcode.JMP, ()))
+    with pytest.raises(IndexError):
+        simulation.simulation(data.copy(), code, [], 0, 1000, "fused")
+
+
+def test_pluggable_rules():
+    data, code = translate("hello_user")
+    rules = {"print_cstr": FUSION_RULES["print_cstr"]}
+    fusion = Fusion(rules)
+    output, _, _ = simulation.simulation(
+        data, code, list("Alice") + [chr(0)], 0, 100000, fusion=fusion
+    )
+
+    assert output == "hello, Alice"
+    # по проходу на каждый символ "hello, " и имени и на каждый завершающий \0
+    assert fusion.control_unit.fired == {"print_cstr": 8 + 6}
+
+
+@pytest.mark.parametrize(
+    "control_unit_class", [FunctionalControlUnit, FusedControlUnit]
+)
+def test_memory_overflow_state(control_unit_class):
+    # последнее слово строки перезаписано, цикл вывода выходит за память данных
+    source = """.data:
+    STRING s ab
+.code:
+    MOV r2 120
+    STORE_V 4 r2
+    MOV r1 2
+    LOAD_R r2 r1
+loop:
+    JZ_R end r2
+    OUTPUT r2
+    NEXT r2 r1
+    JMP loop
+end:
+    HLT
+"""
+    data, code = translator.translate(source)
+    data_path = DataPath(data, 4, BufferInput([]))
+    control_unit = control_unit_class(code, data_path)
+    with pytest.raises(IndexError):
+        control_unit.run(100000)
+
+    state = (control_unit.program_counter, control_unit.current_tick())
+    assert state + (control_unit.instructions,) == (6, 26, 15)
+    assert data_path.registers == [5, 120, 0, 0]
@@ -0,0 +1,73 @@
+"""Тесты форматов объектного файла."""
+
+import pytest
+
+import simulation
+import translator
+from processor.isa import Instruction, Opcode, read_code, write_binary_code, write_code
+
+
+def dump(code):
+    return [instr.to_dict(index) for index, instr in enumerate(code)]
+
+
+@pytest.mark.golden_test("golden/*.yml")
+def test_binary_format_matches_json(golden, tmp_path):
+    data, code = translator.translate(golden["in_source"])
+    write_code(tmp_path / "code.json", data, code)
+    write_binary_code(tmp_path / "code.bin", data, code)
+
+    json_data, json_code = read_code(tmp_path / "code.json")
+    binary_data, binary_code = read_code(tmp_path / "code.bin")
+
+    assert binary_data == json_data
+    assert dump(binary_code) == dump(json_code)
+
+
+def test_binary_format_stores_zero_buffers_without_words(tmp_path):
+    source = '.data:\n STRING s "hi"\n BUFFER big 1000000\n.code:\n HLT\n'
+    data, code = translator.translate(source)
+    write_binary_code(tmp_path / "code.bin", data, code)
+
+    assert (tmp_path / "code.bin").stat().st_size < 1000
+    assert read_code(tmp_path / "code.bin")[0] == data
+
+
+def test_large_buffer_is_allocated_on_demand(tmp_path):
+    source = (
+        '.data:\n STRING s "hi"\n BUFFER big 100000000\n NUMBER n 0\n'
+        ".code:\n MOV r1 n\n MOV r2 7\n STORE_R r1 r2\n LOAD_V r3 n\n OUTPUT r3\n HLT\n"
+    )
+    data, code = translator.translate(source)
+    write_binary_code(tmp_path / "code.bin", data, code)
+    data, code = read_code(tmp_path / "code.bin")
+
+    # в памяти хранятся только явно заданные слова
+    assert len(data) == 100000006
+    assert sum(len(chunk) for _, chunk in data.chunks) == 5
+    assert simulation.simulation(data, code, [], 0, 1000, "compiled") == ("\x07", 6, 8)
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary"])
+def test_loaded_instructions_are_interned(tmp_path, fmt):
+    source = ".code:\n INC r1\n OUTPUT r1\n INC r1\n OUTPUT r1\n HLT\n"
+    data, code = translator.translate(source)
+    assert code[0] is code[2] and code[1] is code[3]
+
+    writer = write_code if fmt == "json" else write_binary_code
+    writer(tmp_path / "code.o", data, code)
+    _, loaded = read_code(tmp_path / "code.o")
+
+    assert loaded == code
+    assert loaded[0] is loaded[2] and loaded[1] is loaded[3]
+
+
+def test_instruction_is_immutable():
+    instr = Instruction(Opcode.MOV, [0, 5])
+
+    assert instr.args == (0, 5)
+    assert instr == Instruction(Opcode.MOV, (0, 5))
+    with pytest.raises(AttributeError):
+        instr.args = (1, 5)
+    with pytest.raises(AttributeError):
+        instr.index = 0
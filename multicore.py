@@ -0,0 +1,113 @@
+import argparse
+import logging
+import sys
+
+import simulation
+from processor.devices import BufferInput, StreamInput, read_all
+from processor.isa import read_code
+from processor.multicore import SCHEDULES, MultiCore
+
+
+def read_input(input_file: str) -> list:
+    # ввод читается целиком, чтобы подать его и одноядерному запуску
+    if input_file is None:
+        return []
+    if input_file == "-":
+        return read_all(StreamInput(sys.stdin))
+    with open(input_file) as f:
+        return read_all(StreamInput(f))
+
+
+def main(
+    code_file: str,
+    input_file: str,
+    cores: int,
+    limit: int,
+    engine: str = "reference",
+    schedule: str = "round-robin",
+    quantum: int = 1,
+    baseline_file: str = None,
+):
+    data, code = read_code(code_file)
+    symbols = read_input(input_file)
+
+    machine = MultiCore(
+        data,
+        code,
+        cores,
+        BufferInput(list(symbols)),
+        registers=simulation.REGISTERS,
+        schedule=schedule,
+        quantum=quantum,
+        control_unit_class=simulation.ENGINES[engine],
+    )
+    machine.run(limit)
+
+    baseline_ticks = None
+    if baseline_file:
+        base_data, base_code = read_code(baseline_file)
+        _, _, baseline_ticks = simulation.simulation(
+            base_data, base_code, BufferInput(list(symbols)), 0, limit, engine
+        )
+
+    print(machine.output_device.getvalue())
+    print(machine.report(baseline_ticks))
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(
+        description="Симуляция нескольких ядер с общей памятью данных"
+    )
+    parser.add_argument("code_file", help="Имя файла с машинным кодом")
+    parser.add_argument(
+        "input_file",
+        nargs="?",
+        help="Имя входного файла, '-' для стандартного ввода (опционально)",
+    )
+    parser.add_argument(
+        "--cores", type=int, default=4, help="Число ядер (по умолчанию 4)"
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=SCHEDULES,
+        default="round-robin",
+        help="Порядок исполнения ядер (по умолчанию round-robin)",
+    )
+    parser.add_argument(
+        "--quantum",
+        type=int,
+        default=1,
+        help="Число инструкций ядра за очередь в round-robin (по умолчанию 1)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=100000,
+        help="Лимит тиков каждого ядра (по умолчанию 100000)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=simulation.ENGINES.keys(),
+        default="reference",
+        help="Реализация Control Unit ядер (по умолчанию reference)",
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="CODE_FILE",
+        help="Одноядерная программа для сравнения: вывести ускорение",
+    )
+
+    args = parser.parse_args()
+
+    main(
+        args.code_file,
+        args.input_file,
+        args.cores,
+        args.limit,
+        args.engine,
+        args.schedule,
+        args.quantum,
+        args.baseline,
+    )
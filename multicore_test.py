@@ -0,0 +1,44 @@
+"""Тесты многоядерной модели."""
+
+import pytest
+
+import simulation
+import translator
+from processor.multicore import MultiCore
+
+LIMIT = 100000
+
+
+def translate(task):
+    with open(f"tasks/{task}.txt") as f:
+        return translator.translate(f.read())
+
+
+@pytest.mark.parametrize("task", ["hello_user", "cat", "prob1"])
+@pytest.mark.parametrize("schedule", ["round-robin", "tick"])
+def test_single_core_matches_simulation(task, schedule):
+    input_buffer = list("Alice") + [chr(0)]
+    expected = simulation.simulation(*translate(task), list(input_buffer), 0, LIMIT)
+
+    machine = MultiCore(*translate(task), 1, input_buffer, schedule=schedule)
+    machine.run(LIMIT)
+
+    instructions, ticks, _ = machine.results()[0]
+    assert (machine.output_device.getvalue(), instructions, ticks) == expected
+
+
+@pytest.mark.parametrize(
+    "schedule, quantum", [("round-robin", 1), ("round-robin", 50), ("tick", 1)]
+)
+def test_parallel_prob1_speedup(schedule, quantum):
+    _, _, single_ticks = simulation.simulation(*translate("prob1"), [], 0, LIMIT)
+
+    machine = MultiCore(
+        *translate("prob1_parallel"), 4, [], schedule=schedule, quantum=quantum
+    )
+    machine.run(LIMIT)
+
+    assert machine.output_device.getvalue() == "233168"
+    assert [stopped for _, _, stopped in machine.results()] == ["halt"] * 4
+    assert single_ticks / machine.makespan() > 3
+    assert "Speedup" in machine.report(single_ticks)
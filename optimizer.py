@@ -0,0 +1,418 @@
+from collections import Counter, defaultdict
+
+from processor.control_unit import INSTRUCTION_TICKS
+from processor.isa import INPUT_MAP, OUTPUT_MAP, MachineCode, Opcode
+
+# Оптимизатор работает над токенами первой стадии трансляции: код операции -
+# строка, аргументы - числа (регистры и константы) или имена меток и
+# переменных. Метки хранятся списками имён у инструкций, поэтому удаление
+# инструкции не требует перенумерации переходов.
+
+BRANCHES = ("JMP", "JZ", "JZ_R")
+ZERO = "zero"
+
+# номера аргументов: читаемые регистры, записываемые регистры
+REGISTERS = {
+    "HLT": ((), ()),
+    "JMP": ((), ()),
+    "JZ": ((), ()),
+    "JZ_R": ((1,), ()),
+    "MOV": ((), (0,)),
+    "LOAD_V": ((), (0,)),
+    "LOAD_R": ((1,), (0,)),
+    "STORE_V": ((1,), ()),
+    "STORE_R": ((0, 1), ()),
+    "NEXT": ((1,), (0, 1)),
+    "CMP": ((0,), ()),
+    "INC": ((0,), (0,)),
+    "ADD_MMR": ((2,), ()),
+    "MOD_RRV": ((1,), (0,)),
+    "LINEAR": ((2,), (0,)),
+    "LINEAR_CONT": ((0, 2), (0,)),
+    "INPUT_STR": ((0,), ()),
+    "OUTPUT_STR": ((0,), ()),
+}
+ARGS_AMOUNT = {
+    "HLT": 0,
+    "JMP": 1,
+    "JZ": 1,
+    "JZ_R": 2,
+    "MOV": 2,
+    "LOAD_V": 2,
+    "LOAD_R": 2,
+    "STORE_V": 2,
+    "STORE_R": 2,
+    "NEXT": 2,
+    "CMP": 2,
+    "INC": 1,
+    "ADD_MMR": 3,
+    "MOD_RRV": 3,
+    "LINEAR": 3,
+    "LINEAR_CONT": 3,
+    "INPUT_STR": 1,
+    "OUTPUT_STR": 1,
+}
+# флаг zero полностью перезаписывают CMP и JZ_R, читает только JZ;
+# арифметика меняет его лишь для результатов 0 и 1
+ZERO_KILLERS = ("CMP", "JZ_R")
+ZERO_READERS = ("JZ",)
+
+
+def static_ticks(tokens: list) -> int:
+    return sum(INSTRUCTION_TICKS[Opcode[token.opcode]] for token in tokens)
+
+
+def is_io(addr) -> bool:
+    return isinstance(addr, int) and addr in (INPUT_MAP, OUTPUT_MAP)
+
+
+class OptimizationReport:
+    """Что сделал оптимизатор: число применений каждого преобразования,
+    число инструкций и их суммарная стоимость в тактах до и после."""
+
+    def __init__(self, before: list):
+        self.applied = Counter()
+        self.instructions_before = len(before)
+        self.ticks_before = static_ticks(before)
+        self.instructions_after = self.instructions_before
+        self.ticks_after = self.ticks_before
+
+    def finish(self, after: list):
+        self.instructions_after = len(after)
+        self.ticks_after = static_ticks(after)
+
+    def __str__(self):
+        lines = [f"{name}: {count}" for name, count in self.applied.items()]
+        lines.append(
+            f"Instr: {self.instructions_before} -> {self.instructions_after} "
+            f"Static ticks: {self.ticks_before} -> {self.ticks_after} "
+            f"(saved {self.ticks_before - self.ticks_after})"
+        )
+        return "\n".join(lines)
+
+
+class Optimizer:
+    """Оптимизация по графу потока управления над токенами первой стадии."""
+
+    tokens: list = None
+    # имена меток перед каждой инструкцией и после последней
+    names: list = None
+    report: OptimizationReport = None
+    # адреса переменных и размер памяти данных для проверки адресов чтения
+    variables: dict = None
+    memory_size: int = None
+
+    def __init__(
+        self, labels: dict, tokens: list, variables: dict = None, memory_size: int = 0
+    ):
+        # токены переписываются на месте, поэтому работа идёт над копиями
+        self.tokens = [
+            MachineCode(token.index, token.opcode, list(token.args)) for token in tokens
+        ]
+        at = defaultdict(list)
+        for name, index in labels.items():
+            at[index].append(name)
+        self.names = [at[index] for index in range(len(tokens) + 1)]
+        self.report = OptimizationReport(tokens)
+        self.variables = variables or {}
+        self.memory_size = memory_size
+
+    def is_supported(self) -> bool:
+        # программы с переходами по числовым адресам и метками в роли
+        # данных не оптимизируются: удаление инструкций сдвинуло бы адреса
+        labels = {name for names in self.names for name in names}
+        for token in self.tokens:
+            if token.opcode not in ARGS_AMOUNT:
+                return False
+            if len(token.args) != ARGS_AMOUNT[token.opcode]:
+                return False
+            reads, writes = REGISTERS[token.opcode]
+            if not all(isinstance(token.args[ind], int) for ind in reads + writes):
+                return False
+            for ind, arg in enumerate(token.args):
+                is_target = token.opcode in BRANCHES and ind == 0
+                if is_target != (arg in labels):
+                    return False
+        return True
+
+    def is_in_memory(self, addr) -> bool:
+        # адрес-значение или переменная внутри памяти данных
+        addr = self.variables.get(addr, addr)
+        return isinstance(addr, int) and 0 <= addr < self.memory_size
+
+    def positions(self) -> dict:
+        return {name: index for index, names in enumerate(self.names) for name in names}
+
+    def successors(self, index: int, positions: dict) -> list:
+        token = self.tokens[index]
+        if token.opcode == "HLT":
+            return []
+        if token.opcode == "JMP":
+            targets = [positions[token.args[0]]]
+        elif token.opcode in BRANCHES:
+            targets = [positions[token.args[0]], index + 1]
+        else:
+            targets = [index + 1]
+        return [target for target in targets if target < len(self.tokens)]
+
+    def remove(self, removed: set):
+        # метки удалённой инструкции переходят к следующей оставшейся
+        tokens, names = [], []
+        carried = []
+        for index, token in enumerate(self.tokens):
+            carried += self.names[index]
+            if index in removed:
+                continue
+            tokens.append(token)
+            names.append(carried)
+            carried = []
+        names.append(carried + self.names[-1])
+        self.tokens, self.names = tokens, names
+
+    def liveness(self) -> list:
+        """Множества живых после каждой инструкции регистров и флага zero."""
+        positions = self.positions()
+        size = len(self.tokens)
+        successors = [self.successors(index, positions) for index in range(size)]
+        live_in = [set() for _ in range(size)]
+        live_out = [set() for _ in range(size)]
+        changed = True
+        while changed:
+            changed = False
+            for index in reversed(range(size)):
+                token = self.tokens[index]
+                out = set().union(*(live_in[succ] for succ in successors[index]))
+                reads, writes = REGISTERS[token.opcode]
+                used = {token.args[ind] for ind in reads}
+                killed = {token.args[ind] for ind in writes} - used
+                if token.opcode in ZERO_READERS:
+                    used.add(ZERO)
+                if token.opcode in ZERO_KILLERS:
+                    killed.add(ZERO)
+                new_in = used | (out - killed)
+                if out != live_out[index] or new_in != live_in[index]:
+                    live_out[index], live_in[index] = out, new_in
+                    changed = True
+        return live_out
+
+    def thread_jumps(self) -> bool:
+        positions = self.positions()
+        changed = False
+        for token in self.tokens:
+            if token.opcode not in BRANCHES:
+                continue
+            label = token.args[0]
+            seen = set()
+            target = positions[label]
+            while (
+                target < len(self.tokens)
+                and self.tokens[target].opcode == "JMP"
+                and target not in seen
+            ):
+                seen.add(target)
+                label = self.tokens[target].args[0]
+                target = positions[label]
+            if label != token.args[0]:
+                token.args[0] = label
+                self.report.applied["jump threading"] += 1
+                changed = True
+        return changed
+
+    def remove_unreachable(self) -> bool:
+        positions = self.positions()
+        reachable = set()
+        stack = [0] if self.tokens else []
+        while stack:
+            index = stack.pop()
+            if index in reachable:
+                continue
+            reachable.add(index)
+            stack += self.successors(index, positions)
+        removed = set(range(len(self.tokens))) - reachable
+        self.remove(removed)
+        self.report.applied["unreachable code"] += len(removed)
+        return bool(removed)
+
+    def remove_jumps_to_next(self) -> bool:
+        positions = self.positions()
+        removed = {
+            index
+            for index, token in enumerate(self.tokens)
+            if token.opcode in ("JMP", "JZ") and positions[token.args[0]] == index + 1
+        }
+        self.remove(removed)
+        self.report.applied["jump to next"] += len(removed)
+        return bool(removed)
+
+    def fuse_compare_zero(self) -> bool:
+        # CMP r 0 + JZ L -> JZ_R L r: флаг выставляется так же
+        removed = set()
+        for index in range(len(self.tokens) - 1):
+            token, following = self.tokens[index], self.tokens[index + 1]
+            if (
+                token.opcode == "CMP"
+                and token.args[1] == 0
+                and following.opcode == "JZ"
+                and not self.names[index + 1]
+                and index not in removed
+            ):
+                self.tokens[index] = MachineCode(
+                    token.index, "JZ_R", [following.args[0], token.args[0]]
+                )
+                removed.add(index + 1)
+        self.remove(removed)
+        self.report.applied["CMP 0 + JZ -> JZ_R"] += len(removed)
+        return bool(removed)
+
+    def remove_redundant_memory(self) -> bool:
+        removed = set()
+        for index in range(len(self.tokens) - 1):
+            token, following = self.tokens[index], self.tokens[index + 1]
+            if self.names[index + 1] or index in removed:
+                continue
+            pair = (token.opcode, following.opcode)
+            if pair == ("STORE_V", "LOAD_V"):
+                # значение регистра уже совпадает с записанным
+                redundant = token.args == following.args[::-1]
+                addr = token.args[0]
+            elif pair == ("LOAD_V", "STORE_V"):
+                redundant = token.args == following.args[::-1]
+                addr = token.args[1]
+            elif pair in (("LOAD_V", "LOAD_V"), ("STORE_V", "STORE_V")):
+                redundant = token.args == following.args
+                addr = token.args[1] if pair[0] == "LOAD_V" else token.args[0]
+            else:
+                continue
+            if redundant and not is_io(addr):
+                removed.add(index + 1)
+        self.remove(removed)
+        self.report.applied["redundant load/store"] += len(removed)
+        return bool(removed)
+
+    def fold_linear(self) -> bool:
+        live_out = self.liveness()
+        removed = set()
+        replaced = False
+        consts = {}
+        index = 0
+        while index < len(self.tokens):
+            token = self.tokens[index]
+            if self.names[index]:
+                consts = {}
+            _, writes = REGISTERS[token.opcode]
+            if token.opcode == "LINEAR":
+                end = index + 1
+                while (
+                    end < len(self.tokens) and self.tokens[end].opcode == "LINEAR_CONT"
+                ):
+                    end += 1
+                value = self.evaluate_linear(self.tokens[index:end], consts)
+                dst = token.args[0]
+                if value is not None:
+                    result, flag_changed = value
+                    if not flag_changed or ZERO not in live_out[end - 1]:
+                        self.tokens[index] = MachineCode(
+                            token.index, "MOV", [dst, result]
+                        )
+                        removed.update(range(index + 1, end))
+                        replaced = True
+                        self.report.applied["constant LINEAR"] += 1
+                        consts[dst] = result
+                        index = end
+                        continue
+                consts.pop(dst, None)
+                index = end
+                continue
+            if token.opcode == "MOV" and isinstance(token.args[1], int):
+                consts[token.args[0]] = token.args[1]
+            elif token.opcode == "INC" and token.args[0] in consts:
+                consts[token.args[0]] += 1
+            else:
+                for ind in writes:
+                    consts.pop(token.args[ind], None)
+            if token.opcode in BRANCHES or token.opcode == "HLT":
+                consts = {}
+            index += 1
+        self.remove(removed)
+        return replaced
+
+    @staticmethod
+    def evaluate_linear(chain: list, consts: dict):
+        # результат цепочки и признак изменения флага zero, если все
+        # регистры-источники известны
+        regs = dict(consts)
+        flag_changed = False
+        for token in chain:
+            dst, val, src = token.args
+            if not isinstance(val, int) or src not in regs:
+                return None
+            buf = val * regs[src]
+            flag_changed |= buf in (0, 1)
+            if token.opcode == "LINEAR_CONT":
+                if dst not in regs:
+                    return None
+                buf += regs[dst]
+                flag_changed |= buf in (0, 1)
+            regs[dst] = buf
+        return regs[chain[0].args[0]], flag_changed
+
+    def remove_dead_writes(self) -> bool:
+        # запись в регистр, который дальше не читается; ввод и чтение, которое
+        # может выйти за пределы памяти данных, не удаляются
+        live_out = self.liveness()
+        removed = {
+            index
+            for index, token in enumerate(self.tokens)
+            if (
+                token.opcode == "MOV"
+                or (
+                    token.opcode == "LOAD_V"
+                    and not is_io(token.args[1])
+                    and self.is_in_memory(token.args[1])
+                )
+            )
+            and token.args[0] not in live_out[index]
+        }
+        self.remove(removed)
+        self.report.applied["dead register write"] += len(removed)
+        return bool(removed)
+
+    def run(self):
+        if not self.is_supported():
+            self.report.applied["skipped: unsupported program"] = 1
+            return
+        passes = (
+            self.thread_jumps,
+            self.remove_unreachable,
+            self.remove_jumps_to_next,
+            self.fuse_compare_zero,
+            self.remove_redundant_memory,
+            self.fold_linear,
+            self.remove_dead_writes,
+        )
+        changed = True
+        while changed:
+            changed = False
+            for optimization in passes:
+                changed |= optimization()
+        self.report.applied = +self.report.applied
+
+    def result(self):
+        labels = {}
+        for index, names in enumerate(self.names):
+            for name in names:
+                labels[name] = index
+        for index, token in enumerate(self.tokens):
+            token.index = index
+        self.report.finish(self.tokens)
+        return labels, self.tokens, self.report
+
+
+def optimize(labels: dict, tokens: list, variables: dict = None, memory_size: int = 0):
+    """Оптимизация токенов первой стадии: (метки, токены, отчёт).
+
+    Без переменных и размера памяти данных чтения из памяти не удаляются.
+    """
+    optimizer = Optimizer(labels, tokens, variables, memory_size)
+    optimizer.run()
+    return optimizer.result()
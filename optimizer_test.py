@@ -0,0 +1,133 @@
+"""Тесты оптимизатора транслятора."""
+
+import pytest
+
+import simulation
+import translator
+from optimizer import Optimizer, optimize
+
+LIMIT = 100000
+
+# программа со всеми оптимизируемыми шаблонами
+PATTERNS = """.data:
+    NUMBER n 0
+.code:
+    MOV r1 2
+    MOV r2 3
+    LINEAR r3 10 r1 20 r2
+    STORE_V n r3
+    LOAD_V r3 n
+    STORE_V n r3
+    JMP first
+    INC r3
+first:
+    JMP second
+second:
+    CMP r1 0
+    JZ end
+    OUTPUT r3
+    MOV r4 1
+    JMP end
+end:
+    HLT
+"""
+
+
+def run(source, input_text="", optimized=False):
+    data, code = translator.translate(source, optimized)
+    return simulation.simulation(data, code, list(input_text) + [chr(0)], 0, LIMIT)
+
+
+@pytest.mark.golden_test("golden/*.yml")
+def test_optimized_program_gives_same_output(golden):
+    source, input_text = golden["in_source"], golden["in_stdin"]
+    output, instructions, ticks = run(source, input_text)
+
+    optimized = run(source, input_text, optimized=True)
+
+    assert optimized[0] == output
+    assert optimized[1] <= instructions
+    assert optimized[2] <= ticks
+
+
+def test_all_patterns_are_applied():
+    _, _, report = translator.translate_optimized(PATTERNS)
+
+    assert set(report.applied) == {
+        "jump threading",
+        "unreachable code",
+        "jump to next",
+        "CMP 0 + JZ -> JZ_R",
+        "redundant load/store",
+        "constant LINEAR",
+        "dead register write",
+    }
+    output, _, ticks = run(PATTERNS)
+    assert run(PATTERNS, optimized=True)[0] == output == "P"
+    assert run(PATTERNS, optimized=True)[2] < ticks
+    assert report.ticks_after < report.ticks_before
+
+
+def test_constant_linear_kept_when_flag_is_read():
+    # LINEAR даёт 0 и выставляет флаг, который читает JZ
+    source = """.code:
+    MOV r1 0
+    CMP r1 5
+    LINEAR r2 7 r1
+    JZ zero
+    OUTPUT r1
+zero:
+    HLT
+"""
+    _, _, report = translator.translate_optimized(source)
+
+    assert "constant LINEAR" not in report.applied
+    assert run(source, optimized=True) == run(source)
+
+
+def test_numeric_jumps_are_not_optimized():
+    source = ".code:\n    JMP 2\n    HLT\n    MOV r1 65\n    OUTPUT r1\n    HLT\n"
+    _, _, report = translator.translate_optimized(source)
+
+    assert report.instructions_after == report.instructions_before
+    assert run(source, optimized=True) == run(source)
+
+
+def test_optimizer_does_not_change_input_tokens():
+    labels, _, _, tokens = translator.translate_stage_1(PATTERNS)
+    before = [(token.index, token.opcode, list(token.args)) for token in tokens]
+
+    optimize(dict(labels), tokens)
+
+    assert [(token.index, token.opcode, token.args) for token in tokens] == before
+
+
+def test_single_linear_folding_is_reported_as_change():
+    labels, _, _, tokens = translator.translate_stage_1(
+        ".code:\n    MOV r1 2\n    LINEAR r2 10 r1\n    OUTPUT r2\n    HLT\n"
+    )
+    optimizer = Optimizer(labels, tokens)
+
+    assert optimizer.fold_linear()
+    assert optimizer.tokens[1].opcode == "MOV"
+
+
+def test_out_of_memory_load_is_kept():
+    # чтение за пределами памяти данных падает и после оптимизации
+    source = """.data:
+    NUMBER n 0
+.code:
+    LOAD_V r1 100000
+    LOAD_V r2 n
+    MOV r1 65
+    MOV r2 66
+    OUTPUT r1
+    OUTPUT r2
+    HLT
+"""
+    _, code, report = translator.translate_optimized(source)
+
+    assert report.applied["dead register write"] == 1
+    assert [instr.args for instr in code][0] == (0, 100000)
+    with pytest.raises(IndexError):
+        run(source, optimized=True)
@@ -0,0 +1,87 @@
+"""Тесты конвейерной модели Control Unit."""
+
+import pytest
+
+import simulation
+import translator
+from processor.pipeline import Pipeline
+
+LIMIT = 100000
+
+LOOP = """.code:
+    MOV r1 0
+loop:
+    INC r1
+    CMP r1 3
+    JZ end
+    JMP loop
+end:
+    HLT
+"""
+
+
+def run(source, pipeline, input_text=""):
+    data, code = translator.translate(source)
+    return simulation.simulation(
+        data, code, list(input_text) + [chr(0)], 0, LIMIT, pipeline=pipeline
+    )
+
+
+@pytest.mark.golden_test("golden/*.yml")
+@pytest.mark.parametrize("branch", ["flush", "static"])
+@pytest.mark.parametrize("forwarding", [True, False])
+def test_pipeline_keeps_reference_output(golden, branch, forwarding):
+    source, input_text = golden["in_source"], golden["in_stdin"]
+    data, code = translator.translate(source)
+    expected = simulation.simulation(data, code, list(input_text) + [chr(0)], 0, LIMIT)
+
+    result = run(source, Pipeline(branch, forwarding), input_text)
+
+    assert result[:2] == expected[:2]
+
+
+def test_independent_instructions_issue_every_tick():
+    source = ".code:\n    MOV r1 1\n    MOV r2 2\n    MOV r3 3\n    HLT\n"
+    pipeline = Pipeline()
+
+    _, _, ticks = run(source, pipeline)
+
+    # три инструкции и четыре такта заполнения конвейера
+    assert ticks == 3 + 4
+    assert sum(pipeline.control_unit.stalls.values()) == 0
+
+
+@pytest.mark.parametrize("forwarding, stalls", [(True, 1), (False, 2)])
+def test_load_use_hazard_stalls(forwarding, stalls):
+    source = ".data:\n    NUMBER x 0\n.code:\n    LOAD_V r1 x\n    INC r1\n    HLT\n"
+    pipeline = Pipeline(forwarding=forwarding)
+
+    _, _, ticks = run(source, pipeline)
+
+    assert pipeline.control_unit.stalls["data"] == stalls
+    assert ticks == 2 + 4 + stalls
+
+
+@pytest.mark.parametrize("branch, mispredictions", [("flush", 3), ("static", 1)])
+def test_branch_policy(branch, mispredictions):
+    pipeline = Pipeline(branch)
+
+    run(LOOP, pipeline)
+
+    assert pipeline.control_unit.branches == 5
+    assert pipeline.control_unit.mispredictions == mispredictions
+    assert "CPI" in pipeline.report()
+
+
+def test_self_check_ignores_pipeline_ticks():
+    with open("tasks/hello_user.txt") as f:
+        data, code = translator.translate(f.read())
+    output, instructions, ticks = simulation.self_check(
+        data, code, list("Bob") + [chr(0)], LIMIT, "pipelined"
+    )
+    reference = simulation.simulation(
+        data.copy(), code, list("Bob") + [chr(0)], 0, LIMIT
+    )
+
+    assert (output, instructions) == reference[:2]
+    assert ticks != reference[2]
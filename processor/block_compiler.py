@@ -0,0 +1,308 @@
+from processor.control_unit import BLOCK_IO, INSTRUCTION_TICKS
+from processor.data_path import DataPath
+from processor.isa import INPUT_MAP, OUTPUT_MAP, MachineCode, Opcode
+from processor.memory import word_overflow
+from processor.predecoded import PredecodedControlUnit
+
+# инструкции, завершающие базовый блок
+TERMINATORS = (Opcode.JMP, Opcode.JZ, Opcode.JZ_R, Opcode.HLT)
+BRANCHES = (Opcode.JMP, Opcode.JZ, Opcode.JZ_R)
+
+# число аргументов и номера аргументов-регистров
+OPERANDS = {
+    Opcode.HLT: (0, ()),
+    Opcode.JMP: (1, ()),
+    Opcode.JZ: (1, ()),
+    Opcode.JZ_R: (2, (1,)),
+    Opcode.MOV: (2, (0,)),
+    Opcode.LOAD_V: (2, (0,)),
+    Opcode.LOAD_R: (2, (0, 1)),
+    Opcode.STORE_V: (2, (1,)),
+    Opcode.STORE_R: (2, (0, 1)),
+    Opcode.NEXT: (2, (0, 1)),
+    Opcode.CMP: (2, (0,)),
+    Opcode.INC: (1, (0,)),
+    Opcode.ADD_MMR: (3, (2,)),
+    Opcode.MOD_RRV: (3, (0, 1)),
+    Opcode.LINEAR: (3, (0, 2)),
+    Opcode.LINEAR_CONT: (3, (0, 2)),
+    Opcode.INPUT_STR: (1, (0,)),
+    Opcode.OUTPUT_STR: (1, (0,)),
+}
+
+
+def is_compilable(instr: MachineCode, registers_amount: int) -> bool:
+    if instr.opcode not in OPERANDS:
+        return False
+    args_amount, registers = OPERANDS[instr.opcode]
+    args = instr.args
+    if len(args) < args_amount:
+        return False
+    if not all(isinstance(arg, int) for arg in args[:args_amount]):
+        return False
+    return all(0 <= args[ind] < registers_amount for ind in registers)
+
+
+def split_basic_blocks(program: list, registers_amount: int) -> list:
+    """Разбиение программы на базовые блоки.
+
+    Возвращает список пар (адрес начала, инструкции блока). Инструкции,
+    которые нельзя скомпилировать, в блоки не попадают и исполняются
+    по одной.
+    """
+    size = len(program)
+    compilable = [is_compilable(instr, registers_amount) for instr in program]
+    leaders = {0}
+    for pc, instr in enumerate(program):
+        if not compilable[pc]:
+            leaders.update((pc, pc + 1))
+        elif instr.opcode in TERMINATORS:
+            leaders.add(pc + 1)
+            if instr.opcode in BRANCHES:
+                leaders.add(instr.args[0])
+        elif instr.opcode in BLOCK_IO:
+            # стоимость блочного ввода-вывода известна только при исполнении,
+            # поэтому такая инструкция последняя в блоке
+            leaders.add(pc + 1)
+
+    blocks = []
+    for start in sorted(addr for addr in leaders if 0 <= addr < size):
+        block = []
+        pc = start
+        while pc < size and compilable[pc]:
+            block.append(program[pc])
+            if program[pc].opcode in TERMINATORS or pc + 1 in leaders:
+                break
+            pc += 1
+        if block:
+            blocks.append((start, block))
+    return blocks
+
+
+class BlockCompiler:
+    """Генератор Python-кода для программы из базовых блоков.
+
+    Вся программа превращается в одну функцию, регистры, флаг и счётчики
+    хранятся в её локальных переменных. Переход между блоками - спуск по
+    бинарному дереву сравнений `pc`. Стоимость блока в тактах считается
+    при трансляции. Блок исполняется целиком, только если все его
+    инструкции начнутся до лимита тактов, иначе функция возвращает
+    управление для точного пошагового исполнения.
+    """
+
+    def __init__(self, program: list, registers_amount: int):
+        self.program = program
+        self.registers = [f"r{ind}" for ind in range(registers_amount)]
+        self.blocks = split_basic_blocks(program, registers_amount)
+        self.lines = []
+
+    def emit(self, depth: int, line: str):
+        self.lines.append("    " * depth + line)
+
+    def emit_flag(self, depth: int, value: str):
+        # флаг zero выставляется АЛУ только для результатов 0 и 1
+        self.emit(depth, f"if {value} == 0:")
+        self.emit(depth + 1, "z = True")
+        self.emit(depth, f"elif {value} == 1:")
+        self.emit(depth + 1, "z = False")
+
+    def emit_sync(self, depth: int):
+        # запись локального состояния обратно в процессор
+        registers = ", ".join(self.registers)
+        self.emit(depth, f"regs[:] = ({registers},)")
+        self.emit(depth, "dp.is_zero = z")
+        self.emit(depth, "dp.data_address = da")
+        self.emit(depth, "dp.buffer_register = sb")
+        self.emit(depth, "cu.program_counter = pc")
+        self.emit(depth, "cu._tick = t")
+        self.emit(depth, "cu.instructions = n")
+
+    def emit_stop(self, depth: int, pc: int, ticks: int, count: int):
+        # состояние процессора в момент остановки на инструкции `pc`
+        self.emit(depth, f"pc = {pc}")
+        self.emit(depth, f"t += {ticks}")
+        self.emit(depth, f"n += {count}")
+        self.emit_sync(depth)
+
+    def compile(self):
+        registers = ", ".join(self.registers)
+        self.emit(0, "def run_compiled(cu, limit):")
+        self.emit(1, "dp = cu.data_path")
+        self.emit(1, "regs = dp.registers")
+        self.emit(1, "mem = dp.data_memory.words")
+        self.emit(1, "read = dp._signal_input")
+        self.emit(1, "write = dp._signal_output")
+        self.emit(1, "input_string = dp.input_string")
+        self.emit(1, "output_string = dp.output_string")
+        self.emit(1, f"{registers}, = regs")
+        self.emit(1, "z = dp.is_zero")
+        self.emit(1, "da = dp.data_address")
+        self.emit(1, "sb = dp.buffer_register")
+        self.emit(1, "pc = cu.program_counter")
+        self.emit(1, "t = cu._tick")
+        self.emit(1, "n = cu.instructions")
+        self.emit(1, "while True:")
+        if self.blocks:
+            self.emit_dispatch(2, self.blocks)
+        self.emit(2, "break")
+        self.emit_sync(1)
+
+        namespace = {"word_overflow": word_overflow}
+        source = "\n".join(self.lines) + "\n"
+        exec(compile(source, "<compiled program>", "exec"), namespace)
+        return source, namespace["run_compiled"]
+
+    def emit_dispatch(self, depth: int, blocks: list):
+        if len(blocks) == 1:
+            start, block = blocks[0]
+            self.emit(depth, f"if pc == {start}:")
+            self.emit_block(depth + 1, start, block)
+            return
+        middle = len(blocks) // 2
+        self.emit(depth, f"if pc < {blocks[middle][0]}:")
+        self.emit_dispatch(depth + 1, blocks[:middle])
+        self.emit(depth, "else:")
+        self.emit_dispatch(depth + 1, blocks[middle:])
+
+    def emit_block(self, depth: int, start: int, block: list):
+        costs = [INSTRUCTION_TICKS[instr.opcode] for instr in block]
+        # последняя инструкция блока должна начаться до лимита
+        self.emit(depth, f"if t + {sum(costs[:-1])} >= limit:")
+        self.emit(depth + 1, "break")
+
+        elapsed = 0
+        for ind, instr in enumerate(block):
+            self.emit_instruction(depth, start + ind, instr, elapsed, ind)
+            elapsed += costs[ind]
+
+        last = block[-1]
+        if last.opcode not in TERMINATORS:
+            self.emit(depth, f"pc = {start + len(block)}")
+        self.emit(depth, f"t += {elapsed}")
+        self.emit(depth, f"n += {len(block)}")
+        self.emit(depth, "continue")
+
+    def emit_store(self, depth: int, value: str):
+        self.emit(depth, "try:")
+        self.emit(depth + 1, f"mem[da] = {value}")
+        self.emit(depth, "except ValueError:")
+        self.emit(depth + 1, "raise word_overflow(da) from None")
+
+    def emit_instruction(
+        self, depth: int, pc: int, instr: MachineCode, elapsed: int, ind: int
+    ):
+        opcode = instr.opcode
+        args = instr.args
+        r = self.registers
+
+        if opcode is Opcode.HLT:
+            self.emit_stop(depth, pc, elapsed, ind + 1)
+            self.emit(depth, "raise StopIteration()")
+        elif opcode is Opcode.JMP:
+            self.emit(depth, f"pc = {args[0]}")
+        elif opcode is Opcode.JZ:
+            self.emit(depth, f"pc = {args[0]} if z else {pc + 1}")
+        elif opcode is Opcode.JZ_R:
+            self.emit(depth, f"z = {r[args[1]]} == 0")
+            self.emit(depth, f"pc = {args[0]} if z else {pc + 1}")
+        elif opcode is Opcode.MOV:
+            self.emit(depth, f"{r[args[0]]} = {args[1]}")
+        elif opcode is Opcode.LOAD_V and args[1] == INPUT_MAP:
+            self.emit(depth, f"da = {INPUT_MAP}")
+            self.emit(depth, "try:")
+            self.emit(depth + 1, f"{r[args[0]]} = read()")
+            self.emit(depth, "except EOFError:")
+            # ввод читается на втором такте инструкции
+            self.emit_stop(depth + 1, pc, elapsed + 1, ind + 1)
+            self.emit(depth + 1, "raise")
+        elif opcode is Opcode.LOAD_V:
+            self.emit(depth, f"da = {args[1]}")
+            self.emit(depth, f"{r[args[0]]} = mem[da]")
+        elif opcode is Opcode.LOAD_R:
+            self.emit(depth, f"da = {r[args[1]]}")
+            self.emit(depth, f"{r[args[0]]} = mem[da]")
+        elif opcode is Opcode.STORE_V and args[0] == OUTPUT_MAP:
+            self.emit(depth, f"da = {OUTPUT_MAP}")
+            self.emit(depth, f"write({r[args[1]]})")
+        elif opcode is Opcode.STORE_V:
+            self.emit(depth, f"da = {args[0]}")
+            self.emit_store(depth, r[args[1]])
+        elif opcode is Opcode.STORE_R:
+            self.emit(depth, f"da = {r[args[0]]}")
+            self.emit_store(depth, r[args[1]])
+        elif opcode is Opcode.NEXT:
+            self.emit(depth, f"{r[args[1]]} += 1")
+            self.emit_flag(depth, r[args[1]])
+            self.emit(depth, f"da = {r[args[1]]}")
+            self.emit(depth, f"{r[args[0]]} = mem[da]")
+        elif opcode is Opcode.CMP:
+            self.emit(depth, f"z = {r[args[0]]} == {args[1]}")
+        elif opcode is Opcode.INC:
+            self.emit(depth, f"{r[args[0]]} += 1")
+            self.emit_flag(depth, r[args[0]])
+        elif opcode is Opcode.ADD_MMR:
+            self.emit(depth, f"sb = mem[{args[1]}]")
+            self.emit(depth, f"da = {args[0]}")
+            self.emit(depth, f"res = sb + {r[args[2]]}")
+            self.emit_flag(depth, "res")
+            self.emit_store(depth, "res")
+        elif opcode is Opcode.MOD_RRV:
+            # как и в DataPath, в буферный регистр защёлкивается номер регистра
+            self.emit(depth, f"sb = {args[1]}")
+            self.emit(depth, f"{r[args[0]]} = {r[args[1]]} % {args[2]}")
+            self.emit_flag(depth, r[args[0]])
+        elif opcode is Opcode.LINEAR:
+            self.emit(depth, f"sb = {args[1]}")
+            self.emit(depth, f"{r[args[0]]} = {args[1]} * {r[args[2]]}")
+            self.emit_flag(depth, r[args[0]])
+        elif opcode is Opcode.LINEAR_CONT:
+            self.emit(depth, f"sb = {args[1]} * {r[args[2]]}")
+            self.emit_flag(depth, "sb")
+            self.emit(depth, f"{r[args[0]]} = sb + {r[args[0]]}")
+            self.emit_flag(depth, r[args[0]])
+        elif opcode is Opcode.INPUT_STR:
+            self.emit(depth, "try:")
+            self.emit(depth + 1, f"t += input_string({r[args[0]]})")
+            self.emit(depth, "except EOFError:")
+            self.emit(depth + 1, "da = dp.data_address")
+            # такт на адрес и по такту на каждое записанное слово
+            self.emit_stop(depth + 1, pc, f"{elapsed + 1} + da - {r[args[0]]}", ind + 1)
+            self.emit(depth + 1, "raise")
+            self.emit(depth, "da = dp.data_address")
+        elif opcode is Opcode.OUTPUT_STR:
+            self.emit(depth, f"t += output_string({r[args[0]]})")
+            self.emit(depth, "da = dp.data_address")
+        else:
+            raise ValueError(f"Invalid opcode: {opcode}")
+
+
+class CompiledControlUnit(PredecodedControlUnit):
+    """Control Unit, исполняющий программу, скомпилированную в Python.
+
+    Компилированный код исполняет блоки целиком, а у лимита тактов и на
+    некомпилируемых инструкциях управление передаётся предекодированным
+    обработчикам по одной инструкции. Вывод, число инструкций и тактов
+    совпадают с `ControlUnit`. `run` журнал состояний по инструкциям не ведёт,
+    его ведут предекодированные обработчики при исполнении по одной инструкции.
+    """
+
+    instructions: int = None
+    source: str = None
+
+    def __init__(self, program_memory: list, data_path: DataPath):
+        super().__init__(program_memory, data_path)
+        self.instructions = 0
+        compiler = BlockCompiler(program_memory, len(data_path.registers))
+        self.source, self._run_compiled = compiler.compile()
+
+    def reset(self):
+        super().reset()
+        self.instructions = 0
+
+    def run(self, limit: int):
+        while self._tick < limit:
+            self._run_compiled(self, limit)
+            if self._tick >= limit:
+                break
+            self.instructions += 1
+            self.decode_and_execute_instruction()
@@ -0,0 +1,192 @@
+from bisect import bisect_right
+from collections import OrderedDict
+
+from processor.control_unit import ControlUnit
+from processor.data_path import DataPath
+from processor.memory import DataMemory, word_overflow
+
+EVICTIONS = ("lru", "fifo")
+WRITE_POLICIES = ("back", "through")
+
+
+class DataCache:
+    """Модель кэша данных.
+
+    Размеры задаются в машинных словах. Кэш множественно-ассоциативный:
+    `size` слов делятся на строки по `line_size` слов, строки - на
+    множества по `associativity` строк. Вытесняется самая давно
+    использованная (`lru`) или самая давно загруженная (`fifo`) строка.
+
+    - `back` - запись с размещением: строка загружается и помечается
+      изменённой, в память она записывается при вытеснении
+    - `through` - сквозная запись без размещения: каждая запись идёт в память
+
+    Загрузка строки и запись в память стоят по `miss_penalty` тактов.
+    Попадания и промахи считаются по отрезкам памяти данных.
+    """
+
+    size: int = None
+    line_size: int = None
+    associativity: int = None
+    eviction: str = None
+    write: str = None
+    miss_penalty: int = None
+
+    sets_amount: int = None
+    # номер множества -> тег строки -> строка изменена
+    sets: list = None
+    # начала отрезков памяти и счётчики по отрезкам
+    starts: list = None
+    segments: list = None
+    hits: list = None
+    misses: list = None
+    writebacks: int = None
+    memory_writes: int = None
+    stall_ticks: int = None
+
+    def __init__(
+        self,
+        size: int,
+        line_size: int = 4,
+        associativity: int = 2,
+        eviction: str = "lru",
+        write: str = "back",
+        miss_penalty: int = 10,
+    ):
+        assert eviction in EVICTIONS, f"Unknown eviction policy: {eviction}"
+        assert write in WRITE_POLICIES, f"Unknown write policy: {write}"
+        assert size % (line_size * associativity) == 0, (
+            "Cache size must be a multiple of line size * associativity"
+        )
+        self.size = size
+        self.line_size = line_size
+        self.associativity = associativity
+        self.eviction = eviction
+        self.write = write
+        self.miss_penalty = miss_penalty
+        self.sets_amount = size // (line_size * associativity)
+        self.bind(DataMemory())
+
+    def bind(self, memory: DataMemory):
+        """Сброс кэша и статистики для памяти `memory`."""
+        self.sets = [OrderedDict() for _ in range(self.sets_amount)]
+        self.segments = list(memory.segments) or [(0, len(memory), None)]
+        self.starts = [start for start, _, _ in self.segments]
+        self.hits = [0] * len(self.segments)
+        self.misses = [0] * len(self.segments)
+        self.writebacks = 0
+        self.memory_writes = 0
+        self.stall_ticks = 0
+
+    def create_control_unit(self, program_memory: list, data_path: DataPath):
+        return CachedControlUnit(program_memory, data_path, self)
+
+    def access(self, addr: int, is_write: bool) -> int:
+        """Обращение к слову `addr`, возвращает такты простоя."""
+        line = addr // self.line_size
+        lines = self.sets[line % self.sets_amount]
+        tag = line // self.sets_amount
+        segment = max(bisect_right(self.starts, addr) - 1, 0)
+        penalty = 0
+
+        if tag in lines:
+            self.hits[segment] += 1
+            if self.eviction == "lru":
+                lines.move_to_end(tag)
+            if is_write:
+                if self.write == "back":
+                    lines[tag] = True
+                else:
+                    penalty += self._write_memory()
+        else:
+            self.misses[segment] += 1
+            if is_write and self.write == "through":
+                # без размещения: строка не загружается
+                penalty += self._write_memory()
+            else:
+                if len(lines) >= self.associativity:
+                    _, dirty = lines.popitem(last=False)
+                    if dirty:
+                        self.writebacks += 1
+                        penalty += self._write_memory()
+                lines[tag] = is_write
+                penalty += self.miss_penalty
+
+        self.stall_ticks += penalty
+        return penalty
+
+    def _write_memory(self) -> int:
+        self.memory_writes += 1
+        return self.miss_penalty
+
+    def report(self) -> str:
+        hits, misses = sum(self.hits), sum(self.misses)
+        total = max(hits + misses, 1)
+        lines = [
+            f"Cache: {self.size} words, line {self.line_size}, "
+            f"{self.associativity}-way, {self.eviction}, write-{self.write}, "
+            f"miss penalty {self.miss_penalty}",
+            f"Hits: {hits} Misses: {misses} Hit rate: {100 * hits / total:.1f}% "
+            f"Writebacks: {self.writebacks} Memory writes: {self.memory_writes} "
+            f"Stall ticks: {self.stall_ticks}",
+            f"{'range':15} {'kind':8} {'hits':>8} {'misses':>8} {'%':>6}",
+        ]
+        for (start, length, kind), hit, miss in zip(
+            self.segments, self.hits, self.misses
+        ):
+            if hit + miss == 0:
+                continue
+            addrs = f"{start}..{start + length - 1}"
+            name = kind.name if kind is not None else "-"
+            lines.append(
+                f"{addrs:15} {name:8} {hit:8} {miss:8} {100 * hit / (hit + miss):6.1f}"
+            )
+        return "\n".join(lines)
+
+
+class CachedMemory:
+    """Память данных, обращения к которой проходят через `DataCache`."""
+
+    def __init__(self, memory: DataMemory, cache: DataCache):
+        self.memory = memory
+        self.words = memory.words
+        self.segments = memory.segments
+        self.cache = cache
+        # такты простоя текущей инструкции
+        self.penalty = 0
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __getitem__(self, addr: int) -> int:
+        value = self.words[addr]
+        self.penalty += self.cache.access(addr, False)
+        return value
+
+    def __setitem__(self, addr: int, value: int):
+        try:
+            self.words[addr] = value
+        except ValueError:
+            raise word_overflow(addr) from None
+        self.penalty += self.cache.access(addr, True)
+
+    def kind(self, addr: int):
+        return self.memory.kind(addr)
+
+
+class CachedControlUnit(ControlUnit):
+    """Эталонный Control Unit с кэшем данных: такты простоя из-за
+    промахов добавляются к тактам инструкции, вызвавшей обращение."""
+
+    def __init__(self, program_memory: list, data_path: DataPath, cache: DataCache):
+        cache.bind(data_path.data_memory)
+        data_path.data_memory = CachedMemory(data_path.data_memory, cache)
+        super().__init__(program_memory, data_path)
+
+    def decode_and_execute_instruction(self):
+        memory = self.data_path.data_memory
+        try:
+            super().decode_and_execute_instruction()
+        finally:
+            self._tick += memory.penalty
+            memory.penalty = 0
@@ -1,6 +1,30 @@
 from processor.data_path import DataPath
 from processor.isa import MachineCode, Opcode, Operation
 
+# число тактов каждой инструкции (HLT останавливает процессор до такта)
+INSTRUCTION_TICKS = {
+    Opcode.HLT: 0,
+    Opcode.JMP: 1,
+    Opcode.JZ: 1,
+    Opcode.JZ_R: 2,
+    Opcode.MOV: 1,
+    Opcode.LOAD_V: 2,
+    Opcode.LOAD_R: 2,
+    Opcode.STORE_V: 2,
+    Opcode.STORE_R: 2,
+    Opcode.NEXT: 3,
+    Opcode.CMP: 1,
+    Opcode.INC: 1,
+    Opcode.ADD_MMR: 4,
+    Opcode.MOD_RRV: 2,
+    Opcode.LINEAR: 2,
+    Opcode.LINEAR_CONT: 3,
+    # блочный ввод-вывод: ещё по такту на каждое слово, включая завершающий 0
+    Opcode.INPUT_STR: 2,
+    Opcode.OUTPUT_STR: 2,
+}
+BLOCK_IO = (Opcode.INPUT_STR, Opcode.OUTPUT_STR)
+
 
 class ControlUnit:
     program_memory: list = None
@@ -16,6 +40,10 @@ class ControlUnit:
         self.data_path = data_path
         self._tick = 0
 
+    def reset(self):
+        self.program_counter = 0
+        self._tick = 0
+
     def tick(self):
         self._tick += 1
 
@@ -122,12 +150,33 @@ class ControlUnit:
             self.tick()
             self.data_path.signal_latch_register(instr)
 
+        elif opcode in BLOCK_IO:
+            self.data_path.signal_latch_data_address(instr)
+            self.tick()
+            while self.data_path.signal_transfer(instr):
+                self.tick()
+            self.tick()
+
         else:
             raise ValueError(f"Invalid opcode: {opcode}")
 
         self.signal_latch_program_counter(sel_next=True)
         self.tick()
 
+    def step(self):
+        """Пошаговое исполнение: на каждый `next()` исполняется одна инструкция.
+
+        Генератор возвращает адрес исполненной инструкции и завершается на
+        `HLT`, конец ввода (`EOFError`) передаётся вызывающему.
+        """
+        try:
+            while True:
+                pc = self.program_counter
+                self.decode_and_execute_instruction()
+                yield pc
+        except StopIteration:
+            return
+
     def __repr__(self):
         # print("======")
         # print(self.program_counter, self.program_memory)
@@ -1,10 +1,18 @@
 import logging
 
+from processor.devices import (
+    BufferOutput,
+    InputDevice,
+    OutputDevice,
+    as_input_device,
+    render_output,
+)
 from processor.isa import Opcode, MachineCode, Operation, OUTPUT_MAP, INPUT_MAP
+from processor.memory import DataMemory
 
 
 class DataPath:
-    data_memory: list = None
+    data_memory: DataMemory = None
 
     data_address: int = None
     buffer_register: int = None
@@ -12,18 +20,40 @@ class DataPath:
 
     is_zero: bool = None
 
-    input_buffer: list = None
-    output_buffer: list = None
+    input_device: InputDevice = None
+    output_device: OutputDevice = None
 
-    def __init__(self, data_memory: list, registers_amount: int, input_buffer: list):
+    def __init__(
+        self,
+        data_memory: DataMemory,
+        registers_amount: int,
+        input_device,
+        output_device: OutputDevice = None,
+    ):
         assert registers_amount > 0, "More registers!"
         self.data_memory = data_memory
         self.data_address = 0
         self.buffer_register = 0
         self.registers = [0] * registers_amount
         self.is_zero = False
-        self.input_buffer = input_buffer
-        self.output_buffer = []
+        self.input_device = as_input_device(input_device)
+        self.output_device = output_device if output_device else BufferOutput()
+
+    def reset(
+        self,
+        data_memory: DataMemory,
+        input_device,
+        output_device: OutputDevice = None,
+    ):
+        # память и регистры перезаписываются на месте: обработчики,
+        # связанные с ними при предекодировании, остаются действительными
+        self.data_memory.load(data_memory)
+        self.data_address = 0
+        self.buffer_register = 0
+        self.registers[:] = [0] * len(self.registers)
+        self.is_zero = False
+        self.input_device = as_input_device(input_device)
+        self.output_device = output_device if output_device else BufferOutput()
 
     def signal_latch_data_address(self, instr: MachineCode, step: int = 1):
         opcode = instr.opcode
@@ -33,7 +63,7 @@ class DataPath:
             self.data_address = self.registers[instr.args[1]]
         elif opcode is Opcode.STORE_V:
             self.data_address = instr.args[0]
-        elif opcode is Opcode.STORE_R:
+        elif opcode in [Opcode.STORE_R, Opcode.INPUT_STR, Opcode.OUTPUT_STR]:
             self.data_address = self.registers[instr.args[0]]
         elif opcode is Opcode.ADD_MMR:
             if step == 1:
@@ -48,7 +78,7 @@ class DataPath:
     def signal_latch_buffer_register(self, instr: MachineCode, step: int = 1):
         opcode = instr.opcode
         if opcode is Opcode.ADD_MMR:
-            self.buffer_register = self.data_memory[self.data_address].args[0]
+            self.buffer_register = self.data_memory[self.data_address]
         elif opcode is Opcode.MOD_RRV:
             self.buffer_register = instr.args[1]
         elif opcode is Opcode.LINEAR:
@@ -74,16 +104,14 @@ class DataPath:
         if opcode is Opcode.MOV:
             self.registers[instr.args[0]] = instr.args[1]
         elif opcode in [Opcode.LOAD_V, Opcode.LOAD_R]:
-            self.registers[instr.args[0]] = self.data_memory[self.data_address].args[0]
+            self.registers[instr.args[0]] = self.data_memory[self.data_address]
         elif opcode is Opcode.NEXT:
             if step == 1:
                 self.registers[instr.args[1]] = self.alu(
                     Operation.ADD, self.registers[instr.args[1]], 1
                 )
             elif step == 2:
-                self.registers[instr.args[0]] = self.data_memory[
-                    self.data_address
-                ].args[0]
+                self.registers[instr.args[0]] = self.data_memory[self.data_address]
             else:
                 raise ValueError("Step must be 1 or 2!")
         elif opcode is Opcode.INC:
@@ -130,29 +158,78 @@ class DataPath:
             return
 
         if opcode in [Opcode.STORE_V, Opcode.STORE_R]:
-            self.data_memory[self.data_address].args[0] = self.registers[instr.args[1]]
+            self.data_memory[self.data_address] = self.registers[instr.args[1]]
         elif opcode is Opcode.ADD_MMR:
-            self.data_memory[self.data_address].args[0] = self.alu(
+            self.data_memory[self.data_address] = self.alu(
                 Operation.ADD, self.buffer_register, self.registers[instr.args[2]]
             )
         else:
             raise ValueError(f"Wrong opcode: {opcode}")
 
+    def signal_transfer(self, instr: MachineCode) -> bool:
+        """Пересылка одного слова блочного ввода-вывода по адресу DR.
+
+        Возвращает False на завершающем нуле, иначе сдвигает DR на следующее слово.
+        """
+        opcode = instr.opcode
+        if opcode is Opcode.INPUT_STR:
+            val = self._signal_input()
+            self.data_memory[self.data_address] = val
+        elif opcode is Opcode.OUTPUT_STR:
+            val = self.data_memory[self.data_address]
+            if val != 0:
+                self._signal_output(val)
+        else:
+            raise ValueError(f"Wrong opcode: {opcode}")
+
+        if val == 0:
+            return False
+        self.data_address += 1
+        return True
+
+    def input_string(self, addr: int) -> int:
+        """Блочный ввод строки с завершающим 0 по адресу `addr` за один вызов.
+
+        Возвращает число записанных слов. DR, как и при пересылке по словам,
+        указывает на последнее записанное слово или, если ввод кончился,
+        на слово, которое не удалось прочитать.
+        """
+        mem = self.data_memory.words
+        read = self._signal_input
+        start = addr
+        try:
+            while True:
+                val = mem[addr] = read()
+                if val == 0:
+                    return addr - start + 1
+                addr += 1
+        finally:
+            self.data_address = addr
+
+    def output_string(self, addr: int) -> int:
+        """Блочный вывод строки с адреса `addr` до 0, возвращает число прочитанных слов."""
+        mem = self.data_memory.words
+        write = self._signal_output
+        start = addr
+        while True:
+            val = mem[addr]
+            if val == 0:
+                self.data_address = addr
+                return addr - start + 1
+            write(val)
+            addr += 1
+
     def _signal_input(self):
-        if len(self.input_buffer) == 0:
-            raise EOFError("End of input file")
-        str_symbol = self.input_buffer.pop(0)
+        str_symbol = self.input_device.read()
         val = ord(str_symbol)
         if val == 0:
             str_symbol = ""
-        logging.debug(f"input: {str_symbol}")
+        logging.debug("input: %s", str_symbol)
         return val
 
     def _signal_output(self, val):
-        self.output_buffer.append(val)
-        logging.debug(
-            f"output: {''.join(map(lambda x: chr(x) if x < 256 else str(x), self.output_buffer))} << {val}"
-        )
+        self.output_device.write(val)
+        logging.debug("output: %s << %s", render_output(val), val)
 
     def zero(self):
         return self.is_zero
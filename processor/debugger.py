@@ -0,0 +1,193 @@
+import operator
+import re
+
+from processor.control_unit import ControlUnit
+
+# условие точки останова: `rN OP VALUE`, например `r1 == 5`; регистры
+# нумеруются с единицы, как в исходном коде
+CONDITION = re.compile(r"^\s*r(\d+)\s*(==|!=|<=|>=|<|>)\s*(-?\d+)\s*$")
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class Condition:
+    """Условие на значение регистра с индексом `reg`, вычисляемое перед инструкцией."""
+
+    def __init__(self, reg: int, op: str, value: int):
+        self.reg = reg
+        self.op = op
+        self.value = value
+        self.compare = COMPARISONS[op]
+
+    def __call__(self, registers: list) -> bool:
+        return self.compare(registers[self.reg], self.value)
+
+    def __repr__(self):
+        return f"r{self.reg + 1} {self.op} {self.value}"
+
+
+def parse_condition(text: str) -> Condition:
+    match = CONDITION.match(text)
+    if match is None:
+        raise ValueError(f"Invalid condition: {text}")
+    reg, op, value = match.groups()
+    if int(reg) < 1:
+        raise ValueError(f"Invalid register: r{reg}")
+    return Condition(int(reg) - 1, op, int(value))
+
+
+class Debugger:
+    """Отладчик программы на любой реализации Control Unit.
+
+    Поддерживаются точки останова по адресу команды (в том числе с условием
+    на значение регистра), точки наблюдения за словами памяти данных и
+    исполнение до заданного такта. Остановка на точке останова происходит
+    до исполнения инструкции, на точке наблюдения - после инструкции,
+    изменившей слово.
+
+    Пока точки не заданы, программа исполняется быстрым путём реализации
+    (`run`, если он есть), без проверок после каждой инструкции.
+    Инструментированный путь исполняет по одной инструкции через
+    генератор `ControlUnit.step`.
+
+    `cont`, `step` и `until` возвращают причину остановки: `breakpoint`,
+    `watchpoint`, `step`, `tick` (достигнут такт), `halt` или `input`
+    (конец ввода). Ошибка программы (например, обращение за пределы памяти)
+    пробрасывается вызывающему, а отладчик остаётся в состоянии `fault`.
+    """
+
+    control_unit: ControlUnit = None
+    # адрес команды -> условие или None
+    breakpoints: dict = None
+    # адрес данных -> последнее известное значение
+    watchpoints: dict = None
+    instructions: int = None
+    stopped: str = None
+    # изменения последней остановки на точке наблюдения: (адрес, было, стало)
+    changes: list = None
+
+    def __init__(self, control_unit: ControlUnit):
+        self.control_unit = control_unit
+        self.breakpoints = {}
+        self.watchpoints = {}
+        self.instructions = 0
+        self.changes = []
+        self._steps = control_unit.step()
+
+    @property
+    def finished(self) -> bool:
+        return self.stopped in ("halt", "input", "fault")
+
+    def break_at(self, pc: int, condition=None):
+        """Точка останова по адресу `pc`, условие - строка `rN OP VALUE` или функция регистров."""
+        if not 0 <= pc < len(self.control_unit.program_memory):
+            raise ValueError(f"Invalid breakpoint address: {pc}")
+        if isinstance(condition, str):
+            condition = parse_condition(condition)
+            if condition.reg >= len(self.control_unit.data_path.registers):
+                raise ValueError(f"Invalid register: {condition}")
+        self.breakpoints[pc] = condition
+
+    def delete(self, pc: int):
+        self.breakpoints.pop(pc, None)
+
+    def watch(self, addr: int):
+        words = self.control_unit.data_path.data_memory.words
+        if not 0 <= addr < len(words):
+            raise ValueError(f"Invalid watchpoint address: {addr}")
+        self.watchpoints[addr] = words[addr]
+
+    def unwatch(self, addr: int):
+        self.watchpoints.pop(addr, None)
+
+    def cont(self, limit: int) -> str:
+        """Исполнение до точки останова или наблюдения, остановки программы или такта `limit`."""
+        if self.breakpoints or self.watchpoints:
+            return self._execute(limit, None)
+        return self._run(limit)
+
+    def until(self, tick: int) -> str:
+        return self.cont(tick)
+
+    def step(self, count: int = 1) -> str:
+        """Исполнение `count` инструкций, точки останова и наблюдения учитываются."""
+        return self._execute(None, count)
+
+    def _stop(self, reason: str) -> str:
+        self.stopped = reason
+        return reason
+
+    def _run(self, limit: int) -> str:
+        if self.finished:
+            return self.stopped
+        control_unit = self.control_unit
+        run = getattr(control_unit, "run", None)
+        try:
+            if run is not None:
+                start = control_unit.instructions
+                try:
+                    run(limit)
+                finally:
+                    self.instructions += control_unit.instructions - start
+            else:
+                while control_unit.current_tick() < limit:
+                    self.instructions += 1
+                    control_unit.decode_and_execute_instruction()
+        except StopIteration:
+            return self._stop("halt")
+        except EOFError:
+            return self._stop("input")
+        except Exception:
+            self._stop("fault")
+            raise
+        return self._stop("tick")
+
+    def _execute(self, limit, count) -> str:
+        if self.finished:
+            return self.stopped
+        control_unit = self.control_unit
+        registers = control_unit.data_path.registers
+        words = control_unit.data_path.data_memory.words
+        breakpoints, watchpoints = self.breakpoints, self.watchpoints
+        steps = self._steps
+        self.changes = []
+        # после остановки точка останова на текущем адресе пропускается
+        resumed = self.stopped is not None
+        executed = 0
+        while True:
+            if count is not None and executed == count:
+                return self._stop("step")
+            if limit is not None and control_unit.current_tick() >= limit:
+                return self._stop("tick")
+            pc = control_unit.program_counter
+            if pc in breakpoints and not resumed:
+                condition = breakpoints[pc]
+                if condition is None or condition(registers):
+                    return self._stop("breakpoint")
+            resumed = False
+
+            self.instructions += 1
+            executed += 1
+            try:
+                next(steps)
+            except StopIteration:
+                return self._stop("halt")
+            except EOFError:
+                return self._stop("input")
+            except Exception:
+                self._stop("fault")
+                raise
+
+            for addr, old in watchpoints.items():
+                if words[addr] != old:
+                    self.changes.append((addr, old, words[addr]))
+            if self.changes:
+                for addr, _, new in self.changes:
+                    watchpoints[addr] = new
+                return self._stop("watchpoint")
@@ -0,0 +1,186 @@
+# размер куска, читаемого из потока ввода за раз
+CHUNK_SIZE = 1 << 16
+
+
+class InputDevice:
+    """Порт ввода.
+
+    `read` возвращает следующий символ и бросает `EOFError`, когда
+    символов больше нет. Каждое чтение выполняется за O(1).
+    """
+
+    def read(self) -> str:
+        raise NotImplementedError()
+
+    def tell(self) -> int:
+        """Число уже прочитанных символов."""
+        raise NotImplementedError()
+
+    def skip(self, amount: int):
+        """Пропуск `amount` символов, например при восстановлении из снимка."""
+        raise NotImplementedError()
+
+
+class BufferInput(InputDevice):
+    """Ввод из заранее подготовленной последовательности символов."""
+
+    symbols: list = None
+    position: int = None
+
+    def __init__(self, symbols: list):
+        self.symbols = symbols
+        self.position = 0
+
+    def read(self) -> str:
+        if self.position >= len(self.symbols):
+            raise EOFError("End of input file")
+        symbol = self.symbols[self.position]
+        self.position += 1
+        return symbol
+
+    def tell(self) -> int:
+        return self.position
+
+    def skip(self, amount: int):
+        self.position += amount
+
+
+class StreamInput(InputDevice):
+    """Ленивый ввод из текстового потока (файл, stdin, pipe).
+
+    Поток читается кусками по `chunk_size` символов. Как и при чтении файла
+    целиком, после последнего символа выдаётся `\\0`, а следующее чтение
+    бросает `EOFError`.
+    """
+
+    stream = None
+    chunk: str = None
+    position: int = None
+    # число символов в уже прочитанных кусках
+    offset: int = None
+    exhausted: bool = None
+
+    def __init__(self, stream, chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.chunk = ""
+        self.position = 0
+        self.offset = 0
+        self.exhausted = False
+
+    def _next_chunk(self):
+        if self.exhausted:
+            raise EOFError("End of input file")
+        self.offset += len(self.chunk)
+        self.chunk = self.stream.read(self.chunk_size)
+        self.position = 0
+        if not self.chunk:
+            self.exhausted = True
+            self.chunk = chr(0)
+
+    def read(self) -> str:
+        if self.position >= len(self.chunk):
+            self._next_chunk()
+        symbol = self.chunk[self.position]
+        self.position += 1
+        return symbol
+
+    def tell(self) -> int:
+        return self.offset + self.position
+
+    def skip(self, amount: int):
+        while amount > 0:
+            if self.position >= len(self.chunk):
+                self._next_chunk()
+            step = min(amount, len(self.chunk) - self.position)
+            self.position += step
+            amount -= step
+
+
+def read_all(device: InputDevice) -> list:
+    symbols = []
+    try:
+        while True:
+            symbols.append(device.read())
+    except EOFError:
+        return symbols
+
+
+def as_input_device(source) -> InputDevice:
+    # список символов оборачивается для совместимости со старым интерфейсом
+    if isinstance(source, InputDevice):
+        return source
+    return BufferInput(source)
+
+
+def render_output(val: int) -> str:
+    # коды символов выводятся символами, остальные числа - десятичной записью
+    return chr(val) if val < 256 else str(val)
+
+
+class OutputDevice:
+    """Порт вывода.
+
+    `write` принимает очередное выведенное значение, `flush` отправляет
+    накопленное получателю, `getvalue` возвращает сохранённый вывод.
+    """
+
+    def write(self, val: int):
+        raise NotImplementedError()
+
+    def flush(self):
+        pass
+
+    def tell(self) -> int:
+        """Позиция потока после записи накопленного, -1 - вывод не в файл."""
+        self.flush()
+        return -1
+
+    def getvalue(self) -> str:
+        return ""
+
+
+class BufferOutput(OutputDevice):
+    """Вывод, целиком сохраняемый в памяти."""
+
+    values: list = None
+
+    def __init__(self):
+        self.values = []
+
+    def write(self, val: int):
+        self.values.append(val)
+
+    def getvalue(self) -> str:
+        return "".join(map(render_output, self.values))
+
+
+class StreamOutput(OutputDevice):
+    """Потоковый вывод в файл или stdout.
+
+    Значения накапливаются кусками по `chunk_size` символов и записываются
+    в поток по мере работы программы, поэтому расход памяти ограничен.
+    Вывод не сохраняется, `getvalue` возвращает пустую строку.
+    """
+
+    stream = None
+    pending: list = None
+
+    def __init__(self, stream, chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.pending = []
+
+    def write(self, val: int):
+        self.pending.append(render_output(val))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        self.stream.write("".join(self.pending))
+        self.stream.flush()
+        self.pending.clear()
+
+    def tell(self) -> int:
+        self.flush()
+        return self.stream.tell() if self.stream.seekable() else -1
@@ -0,0 +1,266 @@
+from functools import partial
+
+from processor.block_compiler import is_compilable
+from processor.control_unit import BLOCK_IO, INSTRUCTION_TICKS, ControlUnit
+from processor.data_path import DataPath
+from processor.isa import INPUT_MAP, OUTPUT_MAP, MachineCode, Opcode
+from processor.memory import word_overflow
+
+
+class FunctionalControlUnit(ControlUnit):
+    """Функциональная модель Control Unit.
+
+    Инструкция исполняется целиком одним обработчиком без сигналов
+    DataPath, а счётчик тактов увеличивается на заранее известную
+    стоимость инструкции из `INSTRUCTION_TICKS`. Регистры данных и буфера
+    (`DR`, `SB`) не моделируются. Вывод, число инструкций и тактов
+    совпадают с пошаговой моделью `ControlUnit`, которая остаётся эталоном.
+
+    `run` считает одну инструкцию на каждый вызов обработчика, в том числе
+    до исключения (`HLT`, конец ввода). Инструкции с заранее неизвестной
+    стоимостью (блочный ввод-вывод) и некорректные инструкции хранятся со
+    стоимостью None: их обработчик сам меняет PC и счётчик тактов, а
+    `instructions` перед вызовом уже учитывает эту инструкцию. Обработчик,
+    исполняющий за вызов несколько инструкций (суперинструкции
+    `FusedControlUnit`), сам прибавляет к `instructions` остальные.
+    """
+
+    instructions: int = None
+    decoded: list = None
+
+    def __init__(self, program_memory: list, data_path: DataPath):
+        super().__init__(program_memory, data_path)
+        self.instructions = 0
+        registers_amount = len(data_path.registers)
+        # некорректная инструкция исполняется эталонным декодером
+        fallback = partial(ControlUnit.decode_and_execute_instruction, self)
+        self.decoded = [
+            (
+                self.predecode(pc, instr),
+                None if instr.opcode in BLOCK_IO else INSTRUCTION_TICKS[instr.opcode],
+            )
+            if is_compilable(instr, registers_amount)
+            else (fallback, None)
+            for pc, instr in enumerate(program_memory)
+        ]
+
+    def reset(self):
+        super().reset()
+        self.instructions = 0
+
+    def predecode(self, pc: int, instr: MachineCode):
+        data_path = self.data_path
+        regs = data_path.registers
+        mem = data_path.data_memory.words
+        opcode = instr.opcode
+        args = instr.args
+        following = pc + 1
+
+        def set_zero(res):
+            # флаг zero выставляется АЛУ только для результатов 0 и 1
+            if res == 0:
+                data_path.is_zero = True
+            elif res == 1:
+                data_path.is_zero = False
+
+        if opcode is Opcode.HLT:
+
+            def execute():
+                raise StopIteration()
+
+        elif opcode is Opcode.JMP:
+            addr = args[0]
+
+            def execute():
+                return addr
+
+        elif opcode is Opcode.JZ:
+            addr = args[0]
+
+            def execute():
+                return addr if data_path.is_zero else following
+
+        elif opcode is Opcode.JZ_R:
+            addr, reg = args[0], args[1]
+
+            def execute():
+                is_zero = data_path.is_zero = regs[reg] == 0
+                return addr if is_zero else following
+
+        elif opcode is Opcode.MOV:
+            reg, val = args[0], args[1]
+
+            def execute():
+                regs[reg] = val
+                return following
+
+        elif opcode is Opcode.LOAD_V and args[1] == INPUT_MAP:
+            reg = args[0]
+            read = data_path._signal_input
+
+            def execute():
+                regs[reg] = read()
+                return following
+
+        elif opcode is Opcode.LOAD_V:
+            reg, addr = args[0], args[1]
+
+            def execute():
+                regs[reg] = mem[addr]
+                return following
+
+        elif opcode is Opcode.LOAD_R:
+            reg, addr_reg = args[0], args[1]
+
+            def execute():
+                regs[reg] = mem[regs[addr_reg]]
+                return following
+
+        elif opcode is Opcode.STORE_V and args[0] == OUTPUT_MAP:
+            reg = args[1]
+            write = data_path._signal_output
+
+            def execute():
+                write(regs[reg])
+                return following
+
+        elif opcode is Opcode.STORE_V:
+            addr, reg = args[0], args[1]
+
+            def execute():
+                try:
+                    mem[addr] = regs[reg]
+                except ValueError:
+                    raise word_overflow(addr) from None
+                return following
+
+        elif opcode is Opcode.STORE_R:
+            addr_reg, reg = args[0], args[1]
+
+            def execute():
+                addr = regs[addr_reg]
+                try:
+                    mem[addr] = regs[reg]
+                except ValueError:
+                    raise word_overflow(addr) from None
+                return following
+
+        elif opcode is Opcode.NEXT:
+            reg, addr_reg = args[0], args[1]
+
+            def execute():
+                addr = regs[addr_reg] = regs[addr_reg] + 1
+                set_zero(addr)
+                regs[reg] = mem[addr]
+                return following
+
+        elif opcode is Opcode.CMP:
+            reg, val = args[0], args[1]
+
+            def execute():
+                data_path.is_zero = regs[reg] == val
+                return following
+
+        elif opcode is Opcode.INC:
+            reg = args[0]
+
+            def execute():
+                res = regs[reg] = regs[reg] + 1
+                set_zero(res)
+                return following
+
+        elif opcode is Opcode.ADD_MMR:
+            dst, src, reg = args[0], args[1], args[2]
+
+            def execute():
+                res = mem[src] + regs[reg]
+                try:
+                    mem[dst] = res
+                except ValueError:
+                    raise word_overflow(dst) from None
+                set_zero(res)
+                return following
+
+        elif opcode is Opcode.MOD_RRV:
+            reg, src, val = args[0], args[1], args[2]
+
+            def execute():
+                res = regs[reg] = regs[src] % val
+                set_zero(res)
+                return following
+
+        elif opcode is Opcode.LINEAR:
+            reg, val, src = args[0], args[1], args[2]
+
+            def execute():
+                res = regs[reg] = val * regs[src]
+                set_zero(res)
+                return following
+
+        elif opcode is Opcode.LINEAR_CONT:
+            reg, val, src = args[0], args[1], args[2]
+
+            def execute():
+                buf = val * regs[src]
+                set_zero(buf)
+                res = regs[reg] = buf + regs[reg]
+                set_zero(res)
+                return following
+
+        elif opcode is Opcode.INPUT_STR:
+            reg = args[0]
+
+            def execute():
+                start = regs[reg]
+                try:
+                    words = data_path.input_string(start)
+                except EOFError:
+                    self._tick += 1 + data_path.data_address - start
+                    raise
+                self.program_counter = following
+                self._tick += INSTRUCTION_TICKS[opcode] + words
+
+        elif opcode is Opcode.OUTPUT_STR:
+            reg = args[0]
+
+            def execute():
+                words = data_path.output_string(regs[reg])
+                self.program_counter = following
+                self._tick += INSTRUCTION_TICKS[opcode] + words
+
+        else:
+            raise ValueError(f"Invalid opcode: {opcode}")
+
+        return execute
+
+    def run(self, limit: int):
+        decoded = self.decoded
+        pc = self.program_counter
+        tick = self._tick
+        instructions = self.instructions
+        try:
+            while tick < limit:
+                execute, cost = decoded[pc]
+                instructions += 1
+                if cost is None:
+                    self.program_counter, self._tick = pc, tick
+                    self.instructions = instructions
+                    try:
+                        execute()
+                    finally:
+                        # обработчик мог изменить состояние и до исключения
+                        pc, tick = self.program_counter, self._tick
+                        instructions = self.instructions
+                    continue
+                pc = execute()
+                tick += cost
+        except EOFError:
+            # ввод читается на втором такте LOAD_V, остальные обработчики
+            # учитывают такты сами
+            if cost is not None:
+                tick += 1
+            raise
+        finally:
+            self.program_counter = pc
+            self._tick = tick
+            self.instructions = instructions
@@ -0,0 +1,315 @@
+from collections import Counter
+
+from processor.control_unit import INSTRUCTION_TICKS
+from processor.data_path import DataPath
+from processor.functional import FunctionalControlUnit
+from processor.isa import INPUT_MAP, OUTPUT_MAP, Opcode
+
+# Слияние инструкций: известные последовательности инструкций памяти команд
+# исполняются одним обработчиком (суперинструкцией). Правило - шаблон кодов
+# операций и построитель обработчика, который проверяет операнды и
+# возвращает None, если последовательность не подходит. Обработчик следует
+# соглашению FunctionalControlUnit для инструкций со стоимостью None: сам
+# меняет PC, такты и число инструкций. Если последовательность переходит в
+# своё начало, обработчик повторяет её, пока хватает тактов до лимита.
+
+BRANCHES = (Opcode.JMP, Opcode.JZ, Opcode.JZ_R)
+
+
+def jump_targets(program_memory: list) -> set:
+    # переход без операнда (из объектного файла, написанного вручную) падает
+    # при исполнении, как и в остальных реализациях
+    return {
+        instr.args[0]
+        for instr in program_memory
+        if instr.opcode in BRANCHES and instr.args
+    }
+
+
+def cost(*opcodes) -> int:
+    return sum(INSTRUCTION_TICKS[opcode] for opcode in opcodes)
+
+
+def fuse_echo(cu, pc: int, instrs: list):
+    """`INPUT r` `JZ_R exit r` `OUTPUT r` `JMP loop` - посимвольное копирование ввода."""
+    load, jz, store, jmp = instrs
+    reg = load.args[0]
+    if load.args[1] != INPUT_MAP or store.args[0] != OUTPUT_MAP:
+        return None
+    if jz.args[1] != reg or store.args[1] != reg:
+        return None
+    exit_addr, loop_addr = jz.args[0], jmp.args[0]
+    data_path = cu.data_path
+    regs = data_path.registers
+    read, write = data_path._signal_input, data_path._signal_output
+    exit_cost = cost(Opcode.LOAD_V, Opcode.JZ_R)
+    full_cost = exit_cost + cost(Opcode.STORE_V, Opcode.JMP)
+
+    def execute():
+        limit = cu.limit
+        if cu._tick + full_cost > limit:
+            return cu.single_step(pc)
+        tick, instructions, fired = cu._tick, cu.instructions, 0
+        value = None
+        try:
+            while True:
+                fired += 1
+                try:
+                    value = read()
+                except EOFError:
+                    # ввод читается на втором такте LOAD_V
+                    cu.program_counter = pc
+                    tick += 1
+                    raise
+                if value == 0:
+                    cu.program_counter = exit_addr
+                    tick += exit_cost
+                    instructions += 1
+                    return
+                write(value)
+                tick += full_cost
+                instructions += 3
+                if loop_addr != pc or tick + full_cost > limit:
+                    cu.program_counter = loop_addr
+                    return
+                instructions += 1
+        finally:
+            # регистр и флаг zero (JZ_R) - по последнему прочитанному значению
+            if value is not None:
+                regs[reg] = value
+                data_path.is_zero = value == 0
+            cu._tick, cu.instructions = tick, instructions
+            cu.fired[cu.sites[pc]] += fired
+
+    return execute
+
+
+def fuse_read_cstr(cu, pc: int, instrs: list):
+    """`INPUT r` `JZ_R exit r` `STORE_R p r` `INC p` `JMP loop` - чтение строки в память."""
+    load, jz, store, inc, jmp = instrs
+    reg, ptr = load.args[0], store.args[0]
+    if load.args[1] != INPUT_MAP or jz.args[1] != reg:
+        return None
+    if store.args[1] != reg or inc.args[0] != ptr or ptr == reg:
+        return None
+    exit_addr, loop_addr = jz.args[0], jmp.args[0]
+    data_path = cu.data_path
+    regs, mem = data_path.registers, data_path.data_memory.words
+    read = data_path._signal_input
+    exit_cost = cost(Opcode.LOAD_V, Opcode.JZ_R)
+    full_cost = exit_cost + cost(Opcode.STORE_R, Opcode.INC, Opcode.JMP)
+
+    def execute():
+        limit = cu.limit
+        if cu._tick + full_cost > limit:
+            return cu.single_step(pc)
+        tick, instructions, fired = cu._tick, cu.instructions, 0
+        value, addr, zero = None, regs[ptr], None
+        try:
+            while True:
+                fired += 1
+                try:
+                    value = read()
+                except EOFError:
+                    cu.program_counter = pc
+                    tick += 1
+                    raise
+                zero = value == 0
+                if zero:
+                    cu.program_counter = exit_addr
+                    tick += exit_cost
+                    instructions += 1
+                    return
+                try:
+                    mem[addr] = value
+                except IndexError:
+                    # состояние как при ошибке на самой STORE_R
+                    cu.program_counter = pc + 2
+                    tick += exit_cost
+                    instructions += 2
+                    raise
+                addr += 1
+                if addr == 0:
+                    zero = True
+                tick += full_cost
+                instructions += 4
+                if loop_addr != pc or tick + full_cost > limit:
+                    cu.program_counter = loop_addr
+                    return
+                instructions += 1
+        finally:
+            if value is not None:
+                regs[reg] = value
+            regs[ptr] = addr
+            if zero is not None:
+                data_path.is_zero = zero
+            cu._tick, cu.instructions = tick, instructions
+            cu.fired[cu.sites[pc]] += fired
+
+    return execute
+
+
+def fuse_print_cstr(cu, pc: int, instrs: list):
+    """`JZ_R exit r` `OUTPUT r` `NEXT r p` `JMP loop` - вывод нул-терминированной строки."""
+    jz, store, nxt, jmp = instrs
+    reg, ptr = jz.args[1], nxt.args[1]
+    if store.args[0] != OUTPUT_MAP or store.args[1] != reg:
+        return None
+    if nxt.args[0] != reg or ptr == reg:
+        return None
+    exit_addr, loop_addr = jz.args[0], jmp.args[0]
+    data_path = cu.data_path
+    regs, mem = data_path.registers, data_path.data_memory.words
+    write = data_path._signal_output
+    exit_cost = cost(Opcode.JZ_R)
+    full_cost = exit_cost + cost(Opcode.STORE_V, Opcode.NEXT, Opcode.JMP)
+
+    def execute():
+        limit = cu.limit
+        if cu._tick + full_cost > limit:
+            return cu.single_step(pc)
+        tick, instructions, fired = cu._tick, cu.instructions, 0
+        value, addr = regs[reg], regs[ptr]
+        try:
+            while True:
+                fired += 1
+                zero = value == 0
+                if zero:
+                    cu.program_counter = exit_addr
+                    tick += exit_cost
+                    return
+                write(value)
+                addr += 1
+                if addr == 0:
+                    zero = True
+                try:
+                    value = mem[addr]
+                except IndexError:
+                    # состояние как при ошибке на самой NEXT
+                    cu.program_counter = pc + 2
+                    tick += cost(Opcode.JZ_R, Opcode.STORE_V)
+                    instructions += 2
+                    raise
+                tick += full_cost
+                instructions += 3
+                if loop_addr != pc or tick + full_cost > limit:
+                    cu.program_counter = loop_addr
+                    return
+                instructions += 1
+        finally:
+            regs[reg], regs[ptr] = value, addr
+            data_path.is_zero = zero
+            cu._tick, cu.instructions = tick, instructions
+            cu.fired[cu.sites[pc]] += fired
+
+    return execute
+
+
+# имя -> (шаблон кодов операций, построитель обработчика)
+FUSION_RULES = {
+    "echo": ((Opcode.LOAD_V, Opcode.JZ_R, Opcode.STORE_V, Opcode.JMP), fuse_echo),
+    "read_cstr": (
+        (Opcode.LOAD_V, Opcode.JZ_R, Opcode.STORE_R, Opcode.INC, Opcode.JMP),
+        fuse_read_cstr,
+    ),
+    "print_cstr": (
+        (Opcode.JZ_R, Opcode.STORE_V, Opcode.NEXT, Opcode.JMP),
+        fuse_print_cstr,
+    ),
+}
+
+
+class FusedControlUnit(FunctionalControlUnit):
+    """Функциональная модель со слиянием инструкций.
+
+    При загрузке в памяти команд ищутся последовательности из правил
+    `rules`, внутрь которых (кроме первой инструкции) нет переходов.
+    Первая инструкция последовательности заменяется суперинструкцией,
+    остальные остаются обычными. Такты и инструкции учитываются так же, как
+    при исполнении по одной: если до лимита не хватает тактов на всю
+    последовательность, исполняется только первая инструкция, в конце ввода
+    состояние совпадает с состоянием после чтения.
+    """
+
+    rules: dict = None
+    # адрес -> имя правила
+    sites: dict = None
+    # имя правила -> число исполнений суперинструкции
+    fired: Counter = None
+    single: list = None
+    limit: int = None
+
+    def __init__(self, program_memory: list, data_path: DataPath, rules=None):
+        super().__init__(program_memory, data_path)
+        self.rules = FUSION_RULES if rules is None else rules
+        self.fired = Counter()
+        self.sites = {}
+        self.single = list(self.decoded)
+        self.limit = 0
+
+        targets = jump_targets(program_memory)
+        opcodes = tuple(instr.opcode for instr in program_memory)
+        # правила по первому коду операции шаблона
+        by_first = {}
+        for name, (pattern, build) in self.rules.items():
+            by_first.setdefault(pattern[0], []).append((name, pattern, build))
+        for pc, opcode in enumerate(opcodes):
+            for name, pattern, build in by_first.get(opcode, ()):
+                end = pc + len(pattern)
+                if opcodes[pc:end] != pattern:
+                    continue
+                if any(inner in targets for inner in range(pc + 1, end)):
+                    continue
+                # некорректные инструкции и блочный ввод-вывод не сливаются
+                if any(cost is None for _, cost in self.single[pc:end]):
+                    continue
+                execute = build(self, pc, program_memory[pc:end])
+                if execute is not None:
+                    self.decoded[pc] = (execute, None)
+                    self.sites[pc] = name
+                    break
+
+    def reset(self):
+        super().reset()
+        self.fired.clear()
+
+    def single_step(self, pc: int):
+        """Исполнение одной инструкции по адресу `pc` без слияния."""
+        execute, cost = self.single[pc]
+        if cost is None:
+            execute()
+            return
+        try:
+            self.program_counter = execute()
+        except EOFError:
+            self._tick += 1
+            raise
+        self._tick += cost
+
+    def run(self, limit: int):
+        self.limit = limit
+        super().run(limit)
+
+    def report(self) -> str:
+        lines = [f"{'rule':12} {'sites':>6} {'fired':>10}"]
+        for name in self.rules:
+            sites = sum(1 for rule in self.sites.values() if rule == name)
+            lines.append(f"{name:12} {sites:6} {self.fired[name]:10}")
+        return "\n".join(lines)
+
+
+class Fusion:
+    """Слияние инструкций для `simulation`: создаёт FusedControlUnit и хранит его статистику."""
+
+    rules: dict = None
+    control_unit: FusedControlUnit = None
+
+    def __init__(self, rules: dict = None):
+        self.rules = rules
+
+    def create_control_unit(self, program: list, data_path: DataPath):
+        self.control_unit = FusedControlUnit(program, data_path, self.rules)
+        return self.control_unit
+
+    def report(self) -> str:
+        return self.control_unit.report()
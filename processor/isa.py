@@ -1,6 +1,10 @@
 import json
+import mmap
+import struct
 from enum import Enum
 
+from processor.memory import WORD_SIZE, DataMemory
+
 INPUT_MAP = 0
 OUTPUT_MAP = 1
 
@@ -43,6 +47,10 @@ class Opcode(Enum):
     STRING = "string"  # нул-терминированная строка
     BUFFER = "buffer"  # буфер для записи
 
+    # новые коды добавляются в конец: номер кода в бинарном формате - позиция в перечислении
+    INPUT_STR = "input_str"  # [r] считать из ввода нул-терминированную строку в память по адресу-регистру
+    OUTPUT_STR = "output_str"  # [r] вывести нул-терминированную строку из памяти по адресу-регистру
+
 
 class MachineCode:
     def __init__(self, index: int, opcode: Opcode, args: list = None):
@@ -61,30 +69,197 @@ class MachineCode:
         return str(self.to_dict())
 
 
-def write_code(filename: str, code: list):
+class Instruction:
+    """Неизменяемая инструкция памяти команд.
+
+    В отличие от `MachineCode` (токена транслятора и слова JSON формата)
+    хранит только код операции и кортеж аргументов в слотах, без словаря
+    атрибутов и индекса: адрес инструкции - её позиция в памяти команд.
+    Поэтому одинаковые инструкции программы - один объект (`InstructionTable`).
+    """
+
+    __slots__ = ("opcode", "args")
+
+    def __init__(self, opcode: Opcode, args: tuple = ()):
+        object.__setattr__(self, "opcode", opcode)
+        object.__setattr__(self, "args", tuple(args))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Instruction is immutable: {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Instruction is immutable: {name}")
+
+    def __eq__(self, other):
+        if other.__class__ is not Instruction:
+            return NotImplemented
+        return self.opcode is other.opcode and self.args == other.args
+
+    def __hash__(self):
+        return hash((self.opcode, self.args))
+
+    def __reduce__(self):
+        return Instruction, (self.opcode, self.args)
+
+    def to_dict(self, index: int):
+        return {
+            "index": index,
+            "opcode": self.opcode.value,
+            "args": list(self.args),
+        }
+
+    def __repr__(self):
+        return f"Instruction({self.opcode.name}, {self.args})"
+
+
+class InstructionTable:
+    """Интернирование инструкций: по ключу (код операции, аргументы) один объект."""
+
+    instructions: dict = None
+
+    def __init__(self):
+        self.instructions = {}
+
+    def get(self, opcode: Opcode, args) -> Instruction:
+        key = (opcode, tuple(args))
+        instr = self.instructions.get(key)
+        if instr is None:
+            instr = self.instructions[key] = Instruction(*key)
+        return instr
+
+
+# перевод памяти данных в слова MachineCode для JSON формата
+def data_to_machine_code(data: DataMemory):
+    words = []
+    for start, length, kind in data.segments:
+        for index in range(start, start + length):
+            words.append(MachineCode(index, kind, [data[index]]))
+    return words
+
+
+def write_code(filename: str, data: DataMemory, code: list):
     with open(filename, "w") as file:
-        buf = []
-        for instr in code:
-            val = instr if isinstance(instr, int) else instr.to_dict()
-            buf.append(json.dumps(val))
+        buf = [json.dumps(len(data))]
+        for word in data_to_machine_code(data):
+            buf.append(json.dumps(word.to_dict()))
+        for index, instr in enumerate(code):
+            buf.append(json.dumps(instr.to_dict(index)))
         file.write("[" + ",\n ".join(buf) + "]")
 
 
+# Бинарный объектный файл (все числа little-endian):
+# - заголовок: сигнатура, версия, число инструкций, слов данных и отрезков данных
+# - инструкции: код операции, число аргументов и три 64-битных аргумента
+# - отрезки данных: начало, длина, тип слов, кодирование и смещение слов в файле.
+#   Заполненные нулями отрезки хранятся без слов (RLE), остальные - подряд
+BINARY_MAGIC = b"CA3O"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHxxQQQ")
+BINARY_INSTRUCTION = struct.Struct("<BB6x3q")
+BINARY_SEGMENT = struct.Struct("<QQBB6xQ")
+BINARY_ARGS = 3
+# номер кода операции в бинарном формате
+OPCODES = list(Opcode)
+NO_KIND = 0xFF
+ZERO_RUN = 0
+LITERAL_RUN = 1
+
+
+def write_binary_code(filename: str, data: DataMemory, code: list):
+    words_offset = (
+        BINARY_HEADER.size
+        + BINARY_INSTRUCTION.size * len(code)
+        + BINARY_SEGMENT.size * len(data.segments)
+    )
+    with open(filename, "wb") as file:
+        file.write(
+            BINARY_HEADER.pack(
+                BINARY_MAGIC, BINARY_VERSION, len(code), len(data), len(data.segments)
+            )
+        )
+        for instr in code:
+            if len(instr.args) > BINARY_ARGS:
+                raise ValueError(f"Too many args for binary format: {instr}")
+            args = instr.args + (0,) * (BINARY_ARGS - len(instr.args))
+            file.write(
+                BINARY_INSTRUCTION.pack(
+                    OPCODES.index(instr.opcode), len(instr.args), *args
+                )
+            )
+
+        literals = []
+        for start, length, kind in data.segments:
+            if data.is_zero(start, length):
+                encoding, offset = ZERO_RUN, 0
+            else:
+                encoding, offset = LITERAL_RUN, words_offset
+                words_offset += length * WORD_SIZE
+                literals.append(data.read_bytes(start, length))
+            kind = NO_KIND if kind is None else OPCODES.index(kind)
+            file.write(BINARY_SEGMENT.pack(start, length, kind, encoding, offset))
+        for raw in literals:
+            file.write(raw)
+
+
+def read_binary_code(filename: str):
+    with (
+        open(filename, "rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        magic, version, code_len, data_len, segments = BINARY_HEADER.unpack_from(mm)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Unsupported object file: {magic} v{version}")
+
+        offset = BINARY_HEADER.size
+        code = []
+        # одинаковые записи инструкций - один объект Instruction
+        instructions = {}
+        for record in BINARY_INSTRUCTION.iter_unpack(
+            mm[offset : offset + BINARY_INSTRUCTION.size * code_len]
+        ):
+            instr = instructions.get(record)
+            if instr is None:
+                opcode, argc, *args = record
+                instr = Instruction(OPCODES[opcode], args[:argc])
+                instructions[record] = instr
+            code.append(instr)
+        offset += BINARY_INSTRUCTION.size * code_len
+
+        # слова данных копируются из файла целиком, без разбора по одному
+        data = DataMemory()
+        for start, length, kind, encoding, words_offset in BINARY_SEGMENT.iter_unpack(
+            mm[offset : offset + BINARY_SEGMENT.size * segments]
+        ):
+            kind = None if kind == NO_KIND else OPCODES[kind]
+            if encoding == ZERO_RUN:
+                data.reserve(length, kind)
+            else:
+                size = length * WORD_SIZE
+                data.extend_bytes(mm[words_offset : words_offset + size], kind)
+        if len(data) != data_len:
+            raise ValueError(f"Broken data section: {len(data)} != {data_len}")
+        return data, code
+
+
+def is_binary_code(filename: str) -> bool:
+    with open(filename, "rb") as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
 def read_code(filename: str):
+    if is_binary_code(filename):
+        return read_binary_code(filename)
+
     with open(filename) as f:
         js = json.load(f)
         data_len = js.pop(0)
-        data = js[:data_len]
-        code = js[data_len:]
-        for ind, instr in enumerate(data):
-            index = instr["index"]
-            opcode = Opcode(instr["opcode"])
-            args = instr["args"]
-            data[ind] = MachineCode(index, opcode, args)
-
-        for ind, instr in enumerate(code):
-            index = instr["index"]
-            opcode = Opcode(instr["opcode"])
-            args = instr["args"]
-            code[ind] = MachineCode(index, opcode, args)
+        data = DataMemory()
+        for instr in js[:data_len]:
+            data.append(instr["args"][0], Opcode(instr["opcode"]))
+
+        # адрес инструкции - позиция в памяти команд, поле index не читается
+        table = InstructionTable()
+        code = [
+            table.get(Opcode(instr["opcode"]), instr["args"]) for instr in js[data_len:]
+        ]
         return data, code
@@ -0,0 +1,194 @@
+import mmap
+from array import array
+from bisect import bisect_right
+from math import inf
+
+# машинное слово памяти данных - 64-битное знаковое число
+WORD_TYPECODE = "q"
+WORD_SIZE = array(WORD_TYPECODE).itemsize
+# страница памяти: нулевые страницы не копируются и не сравниваются поэлементно
+PAGE_SIZE = mmap.PAGESIZE
+ZERO_PAGE = bytes(PAGE_SIZE)
+
+
+def word_overflow(addr: int) -> OverflowError:
+    # memoryview сообщает о значении вне int64 как ValueError без адреса
+    return OverflowError(f"data word out of int64 range at {addr}")
+
+
+def allocate_words(amount: int) -> memoryview:
+    # анонимное отображение заполнено нулями, страницы выделяются системой
+    # при первой записи, поэтому время выделения не зависит от размера
+    if amount == 0:
+        return memoryview(bytearray()).cast(WORD_TYPECODE)
+    return memoryview(mmap.mmap(-1, amount * WORD_SIZE)).cast(WORD_TYPECODE)
+
+
+class DataMemory:
+    """Память данных.
+
+    Пока память собирается (транслятором или загрузчиком), хранятся только
+    явно заданные слова кусками (начало, `array('q')`), а отрезки `BUFFER`
+    лишь увеличивают размер. При первом обращении к `words` память
+    размещается в анонимном отображении, где нулевые страницы выделяются
+    по требованию, и куски копируются в него. Для объектного файла хранится
+    тип слов (`Opcode.NUMBER`, `STRING`, `BUFFER`) в виде отрезков (начало,
+    длина, тип), а не для каждого слова. Быстрые реализации Control Unit
+    обращаются к `words` напрямую.
+    """
+
+    size: int = None
+    segments: list = None
+    # явно заданные слова до размещения памяти: [(начало, array)]
+    chunks: list = None
+    _words: memoryview = None
+
+    def __init__(self, words=()):
+        self.size = 0
+        self.segments = []
+        self.chunks = []
+        self.extend(words)
+
+    @property
+    def words(self) -> memoryview:
+        if self._words is None:
+            self._words = allocate_words(self.size)
+            for start, chunk in self.chunks:
+                self._words[start : start + len(chunk)] = chunk
+            self.chunks = None
+        return self._words
+
+    def allocate(self) -> memoryview:
+        """Размещение памяти сразу, а не при первом обращении к `words`."""
+        return self.words
+
+    def _mark(self, start: int, amount: int, kind):
+        if amount == 0:
+            return
+        if self.segments and self.segments[-1][2] == kind:
+            first, length, _ = self.segments[-1]
+            self.segments[-1] = (first, length + amount, kind)
+        else:
+            self.segments.append((start, amount, kind))
+
+    def _tail_chunk(self) -> array:
+        # размещённая память не растёт, поэтому при дописывании она снова
+        # собирается из кусков
+        if self._words is not None:
+            self.chunks = [(0, array(WORD_TYPECODE, self._words.tobytes()))]
+            self._words = None
+        if self.chunks:
+            start, chunk = self.chunks[-1]
+            if start + len(chunk) == self.size:
+                return chunk
+        chunk = array(WORD_TYPECODE)
+        self.chunks.append((self.size, chunk))
+        return chunk
+
+    def append(self, value: int, kind=None):
+        self._tail_chunk().append(value)
+        self._mark(self.size, 1, kind)
+        self.size += 1
+
+    def extend(self, values, kind=None):
+        chunk = self._tail_chunk()
+        before = len(chunk)
+        chunk.extend(values)
+        self._mark(self.size, len(chunk) - before, kind)
+        self.size += len(chunk) - before
+
+    def extend_bytes(self, raw: bytes, kind=None):
+        # слова в машинном представлении, например из объектного файла
+        chunk = self._tail_chunk()
+        before = len(chunk)
+        chunk.frombytes(raw)
+        self._mark(self.size, len(chunk) - before, kind)
+        self.size += len(chunk) - before
+
+    def reserve(self, amount: int, kind=None):
+        # заполненные нулями слова не хранятся, время не зависит от amount
+        if self._words is not None:
+            self._tail_chunk()
+        self._mark(self.size, amount, kind)
+        self.size += amount
+
+    def is_zero(self, start: int, length: int) -> bool:
+        if self._words is not None:
+            view = self._words[start : start + length].cast("B")
+            return all(
+                view[ind : ind + PAGE_SIZE] == ZERO_PAGE[: len(view) - ind]
+                for ind in range(0, len(view), PAGE_SIZE)
+            )
+        end = start + length
+        for first, chunk in self.chunks:
+            lo, hi = max(start, first), min(end, first + len(chunk))
+            if lo < hi and any(chunk[lo - first : hi - first]):
+                return False
+        return True
+
+    def read_bytes(self, start: int, length: int) -> bytes:
+        if self._words is not None:
+            return self._words[start : start + length].tobytes()
+        words = array(WORD_TYPECODE, bytes(length * WORD_SIZE))
+        end = start + length
+        for first, chunk in self.chunks:
+            lo, hi = max(start, first), min(end, first + len(chunk))
+            if lo < hi:
+                words[lo - start : hi - start] = chunk[lo - first : hi - first]
+        return words.tobytes()
+
+    def load(self, image: "DataMemory"):
+        """Перезапись содержимого образом той же длины на месте.
+
+        Копируются только отличающиеся страницы, нетронутые нулевые
+        страницы при этом не выделяются.
+        """
+        assert len(image) == self.size, "Another memory image!"
+        target = self.words.cast("B")
+        source = image.words.cast("B")
+        for ind in range(0, len(target), PAGE_SIZE):
+            page = source[ind : ind + PAGE_SIZE]
+            if target[ind : ind + PAGE_SIZE] != page:
+                target[ind : ind + PAGE_SIZE] = page
+
+    def kind(self, addr: int):
+        # отрезки упорядочены по началу, (addr, inf) больше всех отрезков с началом addr
+        ind = bisect_right(self.segments, (addr, inf)) - 1
+        if ind < 0:
+            return None
+        start, length, kind = self.segments[ind]
+        return kind if addr < start + length else None
+
+    def copy(self):
+        memory = DataMemory()
+        memory.size = self.size
+        memory.segments = list(self.segments)
+        if self._words is None:
+            memory.chunks = [(start, chunk[:]) for start, chunk in self.chunks]
+        else:
+            memory.load(self)
+        return memory
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, addr: int) -> int:
+        return self.words[addr]
+
+    def __setitem__(self, addr: int, value: int):
+        try:
+            self.words[addr] = value
+        except ValueError:
+            raise word_overflow(addr) from None
+
+    def __eq__(self, other):
+        if not isinstance(other, DataMemory):
+            return NotImplemented
+        return (
+            self.size == other.size
+            and self.segments == other.segments
+            and self.words.cast("B") == other.words.cast("B")
+        )
+
+    def __repr__(self):
+        return f"DataMemory({self.size} words, segments={self.segments})"
@@ -0,0 +1,140 @@
+import heapq
+import logging
+
+from processor.control_unit import ControlUnit
+from processor.data_path import DataPath
+from processor.devices import BufferOutput, OutputDevice, as_input_device
+from processor.memory import DataMemory
+
+SCHEDULES = ("round-robin", "tick")
+
+
+class MultiCore:
+    """Несколько ядер над общей памятью данных.
+
+    У каждого ядра свои Control Unit, регистры, PC и счётчик тактов, а
+    память данных, устройства ввода и вывода общие. Номер ядра (с нуля)
+    записывается в последний регистр до начала исполнения, поэтому
+    программа может разделить работу между ядрами. Инструкция исполняется
+    атомарно, порядок исполнения детерминирован:
+
+    - `round-robin` - ядра по очереди исполняют по `quantum` инструкций
+    - `tick` - следующую инструкцию исполняет ядро с наименьшим тактом
+      (при равенстве - с меньшим номером), как при одновременной работе ядер
+
+    Ядро останавливается на `HLT`, в конце ввода или по лимиту тактов.
+    """
+
+    control_units: list = None
+    schedule: str = None
+    quantum: int = None
+    output_device: OutputDevice = None
+
+    # число инструкций и причина остановки каждого ядра
+    instructions: list = None
+    stopped: list = None
+
+    def __init__(
+        self,
+        data: DataMemory,
+        program: list,
+        cores: int,
+        input_device,
+        output_device: OutputDevice = None,
+        registers: int = 4,
+        schedule: str = "round-robin",
+        quantum: int = 1,
+        control_unit_class=ControlUnit,
+    ):
+        assert cores > 0, "More cores!"
+        assert schedule in SCHEDULES, f"Unknown schedule: {schedule}"
+        assert quantum > 0, "Quantum must be positive"
+        input_device = as_input_device(input_device)
+        self.output_device = output_device if output_device else BufferOutput()
+        self.schedule = schedule
+        self.quantum = quantum
+        self.control_units = []
+        for core in range(cores):
+            data_path = DataPath(data, registers, input_device, self.output_device)
+            data_path.registers[-1] = core
+            self.control_units.append(control_unit_class(program, data_path))
+        self.instructions = [0] * cores
+        self.stopped = [None] * cores
+
+    def step(self, core: int) -> bool:
+        """Одна инструкция ядра `core`, False - ядро остановилось."""
+        try:
+            self.instructions[core] += 1
+            self.control_units[core].decode_and_execute_instruction()
+            return True
+        except StopIteration:
+            self.stopped[core] = "halt"
+        except EOFError:
+            logging.warning("Core %d: input buffer is empty!", core)
+            self.stopped[core] = "input"
+        return False
+
+    def run(self, limit: int):
+        try:
+            if self.schedule == "tick":
+                self._run_by_tick(limit)
+            else:
+                self._run_round_robin(limit)
+        finally:
+            self.output_device.flush()
+        for core, control_unit in enumerate(self.control_units):
+            if self.stopped[core] is None and control_unit.current_tick() >= limit:
+                logging.warning("Core %d: limit exceeded!", core)
+                self.stopped[core] = "limit"
+
+    def _run_round_robin(self, limit: int):
+        running = list(range(len(self.control_units)))
+        while running:
+            for core in list(running):
+                control_unit = self.control_units[core]
+                for _ in range(self.quantum):
+                    if control_unit.current_tick() >= limit or not self.step(core):
+                        running.remove(core)
+                        break
+
+    def _run_by_tick(self, limit: int):
+        queue = [
+            (cu.current_tick(), core) for core, cu in enumerate(self.control_units)
+        ]
+        heapq.heapify(queue)
+        while queue:
+            tick, core = heapq.heappop(queue)
+            if tick >= limit or not self.step(core):
+                continue
+            heapq.heappush(queue, (self.control_units[core].current_tick(), core))
+
+    def results(self) -> list:
+        """(инструкции, такты, причина остановки) каждого ядра."""
+        return [
+            (instructions, control_unit.current_tick(), stopped)
+            for instructions, control_unit, stopped in zip(
+                self.instructions, self.control_units, self.stopped
+            )
+        ]
+
+    def makespan(self) -> int:
+        # ядра работают одновременно: время работы - такты самого долгого ядра
+        return max(cu.current_tick() for cu in self.control_units)
+
+    def report(self, baseline_ticks: int = None) -> str:
+        lines = [f"{'core':>4} {'instr':>10} {'ticks':>10} {'IPC':>6} stop"]
+        for core, (instructions, ticks, stopped) in enumerate(self.results()):
+            ipc = instructions / ticks if ticks else 0.0
+            lines.append(f"{core:4} {instructions:10} {ticks:10} {ipc:6.2f} {stopped}")
+        total = sum(self.instructions)
+        makespan = self.makespan()
+        lines.append(
+            f"Total instructions: {total} Makespan: {makespan} "
+            f"Throughput: {total / makespan if makespan else 0.0:.2f} instr/tick"
+        )
+        if baseline_ticks:
+            lines.append(
+                f"Single-core ticks: {baseline_ticks} "
+                f"Speedup: {baseline_ticks / makespan if makespan else 0.0:.2f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,220 @@
+from collections import Counter
+
+from processor.control_unit import BLOCK_IO, ControlUnit
+from processor.data_path import DataPath
+from processor.isa import Opcode
+
+# Конвейер из пяти стадий: IF (выборка), ID (декодирование и чтение регистров),
+# EX (АЛУ и переходы), MEM (память данных и порты ввода-вывода), WB (запись
+# регистров). Инструкции проходят стадии по порядку, на каждой стадии в такт
+# находится не больше одной инструкции.
+
+ZERO = "zero"
+BRANCH_POLICIES = ("flush", "static")
+
+# номера аргументов-регистров (или флаг ZERO): читаемые в EX, записываемые
+# в EX, записываемые в MEM; затем длительность стадий EX и MEM в тактах
+STAGES = {
+    Opcode.HLT: ((), (), (), 1, 1),
+    Opcode.JMP: ((), (), (), 1, 1),
+    Opcode.JZ: ((ZERO,), (), (), 1, 1),
+    Opcode.JZ_R: ((1,), (ZERO,), (), 1, 1),
+    Opcode.MOV: ((), (0,), (), 1, 1),
+    Opcode.LOAD_V: ((), (), (0,), 1, 1),
+    Opcode.LOAD_R: ((1,), (), (0,), 1, 1),
+    Opcode.STORE_V: ((1,), (), (), 1, 1),
+    Opcode.STORE_R: ((0, 1), (), (), 1, 1),
+    Opcode.NEXT: ((1,), (1, ZERO), (0,), 1, 1),
+    Opcode.CMP: ((0,), (ZERO,), (), 1, 1),
+    Opcode.INC: ((0,), (0, ZERO), (), 1, 1),
+    # чтение слагаемого и запись суммы - два обращения к памяти
+    Opcode.ADD_MMR: ((2,), (), (ZERO,), 1, 2),
+    Opcode.MOD_RRV: ((1,), (0, ZERO), (), 1, 1),
+    Opcode.LINEAR: ((2,), (0, ZERO), (), 1, 1),
+    # умножение и сложение - два такта АЛУ
+    Opcode.LINEAR_CONT: ((0, 2), (0, ZERO), (), 2, 1),
+    # стадия MEM занята по такту на каждое пересланное слово
+    Opcode.INPUT_STR: ((0,), (), (), 1, 1),
+    Opcode.OUTPUT_STR: ((0,), (), (), 1, 1),
+}
+CONDITIONAL = (Opcode.JZ, Opcode.JZ_R)
+
+
+class PipelinedControlUnit(ControlUnit):
+    """Конвейерная модель Control Unit.
+
+    Инструкции исполняются эталонным декодером `ControlUnit`, поэтому
+    вывод и число инструкций совпадают с ним, а такты считаются по модели
+    конвейера IF/ID/EX/MEM/WB: счётчик тактов - номер такта, в котором
+    инструкция покидает WB.
+
+    - Конфликты по данным отслеживаются для регистров и флага zero. С
+      пробросом (`forwarding`) результат EX доступен следующей инструкции
+      сразу, результат MEM (чтение памяти и ввод) - через такт. Без проброса
+      значение читается в ID после записи в WB.
+    - Многотактовые EX и MEM (`LINEAR_CONT`, `ADD_MMR`, блочный ввод-вывод)
+      задерживают следующие инструкции как структурный конфликт.
+    - `JMP` известен в ID, условные переходы - в конце EX. Политика `flush`
+      выбирает инструкции подряд и сбрасывает их на каждом переходе;
+      `static` предсказывает переходы назад выполняемыми, вперёд - нет
+      (адрес перехода известен уже при выборке из памяти команд), и
+      сбрасывает конвейер только при ошибке предсказания.
+    """
+
+    branch: str = None
+    forwarding: bool = None
+
+    # такты входа предыдущей инструкции в стадии IF, ID, EX, MEM, WB
+    stages: tuple = None
+    # место (регистр или флаг) -> первый такт, с которого оно доступно в EX
+    ready: dict = None
+    # первый такт выборки после перехода
+    redirect: int = None
+
+    instructions: int = None
+    stalls: Counter = None
+    branches: int = None
+    mispredictions: int = None
+
+    def __init__(
+        self,
+        program_memory: list,
+        data_path: DataPath,
+        branch: str = "static",
+        forwarding: bool = True,
+    ):
+        assert branch in BRANCH_POLICIES, f"Unknown branch policy: {branch}"
+        super().__init__(program_memory, data_path)
+        self.branch = branch
+        self.forwarding = forwarding
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.stages = None
+        self.ready = {}
+        self.redirect = 0
+        self.instructions = 0
+        self.stalls = Counter(data=0, structural=0, control=0)
+        self.branches = 0
+        self.mispredictions = 0
+
+    def decode_and_execute_instruction(self):
+        pc = self.program_counter
+        instr = self.program_memory[pc]
+        start = self._tick
+        try:
+            ControlUnit.decode_and_execute_instruction(self)
+        except StopIteration:
+            # HLT останавливает процессор после выхода из конвейера всех предыдущих
+            self.instructions += 1
+            self._tick = start
+            raise
+        except BaseException:
+            self._tick = start
+            raise
+        # эталонные такты нужны только для длины блочного ввода-вывода
+        elapsed = self._tick - start
+        self.instructions += 1
+        self._tick = self.schedule(pc, instr, start, elapsed) + 1
+
+    def schedule(self, pc: int, instr, start: int, elapsed: int) -> int:
+        """Размещение инструкции в конвейере, возвращает такт её стадии WB."""
+        opcode = instr.opcode
+        reads, ex_writes, mem_writes, ex_len, mem_len = STAGES[opcode]
+        if opcode in BLOCK_IO:
+            # эталон: такт на адрес, по такту на слово и такт на PC
+            mem_len = elapsed - 2
+
+        if self.stages is None:
+            # первая инструкция или продолжение со снимка
+            prev_if = prev_id = prev_ex = prev_mem = prev_wb = start - 1
+            self.redirect = start
+        else:
+            prev_if, prev_id, prev_ex, prev_mem, prev_wb = self.stages
+
+        sequential = max(prev_if + 1, prev_id)
+        fetch = max(sequential, self.redirect)
+        self.stalls["control"] += fetch - sequential
+        decode = max(fetch + 1, prev_ex)
+
+        free = max(decode + 1, prev_mem)
+        self.stalls["structural"] += max(0, prev_mem - decode - 1)
+        operands = max(
+            (self.ready.get(self._location(instr, arg), 0) for arg in reads),
+            default=0,
+        )
+        execute = max(free, operands)
+        self.stalls["data"] += execute - free
+
+        memory = max(execute + ex_len, prev_wb)
+        self.stalls["structural"] += memory - execute - ex_len
+        write_back = max(memory + mem_len, prev_wb + 1)
+        self.stages = (fetch, decode, execute, memory, write_back)
+
+        for arg in ex_writes:
+            self.ready[self._location(instr, arg)] = self._available(
+                execute + ex_len, write_back
+            )
+        for arg in mem_writes:
+            self.ready[self._location(instr, arg)] = self._available(
+                memory + mem_len, write_back
+            )
+
+        if opcode is Opcode.JMP:
+            self.branches += 1
+            if self.branch == "flush":
+                self.mispredictions += 1
+                self.redirect = decode + 1
+        elif opcode in CONDITIONAL:
+            self.branches += 1
+            taken = self.program_counter != pc + 1
+            # без предсказания выборка идёт подряд, как при предсказании "не выполняется"
+            predicted = self.branch == "static" and instr.args[0] <= pc
+            if taken != predicted:
+                self.mispredictions += 1
+                self.redirect = execute + ex_len
+        return write_back
+
+    def _location(self, instr, arg):
+        return ZERO if arg == ZERO else instr.args[arg]
+
+    def _available(self, produced: int, write_back: int) -> int:
+        # без проброса значение читается в ID такта после записи в WB
+        return produced if self.forwarding else write_back + 1
+
+    def cpi(self) -> float:
+        return self._tick / self.instructions if self.instructions else 0.0
+
+    def report(self) -> str:
+        return (
+            f"Pipeline: branch={self.branch} "
+            f"forwarding={'on' if self.forwarding else 'off'} "
+            f"CPI: {self.cpi():.2f}\n"
+            f"Stalls: data {self.stalls['data']} "
+            f"structural {self.stalls['structural']} "
+            f"control {self.stalls['control']} "
+            f"Branches: {self.branches} Mispredictions: {self.mispredictions}"
+        )
+
+
+class Pipeline:
+    """Настройки конвейерной модели для моделирования: создаёт
+    `PipelinedControlUnit` и после моделирования выдаёт его отчёт."""
+
+    branch: str = None
+    forwarding: bool = None
+    control_unit: PipelinedControlUnit = None
+
+    def __init__(self, branch: str = "static", forwarding: bool = True):
+        self.branch = branch
+        self.forwarding = forwarding
+
+    def create_control_unit(self, program_memory: list, data_path: DataPath):
+        self.control_unit = PipelinedControlUnit(
+            program_memory, data_path, self.branch, self.forwarding
+        )
+        return self.control_unit
+
+    def report(self) -> str:
+        return self.control_unit.report()
@@ -0,0 +1,260 @@
+from array import array
+from functools import partial
+
+from processor.control_unit import ControlUnit
+from processor.data_path import DataPath
+from processor.isa import INPUT_MAP, OUTPUT_MAP, MachineCode, Opcode
+from processor.memory import word_overflow
+
+
+class PredecodedControlUnit(ControlUnit):
+    """Control Unit с предварительным декодированием программы.
+
+    Память команд один раз переводится в таблицу обработчиков: для каждого
+    адреса хранится метод с уже извлечёнными операндами. Цикл процессора
+    сводится к одному индексированному вызову. Сигналы и такты совпадают
+    с `ControlUnit`, поэтому журнал и счётчики не отличаются.
+    """
+
+    decoded: list = None
+    data_words: array = None
+
+    def __init__(self, program_memory: list, data_path: DataPath):
+        super().__init__(program_memory, data_path)
+        # слова памяти данных без обёртки DataMemory
+        self.data_words = data_path.data_memory.words
+        self.decoded = [self.predecode(instr) for instr in program_memory]
+
+    def predecode(self, instr: MachineCode):
+        opcode = instr.opcode
+        args = instr.args
+        try:
+            if opcode is Opcode.LOAD_V and args[1] == INPUT_MAP:
+                return partial(self._exec_input, args[0])
+            if opcode is Opcode.STORE_V and args[0] == OUTPUT_MAP:
+                return partial(self._exec_output, args[1])
+            handler = self._handlers[opcode]
+            operands = handler.__code__.co_argcount - 1
+            if len(args) >= operands:
+                return partial(handler, self, *args[:operands])
+        except (KeyError, IndexError):
+            pass
+        # некорректные инструкции обрабатываются эталонным декодером
+        # в момент исполнения, как и без предекодирования
+        return partial(ControlUnit.decode_and_execute_instruction, self)
+
+    def decode_and_execute_instruction(self):
+        self.decoded[self.program_counter]()
+
+    # Обработчики инструкций. Порядок сигналов и тактов повторяет
+    # ControlUnit.decode_and_execute_instruction
+
+    def _exec_hlt(self):
+        raise StopIteration()
+
+    def _exec_jmp(self, addr):
+        self.program_counter = addr
+        self._tick += 1
+
+    def _exec_jz(self, addr):
+        if self.data_path.is_zero:
+            self.program_counter = addr
+        else:
+            self.program_counter += 1
+        self._tick += 1
+
+    def _exec_jz_r(self, addr, reg):
+        is_zero = self.data_path.registers[reg] == 0
+        self.data_path.is_zero = is_zero
+        self._tick += 1
+        if is_zero:
+            self.program_counter = addr
+        else:
+            self.program_counter += 1
+        self._tick += 1
+
+    def _exec_mov(self, reg, val):
+        self.data_path.registers[reg] = val
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_input(self, reg):
+        data_path = self.data_path
+        data_path.data_address = INPUT_MAP
+        self._tick += 1
+        data_path.registers[reg] = data_path._signal_input()
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_output(self, reg):
+        data_path = self.data_path
+        data_path.data_address = OUTPUT_MAP
+        self._tick += 1
+        data_path._signal_output(data_path.registers[reg])
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_load_v(self, reg, addr):
+        data_path = self.data_path
+        data_path.data_address = addr
+        self._tick += 1
+        data_path.registers[reg] = self.data_words[addr]
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_load_r(self, reg, addr_reg):
+        data_path = self.data_path
+        addr = data_path.registers[addr_reg]
+        data_path.data_address = addr
+        self._tick += 1
+        data_path.registers[reg] = self.data_words[addr]
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_store_v(self, addr, reg):
+        data_path = self.data_path
+        data_path.data_address = addr
+        self._tick += 1
+        try:
+            self.data_words[addr] = data_path.registers[reg]
+        except ValueError:
+            raise word_overflow(addr) from None
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_store_r(self, addr_reg, reg):
+        data_path = self.data_path
+        addr = data_path.registers[addr_reg]
+        data_path.data_address = addr
+        self._tick += 1
+        try:
+            self.data_words[addr] = data_path.registers[reg]
+        except ValueError:
+            raise word_overflow(addr) from None
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_next(self, reg, addr_reg):
+        data_path = self.data_path
+        registers = data_path.registers
+        addr = registers[addr_reg] + 1
+        registers[addr_reg] = addr
+        _set_zero(data_path, addr)
+        self._tick += 1
+        data_path.data_address = addr
+        self._tick += 1
+        registers[reg] = self.data_words[addr]
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_cmp(self, reg, val):
+        self.data_path.is_zero = self.data_path.registers[reg] == val
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_inc(self, reg):
+        data_path = self.data_path
+        res = data_path.registers[reg] + 1
+        data_path.registers[reg] = res
+        _set_zero(data_path, res)
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_add_mmr(self, dst, src, reg):
+        data_path = self.data_path
+        data_path.data_address = src
+        self._tick += 1
+        data_path.buffer_register = self.data_words[src]
+        self._tick += 1
+        data_path.data_address = dst
+        self._tick += 1
+        res = data_path.buffer_register + data_path.registers[reg]
+        _set_zero(data_path, res)
+        try:
+            self.data_words[dst] = res
+        except ValueError:
+            raise word_overflow(dst) from None
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_mod_rrv(self, reg, src, val):
+        data_path = self.data_path
+        # как и в DataPath, в буферный регистр защёлкивается номер регистра
+        data_path.buffer_register = src
+        self._tick += 1
+        res = data_path.registers[src] % val
+        _set_zero(data_path, res)
+        data_path.registers[reg] = res
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_linear(self, reg, val, src):
+        data_path = self.data_path
+        data_path.buffer_register = val
+        self._tick += 1
+        res = val * data_path.registers[src]
+        _set_zero(data_path, res)
+        data_path.registers[reg] = res
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_linear_cont(self, reg, val, src):
+        data_path = self.data_path
+        registers = data_path.registers
+        data_path.buffer_register = val
+        self._tick += 1
+        buf = val * registers[src]
+        _set_zero(data_path, buf)
+        data_path.buffer_register = buf
+        self._tick += 1
+        res = buf + registers[reg]
+        _set_zero(data_path, res)
+        registers[reg] = res
+        self.program_counter += 1
+        self._tick += 1
+
+    def _exec_input_str(self, reg):
+        data_path = self.data_path
+        start = data_path.registers[reg]
+        try:
+            words = data_path.input_string(start)
+        except EOFError:
+            # такт на защёлкивание адреса и по такту на каждое записанное слово
+            self._tick += 1 + data_path.data_address - start
+            raise
+        self.program_counter += 1
+        self._tick += 2 + words
+
+    def _exec_output_str(self, reg):
+        words = self.data_path.output_string(self.data_path.registers[reg])
+        self.program_counter += 1
+        self._tick += 2 + words
+
+    _handlers = {
+        Opcode.HLT: _exec_hlt,
+        Opcode.JMP: _exec_jmp,
+        Opcode.JZ: _exec_jz,
+        Opcode.JZ_R: _exec_jz_r,
+        Opcode.MOV: _exec_mov,
+        Opcode.LOAD_V: _exec_load_v,
+        Opcode.LOAD_R: _exec_load_r,
+        Opcode.STORE_V: _exec_store_v,
+        Opcode.STORE_R: _exec_store_r,
+        Opcode.NEXT: _exec_next,
+        Opcode.CMP: _exec_cmp,
+        Opcode.INC: _exec_inc,
+        Opcode.ADD_MMR: _exec_add_mmr,
+        Opcode.MOD_RRV: _exec_mod_rrv,
+        Opcode.LINEAR: _exec_linear,
+        Opcode.LINEAR_CONT: _exec_linear_cont,
+        Opcode.INPUT_STR: _exec_input_str,
+        Opcode.OUTPUT_STR: _exec_output_str,
+    }
+
+
+def _set_zero(data_path: DataPath, res: int):
+    # флаг zero выставляется АЛУ только для результатов 0 и 1
+    if res == 0:
+        data_path.is_zero = True
+    elif res == 1:
+        data_path.is_zero = False
@@ -0,0 +1,184 @@
+import json
+from collections import Counter
+
+from processor.block_compiler import split_basic_blocks
+from processor.control_unit import ControlUnit
+from processor.data_path import DataPath
+from processor.memory import DataMemory, word_overflow
+
+
+class CountingMemory:
+    """Память данных, считающая чтения и записи по адресам."""
+
+    def __init__(self, memory: DataMemory):
+        self.memory = memory
+        self.words = memory.words
+        self.segments = memory.segments
+        self.reads = Counter()
+        self.writes = Counter()
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __getitem__(self, addr: int) -> int:
+        self.reads[addr] += 1
+        return self.words[addr]
+
+    def __setitem__(self, addr: int, value: int):
+        self.writes[addr] += 1
+        try:
+            self.words[addr] = value
+        except ValueError:
+            raise word_overflow(addr) from None
+
+    def kind(self, addr: int):
+        return self.memory.kind(addr)
+
+
+class ProfilingControlUnit(ControlUnit):
+    """Эталонный Control Unit, собирающий профиль исполнения.
+
+    Для каждого адреса команды считается число исполнений и затраченные
+    такты, обращения к памяти данных считаются через `CountingMemory`.
+    Используется только при профилировании, остальные реализации
+    профилем не замедляются.
+    """
+
+    counts: list = None
+    ticks: list = None
+
+    def __init__(self, program_memory: list, data_path: DataPath):
+        data_path.data_memory = CountingMemory(data_path.data_memory)
+        super().__init__(program_memory, data_path)
+        self.counts = [0] * len(program_memory)
+        self.ticks = [0] * len(program_memory)
+
+    def decode_and_execute_instruction(self):
+        pc = self.program_counter
+        start = self._tick
+        self.counts[pc] += 1
+        try:
+            super().decode_and_execute_instruction()
+        finally:
+            self.ticks[pc] += self._tick - start
+
+
+class Profiler:
+    """Профилировщик моделирования: создаёт `ProfilingControlUnit` и после
+    моделирования собирает по нему `Profile`."""
+
+    control_unit: ProfilingControlUnit = None
+
+    def create_control_unit(self, program_memory: list, data_path: DataPath):
+        self.control_unit = ProfilingControlUnit(program_memory, data_path)
+        return self.control_unit
+
+    def profile(self):
+        return Profile(self.control_unit)
+
+
+class Profile:
+    """Результат профилирования: горячие точки по адресам, кодам операций,
+    базовым блокам и адресам памяти данных."""
+
+    def __init__(self, control_unit: ProfilingControlUnit):
+        program = control_unit.program_memory
+        memory = control_unit.data_path.data_memory
+        self.total_ticks = control_unit.current_tick()
+        self.total_instructions = sum(control_unit.counts)
+
+        self.pcs = [
+            {
+                "pc": pc,
+                "opcode": program[pc].opcode.name,
+                "count": count,
+                "ticks": control_unit.ticks[pc],
+            }
+            for pc, count in enumerate(control_unit.counts)
+            if count
+        ]
+
+        opcodes = {}
+        for entry in self.pcs:
+            stat = opcodes.setdefault(entry["opcode"], {"count": 0, "ticks": 0})
+            stat["count"] += entry["count"]
+            stat["ticks"] += entry["ticks"]
+        self.opcodes = [{"opcode": name, **stat} for name, stat in opcodes.items()]
+
+        # число входов в блок - число исполнений его первой инструкции
+        self.blocks = []
+        for start, block in split_basic_blocks(
+            program, len(control_unit.data_path.registers)
+        ):
+            end = start + len(block)
+            ticks = sum(control_unit.ticks[start:end])
+            if ticks or control_unit.counts[start]:
+                self.blocks.append(
+                    {
+                        "start": start,
+                        "end": end - 1,
+                        "count": control_unit.counts[start],
+                        "ticks": ticks,
+                    }
+                )
+
+        self.memory = [
+            {
+                "addr": addr,
+                "kind": _kind_name(memory.kind(addr)),
+                "reads": memory.reads[addr],
+                "writes": memory.writes[addr],
+            }
+            for addr in sorted(memory.reads.keys() | memory.writes.keys())
+        ]
+
+        for entries in (self.pcs, self.opcodes, self.blocks):
+            entries.sort(key=lambda entry: (-entry["ticks"], -entry["count"]))
+        self.memory.sort(key=lambda entry: -(entry["reads"] + entry["writes"]))
+
+    def to_dict(self):
+        return {
+            "instructions": self.total_instructions,
+            "ticks": self.total_ticks,
+            "pcs": self.pcs,
+            "opcodes": self.opcodes,
+            "blocks": self.blocks,
+            "memory": self.memory,
+        }
+
+    def dump(self, filename: str):
+        with open(filename, "w") as file:
+            json.dump(self.to_dict(), file, indent=1)
+
+    def report(self, top: int = 10) -> str:
+        total = max(self.total_ticks, 1)
+        lines = [f"{'pc':>6} {'opcode':12} {'count':>10} {'ticks':>10} {'%':>6}"]
+        for entry in self.pcs[:top]:
+            lines.append(
+                f"{entry['pc']:6} {entry['opcode']:12} {entry['count']:10} "
+                f"{entry['ticks']:10} {100 * entry['ticks'] / total:6.1f}"
+            )
+        lines += ["", f"{'opcode':19} {'count':>10} {'ticks':>10} {'%':>6}"]
+        for entry in self.opcodes[:top]:
+            lines.append(
+                f"{entry['opcode']:19} {entry['count']:10} "
+                f"{entry['ticks']:10} {100 * entry['ticks'] / total:6.1f}"
+            )
+        lines += ["", f"{'block':19} {'count':>10} {'ticks':>10} {'%':>6}"]
+        for entry in self.blocks[:top]:
+            block = f"{entry['start']}..{entry['end']}"
+            lines.append(
+                f"{block:19} {entry['count']:10} "
+                f"{entry['ticks']:10} {100 * entry['ticks'] / total:6.1f}"
+            )
+        lines += ["", f"{'addr':>6} {'kind':12} {'reads':>10} {'writes':>10}"]
+        for entry in self.memory[:top]:
+            lines.append(
+                f"{entry['addr']:6} {entry['kind']:12} "
+                f"{entry['reads']:10} {entry['writes']:10}"
+            )
+        return "\n".join(lines)
+
+
+def _kind_name(kind) -> str:
+    return kind.name if kind is not None else "-"
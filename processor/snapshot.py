@@ -0,0 +1,222 @@
+import os
+import struct
+from array import array
+
+from processor.control_unit import ControlUnit
+from processor.devices import BufferOutput
+from processor.memory import WORD_SIZE, WORD_TYPECODE, DataMemory
+
+# Файл снимка: заголовок, регистры, изменённые страницы памяти данных
+# (номер страницы и её слова) и выведенные значения. Страницы, совпадающие
+# с исходным образом программы, не сохраняются.
+SNAPSHOT_MAGIC = b"CA3K"
+SNAPSHOT_VERSION = 3
+# сигнатура, версия, число регистров, PC, такт, инструкции, позиция ввода,
+# DR, SB, флаг zero, размер памяти, число страниц, число выведенных значений,
+# позиция потокового вывода в файле, класс Control Unit
+SNAPSHOT_HEADER = struct.Struct("<4sHHQQQQqq?7xQQQq32s")
+PAGE_WORDS = 512
+PAGE_INDEX = struct.Struct("<Q")
+
+
+class Snapshot:
+    """Снимок состояния `ControlUnit` и `DataPath` между инструкциями."""
+
+    # класс Control Unit, записавшего снимок: такты и счётчики разных
+    # реализаций и моделей могут считаться по-разному
+    engine: str = None
+    program_counter: int = None
+    tick: int = None
+    instructions: int = None
+    input_position: int = None
+    data_address: int = None
+    buffer_register: int = None
+    is_zero: bool = None
+    registers: list = None
+    memory_size: int = None
+    # номер страницы -> слова страницы
+    pages: dict = None
+    output: list = None
+    # позиция файла потокового вывода, -1 - вывод хранится в `output`
+    output_offset: int = None
+
+    @classmethod
+    def capture(cls, control_unit: ControlUnit, instructions: int, image: DataMemory):
+        """Снимок текущего состояния; память сравнивается с исходным образом `image`."""
+        data_path = control_unit.data_path
+        snapshot = cls()
+        snapshot.engine = type(control_unit).__name__
+        snapshot.program_counter = control_unit.program_counter
+        snapshot.tick = control_unit.current_tick()
+        snapshot.instructions = instructions
+        snapshot.input_position = data_path.input_device.tell()
+        snapshot.data_address = data_path.data_address
+        snapshot.buffer_register = data_path.buffer_register
+        snapshot.is_zero = data_path.is_zero
+        snapshot.registers = list(data_path.registers)
+        snapshot.memory_size = len(data_path.data_memory)
+        snapshot.pages = dirty_pages(data_path.data_memory.words, image.words)
+        # потоковый вывод дописывается в файл и в снимок не попадает, вместо
+        # него сохраняется позиция в файле: при продолжении файл обрезается по ней
+        output_device = data_path.output_device
+        if isinstance(output_device, BufferOutput):
+            snapshot.output = list(output_device.values)
+            snapshot.output_offset = -1
+        else:
+            snapshot.output = []
+            snapshot.output_offset = output_device.tell()
+        return snapshot
+
+    def restore(self, control_unit: ControlUnit) -> int:
+        """Восстановление состояния в только что созданный Control Unit.
+
+        Память должна содержать исходный образ программы, перезаписываются
+        только сохранённые страницы. Возвращает число исполненных инструкций.
+        """
+        data_path = control_unit.data_path
+        if type(control_unit).__name__ != self.engine:
+            raise ValueError(
+                f"Snapshot of {self.engine} cannot be resumed on "
+                f"{type(control_unit).__name__}"
+            )
+        assert len(data_path.data_memory) == self.memory_size, "Another program image!"
+        assert len(data_path.registers) == len(self.registers), "Wrong registers amount"
+        control_unit.program_counter = self.program_counter
+        control_unit._tick = self.tick
+        if hasattr(control_unit, "instructions"):
+            control_unit.instructions = self.instructions
+        data_path.input_device.skip(self.input_position)
+        data_path.data_address = self.data_address
+        data_path.buffer_register = self.buffer_register
+        data_path.is_zero = self.is_zero
+        data_path.registers[:] = self.registers
+        words = data_path.data_memory.words
+        for page, values in self.pages.items():
+            start = page * PAGE_WORDS
+            words[start : start + len(values)] = values
+        for val in self.output:
+            data_path.output_device.write(val)
+        return self.instructions
+
+
+def dirty_pages(words: array, image: array) -> dict:
+    current = memoryview(words).cast("B")
+    initial = memoryview(image).cast("B")
+    page_size = PAGE_WORDS * WORD_SIZE
+    pages = {}
+    for page, start in enumerate(range(0, len(current), page_size)):
+        if current[start : start + page_size] != initial[start : start + page_size]:
+            # bytes передаются в array через frombytes
+            pages[page] = array(
+                WORD_TYPECODE, current[start : start + page_size].tobytes()
+            )
+    return pages
+
+
+def write_snapshot(filename: str, snapshot: Snapshot):
+    # запись через временный файл, чтобы прерванная запись не портила прошлый снимок
+    temp = f"{filename}.tmp"
+    with open(temp, "wb") as file:
+        file.write(
+            SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC,
+                SNAPSHOT_VERSION,
+                len(snapshot.registers),
+                snapshot.program_counter,
+                snapshot.tick,
+                snapshot.instructions,
+                snapshot.input_position,
+                snapshot.data_address,
+                snapshot.buffer_register,
+                snapshot.is_zero,
+                snapshot.memory_size,
+                len(snapshot.pages),
+                len(snapshot.output),
+                snapshot.output_offset,
+                snapshot.engine.encode(),
+            )
+        )
+        file.write(array(WORD_TYPECODE, snapshot.registers).tobytes())
+        for page, values in snapshot.pages.items():
+            file.write(PAGE_INDEX.pack(page))
+            file.write(values.tobytes())
+        file.write(array(WORD_TYPECODE, snapshot.output).tobytes())
+    os.replace(temp, filename)
+
+
+def read_snapshot(filename: str) -> Snapshot:
+    with open(filename, "rb") as file:
+        raw = file.read()
+    (
+        magic,
+        version,
+        registers_amount,
+        program_counter,
+        tick,
+        instructions,
+        input_position,
+        data_address,
+        buffer_register,
+        is_zero,
+        memory_size,
+        pages_amount,
+        output_amount,
+        output_offset,
+        engine,
+    ) = SNAPSHOT_HEADER.unpack_from(raw)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot file: {magic} v{version}")
+
+    snapshot = Snapshot()
+    snapshot.engine = engine.rstrip(b"\0").decode()
+    snapshot.program_counter = program_counter
+    snapshot.tick = tick
+    snapshot.instructions = instructions
+    snapshot.input_position = input_position
+    snapshot.data_address = data_address
+    snapshot.buffer_register = buffer_register
+    snapshot.is_zero = is_zero
+    snapshot.memory_size = memory_size
+    snapshot.output_offset = output_offset
+
+    offset = SNAPSHOT_HEADER.size
+
+    def read_words(amount: int) -> array:
+        nonlocal offset
+        words = array(WORD_TYPECODE)
+        words.frombytes(raw[offset : offset + amount * WORD_SIZE])
+        offset += amount * WORD_SIZE
+        return words
+
+    snapshot.registers = read_words(registers_amount).tolist()
+    snapshot.pages = {}
+    for _ in range(pages_amount):
+        (page,) = PAGE_INDEX.unpack_from(raw, offset)
+        offset += PAGE_INDEX.size
+        length = min(PAGE_WORDS, memory_size - page * PAGE_WORDS)
+        snapshot.pages[page] = read_words(length)
+    snapshot.output = read_words(output_amount).tolist()
+    return snapshot
+
+
+class Checkpointer:
+    """Периодическая запись снимков в файл каждые `interval` тактов."""
+
+    filename: str = None
+    interval: int = None
+    image: DataMemory = None
+
+    def __init__(self, filename: str, interval: int, data: DataMemory):
+        assert interval > 0, "Checkpoint interval must be positive"
+        self.filename = filename
+        self.interval = interval
+        # исходный образ памяти, относительно которого ищутся изменённые страницы
+        self.image = data.copy()
+
+    def next_tick(self, tick: int) -> int:
+        return (tick // self.interval + 1) * self.interval
+
+    def save(self, control_unit: ControlUnit, instructions: int):
+        write_snapshot(
+            self.filename, Snapshot.capture(control_unit, instructions, self.image)
+        )
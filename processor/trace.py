@@ -0,0 +1,158 @@
+import argparse
+import struct
+from collections import deque
+
+from processor.control_unit import ControlUnit
+from processor.isa import Opcode
+
+# Файл трассы: заголовок (сигнатура, версия, число регистров), затем записи
+# фиксированного размера: такт, PC, код операции по адресу PC, регистры,
+# регистр адреса данных и буферный регистр
+TRACE_MAGIC = b"CA3T"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct("<4sHH")
+OPCODES = list(Opcode)
+NO_OPCODE = 0xFF
+
+
+def record_struct(registers_amount: int) -> struct.Struct:
+    return struct.Struct(f"<QIB3x{registers_amount}qqq")
+
+
+class TraceRecorder:
+    """Запись трассы исполнения в кольцевой буфер.
+
+    Хранятся последние `capacity` записей состояния процессора после
+    каждой инструкции. Записи упакованы в один `bytearray`, поэтому
+    память ограничена `capacity * record.size` байтами.
+    """
+
+    def __init__(self, control_unit: ControlUnit, capacity: int):
+        assert capacity > 0, "Trace capacity must be positive"
+        self.control_unit = control_unit
+        self.data_path = control_unit.data_path
+        self.registers_amount = len(self.data_path.registers)
+        self.record = record_struct(self.registers_amount)
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * self.record.size)
+        self.count = 0
+        # неудачная упаковка испортила старейшую запись кольцевого буфера
+        self.partial = False
+        self.opcodes = [
+            OPCODES.index(instr.opcode) for instr in control_unit.program_memory
+        ]
+
+    def _pack_into(self, buffer, offset: int):
+        control_unit = self.control_unit
+        data_path = self.data_path
+        pc = control_unit.program_counter
+        try:
+            self.record.pack_into(
+                buffer,
+                offset,
+                control_unit._tick,
+                pc,
+                self.opcodes[pc] if 0 <= pc < len(self.opcodes) else NO_OPCODE,
+                *data_path.registers,
+                data_path.data_address,
+                data_path.buffer_register,
+            )
+        except struct.error:
+            # регистры не ограничены, а поля записи - int64
+            raise OverflowError(
+                f"trace value out of int64 range at tick {control_unit._tick}: "
+                f"RG {data_path.registers} DR {data_path.data_address} "
+                f"SB {data_path.buffer_register}"
+            ) from None
+
+    def __call__(self):
+        try:
+            self._pack_into(self.buffer, self.count % self.capacity * self.record.size)
+        except OverflowError:
+            # pack_into успевает записать часть полей поверх старейшей записи
+            self.partial = True
+            raise
+        self.count += 1
+
+    def records(self):
+        # записи от старых к новым
+        size = self.record.size
+        first = max(0, self.count - self.capacity + self.partial)
+        for index in range(first, self.count):
+            offset = index % self.capacity * size
+            yield bytes(self.buffer[offset : offset + size])
+
+    def close(self, filename: str = None):
+        if filename is None:
+            return
+        with open(filename, "wb") as file:
+            file.write(
+                TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.registers_amount)
+            )
+            for raw in self.records():
+                file.write(raw)
+
+
+class TraceFileRecorder(TraceRecorder):
+    """Запись всей трассы исполнения в файл без ограничения длины."""
+
+    def __init__(self, control_unit: ControlUnit, filename: str):
+        super().__init__(control_unit, capacity=1)
+        self.file = open(filename, "wb")
+        self.file.write(
+            TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.registers_amount)
+        )
+
+    def __call__(self):
+        self._pack_into(self.buffer, 0)
+        self.file.write(self.buffer)
+        self.count += 1
+
+    def close(self, filename: str = None):
+        self.file.close()
+
+
+def read_trace(filename: str, tail: int = None):
+    """Чтение записей трассы из файла: (такт, PC, код операции, регистры, DR, SB)."""
+    with open(filename, "rb") as file:
+        magic, version, registers_amount = TRACE_HEADER.unpack(
+            file.read(TRACE_HEADER.size)
+        )
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace file: {magic} v{version}")
+        record = record_struct(registers_amount)
+        entries = deque(maxlen=tail)
+        while raw := file.read(record.size):
+            tick, pc, opcode, *rest = record.unpack(raw)
+            registers = rest[:registers_amount]
+            data_address, buffer_register = rest[registers_amount:]
+            opcode = OPCODES[opcode] if opcode != NO_OPCODE else None
+            entries.append((tick, pc, opcode, registers, data_address, buffer_register))
+        return list(entries)
+
+
+def format_entry(entry) -> str:
+    # та же раскладка, что у ControlUnit.__repr__ в журнале DEBUG
+    tick, pc, opcode, registers, data_address, buffer_register = entry
+    name = opcode.name if opcode is not None else "-"
+    return (
+        f"TICK: {tick:4} "
+        f"[{pc:2}: {name:7}] "
+        f"PC: {pc:2} "
+        f"DR: {data_address:2} "
+        f"SB: {buffer_register:2} "
+        f"RG: {registers} "
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Просмотр трассы исполнения")
+    parser.add_argument("trace_file", help="Файл трассы")
+    parser.add_argument(
+        "--tail", type=int, help="Вывести только последние TAIL записей"
+    )
+
+    args = parser.parse_args()
+
+    for entry in read_trace(args.trace_file, args.tail):
+        print(format_entry(entry))
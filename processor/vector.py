@@ -0,0 +1,291 @@
+from processor.block_compiler import is_compilable
+from processor.control_unit import INSTRUCTION_TICKS
+from processor.devices import BufferOutput
+from processor.isa import INPUT_MAP, OUTPUT_MAP, MachineCode, Opcode
+from processor.memory import DataMemory
+
+try:
+    import numpy as np
+except ImportError:  # векторная модель доступна только с numpy
+    np = None
+
+
+class VectorMachine:
+    """Одновременное исполнение одной программы на N наборах входных данных.
+
+    Регистры, флаги zero, PC, счётчики и память данных всех экземпляров
+    хранятся массивами NumPy. На каждом шаге активные экземпляры
+    группируются по PC, и инструкция исполняется для всей группы
+    операциями над массивами. Остановившиеся экземпляры (HLT, конец ввода,
+    лимит тактов) исключаются маской. Как и в `FunctionalControlUnit`,
+    такты добавляются по `INSTRUCTION_TICKS`, а `DR` и `SB` не моделируются.
+    Значения - 64-битные целые, а не числа Python произвольной длины.
+    """
+
+    def __init__(self, data: DataMemory, program: list, inputs: list, registers=4):
+        assert np is not None, "VectorMachine requires numpy"
+        amount = len(inputs)
+        self.program = program
+        self.mem = np.tile(np.asarray(data.words, dtype=np.int64), (amount, 1))
+        self.regs = np.zeros((amount, registers), dtype=np.int64)
+        self.zero = np.zeros(amount, dtype=bool)
+        self.pc = np.zeros(amount, dtype=np.int64)
+        self.tick = np.zeros(amount, dtype=np.int64)
+        self.instructions = np.zeros(amount, dtype=np.int64)
+        self.running = np.ones(amount, dtype=bool)
+
+        # ввод каждого экземпляра - коды символов и завершающий 0, как у StreamInput
+        self.input_len = np.array([len(text) + 1 for text in inputs], dtype=np.int64)
+        self.input = np.zeros((amount, max(self.input_len, default=1)), dtype=np.int64)
+        for ind, text in enumerate(inputs):
+            self.input[ind, : len(text)] = [ord(symbol) for symbol in text]
+        self.input_pos = np.zeros(amount, dtype=np.int64)
+        self.outputs = [BufferOutput() for _ in range(amount)]
+
+        self.handlers = [
+            self.predecode(pc, instr) if is_compilable(instr, registers) else None
+            for pc, instr in enumerate(program)
+        ]
+
+    def run(self, limit: int):
+        while True:
+            active = np.flatnonzero(self.running & (self.tick < limit))
+            if not active.size:
+                break
+            pcs = self.pc[active]
+            for pc in np.unique(pcs):
+                group = active[pcs == pc]
+                self.instructions[group] += 1
+                handler = self.handlers[pc]
+                if handler is None:
+                    raise ValueError(f"Invalid instruction: {self.program[pc]}")
+                handler(group)
+
+    def results(self) -> list:
+        """Результаты в формате `simulation.simulation`: (вывод, инструкции, такты)."""
+        return [
+            (output.getvalue(), int(instructions), int(tick))
+            for output, instructions, tick in zip(
+                self.outputs, self.instructions, self.tick
+            )
+        ]
+
+    def _set_zero(self, group, res):
+        # флаг zero выставляется АЛУ только для результатов 0 и 1
+        self.zero[group[res == 0]] = True
+        self.zero[group[res == 1]] = False
+
+    def predecode(self, pc: int, instr: MachineCode):
+        regs, mem, zero = self.regs, self.mem, self.zero
+        opcode = instr.opcode
+        args = instr.args
+        cost = INSTRUCTION_TICKS[opcode]
+        following = pc + 1
+
+        def advance(group):
+            self.pc[group] = following
+            self.tick[group] += cost
+
+        if opcode is Opcode.HLT:
+
+            def execute(group):
+                self.running[group] = False
+
+        elif opcode is Opcode.JMP:
+            addr = args[0]
+
+            def execute(group):
+                self.pc[group] = addr
+                self.tick[group] += cost
+
+        elif opcode is Opcode.JZ:
+            addr = args[0]
+
+            def execute(group):
+                self.pc[group] = np.where(zero[group], addr, following)
+                self.tick[group] += cost
+
+        elif opcode is Opcode.JZ_R:
+            addr, reg = args[0], args[1]
+
+            def execute(group):
+                is_zero = zero[group] = regs[group, reg] == 0
+                self.pc[group] = np.where(is_zero, addr, following)
+                self.tick[group] += cost
+
+        elif opcode is Opcode.MOV:
+            reg, val = args[0], args[1]
+
+            def execute(group):
+                regs[group, reg] = val
+                advance(group)
+
+        elif opcode is Opcode.LOAD_V and args[1] == INPUT_MAP:
+            reg = args[0]
+
+            def execute(group):
+                pos = self.input_pos[group]
+                has_input = pos < self.input_len[group]
+                # конец ввода: чтение на втором такте LOAD_V, экземпляр останавливается
+                ended = group[~has_input]
+                self.tick[ended] += 1
+                self.running[ended] = False
+                group, pos = group[has_input], pos[has_input]
+                regs[group, reg] = self.input[group, pos]
+                self.input_pos[group] = pos + 1
+                advance(group)
+
+        elif opcode is Opcode.LOAD_V:
+            reg, addr = args[0], args[1]
+
+            def execute(group):
+                regs[group, reg] = mem[group, addr]
+                advance(group)
+
+        elif opcode is Opcode.LOAD_R:
+            reg, addr_reg = args[0], args[1]
+
+            def execute(group):
+                regs[group, reg] = mem[group, regs[group, addr_reg]]
+                advance(group)
+
+        elif opcode is Opcode.STORE_V and args[0] == OUTPUT_MAP:
+            reg = args[1]
+
+            def execute(group):
+                for ind, val in zip(group.tolist(), regs[group, reg].tolist()):
+                    self.outputs[ind].write(val)
+                advance(group)
+
+        elif opcode is Opcode.STORE_V:
+            addr, reg = args[0], args[1]
+
+            def execute(group):
+                mem[group, addr] = regs[group, reg]
+                advance(group)
+
+        elif opcode is Opcode.STORE_R:
+            addr_reg, reg = args[0], args[1]
+
+            def execute(group):
+                mem[group, regs[group, addr_reg]] = regs[group, reg]
+                advance(group)
+
+        elif opcode is Opcode.NEXT:
+            reg, addr_reg = args[0], args[1]
+
+            def execute(group):
+                addr = regs[group, addr_reg] = regs[group, addr_reg] + 1
+                self._set_zero(group, addr)
+                regs[group, reg] = mem[group, addr]
+                advance(group)
+
+        elif opcode is Opcode.CMP:
+            reg, val = args[0], args[1]
+
+            def execute(group):
+                zero[group] = regs[group, reg] == val
+                advance(group)
+
+        elif opcode is Opcode.INC:
+            reg = args[0]
+
+            def execute(group):
+                res = regs[group, reg] = regs[group, reg] + 1
+                self._set_zero(group, res)
+                advance(group)
+
+        elif opcode is Opcode.ADD_MMR:
+            dst, src, reg = args[0], args[1], args[2]
+
+            def execute(group):
+                res = mem[group, dst] = mem[group, src] + regs[group, reg]
+                self._set_zero(group, res)
+                advance(group)
+
+        elif opcode is Opcode.MOD_RRV:
+            reg, src, val = args[0], args[1], args[2]
+
+            def execute(group):
+                res = regs[group, reg] = regs[group, src] % val
+                self._set_zero(group, res)
+                advance(group)
+
+        elif opcode is Opcode.LINEAR:
+            reg, val, src = args[0], args[1], args[2]
+
+            def execute(group):
+                res = regs[group, reg] = val * regs[group, src]
+                self._set_zero(group, res)
+                advance(group)
+
+        elif opcode is Opcode.LINEAR_CONT:
+            reg, val, src = args[0], args[1], args[2]
+
+            def execute(group):
+                buf = val * regs[group, src]
+                self._set_zero(group, buf)
+                res = regs[group, reg] = buf + regs[group, reg]
+                self._set_zero(group, res)
+                advance(group)
+
+        elif opcode is Opcode.INPUT_STR:
+            reg = args[0]
+
+            def execute(group):
+                done = []
+                for ind in group.tolist():
+                    pos, end = self.input_pos[ind], self.input_len[ind]
+                    if pos >= end:
+                        # конец ввода на первом слове: такт на защёлкивание адреса
+                        self.tick[ind] += 1
+                        self.running[ind] = False
+                        continue
+                    words = string_length(self.input[ind, pos:end])
+                    addr = regs[ind, reg]
+                    if addr + words > mem.shape[1]:
+                        raise IndexError("Data memory index out of range")
+                    mem[ind, addr : addr + words] = self.input[ind, pos : pos + words]
+                    self.input_pos[ind] = pos + words
+                    self.tick[ind] += words
+                    done.append(ind)
+                advance(np.array(done, dtype=np.int64))
+
+        elif opcode is Opcode.OUTPUT_STR:
+            reg = args[0]
+
+            def execute(group):
+                for ind in group.tolist():
+                    row = mem[ind, regs[ind, reg] :]
+                    words = string_length(row)
+                    for val in row[: words - 1].tolist():
+                        self.outputs[ind].write(val)
+                    self.tick[ind] += words
+                advance(group)
+
+        else:
+            raise ValueError(f"Invalid opcode: {opcode}")
+
+        return execute
+
+
+def string_length(row) -> int:
+    """Число слов строки в начале `row` вместе с завершающим 0.
+
+    Ноль ищется окнами растущего размера, чтобы не сравнивать весь хвост памяти.
+    """
+    start, size = 0, 64
+    while start < len(row):
+        zeros = np.flatnonzero(row[start : start + size] == 0)
+        if zeros.size:
+            return start + int(zeros[0]) + 1
+        start += size
+        size *= 2
+    raise IndexError("String is not terminated")
+
+
+def simulate_many(data: DataMemory, program: list, inputs: list, limit: int) -> list:
+    """Исполнение программы на каждом из входов `inputs` (строк) в одном пакете."""
+    machine = VectorMachine(data, program, inputs)
+    machine.run(limit)
+    return machine.results()
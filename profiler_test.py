@@ -0,0 +1,25 @@
+"""Тесты профилировщика."""
+
+import simulation
+import translator
+from processor.profiler import Profiler
+
+
+def test_profile_accounts_for_all_ticks():
+    with open("tasks/hello_user.txt") as f:
+        source = f.read()
+    data, code = translator.translate(source)
+    profiler = Profiler()
+    _, instructions, ticks = simulation.simulation(
+        data, code, list("Bob") + [chr(0)], 0, 100000, profiler=profiler
+    )
+    profile = profiler.profile()
+
+    assert sum(entry["count"] for entry in profile.pcs) == instructions
+    assert sum(entry["ticks"] for entry in profile.pcs) == ticks
+    assert sum(entry["ticks"] for entry in profile.blocks) == ticks
+    # имя записывается в буфер user и читается при выводе приветствия
+    user = translator.translate_stage_1(source)[1]["user"]
+    heat = {entry["addr"]: entry for entry in profile.memory}
+    assert heat[user]["writes"] == 1
+    assert heat[user]["reads"] == 1
@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import translator
+from batch import BatchWorker
+from processor.devices import BufferInput
+
+# число программ в реестре по умолчанию
+REGISTRY_SIZE = 64
+DEFAULT_ENGINE = "compiled"
+DEFAULT_LIMIT = 100000
+# число последних заданий, по которым считается статистика задержек
+LATENCY_WINDOW = 10000
+# заданий в очереди и в исполнении на один поток, дальше чтение заданий ждёт
+QUEUE_DEPTH = 4
+
+
+def program_id(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+class Program:
+    """Оттранслированная программа и свободные исполнители по реализациям Control Unit."""
+
+    def __init__(self, source: str):
+        self.data, self.code = translator.translate(source)
+        # образ памяти размещается сразу: исполнители копируют его из разных потоков
+        self.data.allocate()
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, engine: str) -> BatchWorker:
+        with self.lock:
+            idle = self.idle.setdefault(engine, [])
+            if idle:
+                return idle.pop()
+        # предекодирование или компиляция - один раз на исполнитель
+        return BatchWorker(self.data, self.code, engine, DEFAULT_LIMIT)
+
+    def release(self, engine: str, worker: BatchWorker):
+        with self.lock:
+            self.idle[engine].append(worker)
+
+
+class ProgramRegistry:
+    """LRU-реестр оттранслированных программ по хэшу исходного кода."""
+
+    def __init__(self, capacity: int = REGISTRY_SIZE):
+        assert capacity > 0, "Registry capacity must be positive"
+        self.capacity = capacity
+        self.programs = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def register(self, source: str) -> tuple:
+        """Программа по исходному коду, возвращает (id, программа, была ли в реестре)."""
+        key = program_id(source)
+        with self.lock:
+            program = self.programs.get(key)
+            if program is not None:
+                self.programs.move_to_end(key)
+                self.hits += 1
+                return key, program, True
+        # трансляция вне блокировки: другие задания не ждут её
+        program = Program(source)
+        with self.lock:
+            self.misses += 1
+            self.programs[key] = self.programs.get(key, program)
+            self.programs.move_to_end(key)
+            while len(self.programs) > self.capacity:
+                self.programs.popitem(last=False)
+                self.evictions += 1
+            return key, self.programs[key], False
+
+    def get(self, key: str) -> Program:
+        with self.lock:
+            program = self.programs.get(key)
+            if program is None:
+                self.misses += 1
+                raise KeyError(f"Unknown program: {key}")
+            self.programs.move_to_end(key)
+            self.hits += 1
+            return program
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "programs": len(self.programs),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class Server:
+    """Исполнение заданий JSONL с ограниченным числом потоков.
+
+    Задание: `{"id": ..., "source": "..."}` или `{"id": ..., "program": ID}`,
+    необязательные `input`, `engine`, `limit`. Ответ содержит `id`,
+    `program`, `output`, `instructions`, `ticks` и задержки в мс (`queue`,
+    `translate`, `run`, `total`) или `error`. Задание `{"op": "stats"}`
+    возвращает статистику сервера, задержки в ней - по последним
+    `LATENCY_WINDOW` заданиям. Не завершённых заданий не больше
+    `QUEUE_DEPTH` на поток: `serve_lines` читает следующее, когда освобождается место.
+    """
+
+    def __init__(self, workers: int = None, registry_size: int = REGISTRY_SIZE):
+        workers = workers or os.cpu_count()
+        self.registry = ProgramRegistry(registry_size)
+        self.executor = ThreadPoolExecutor(workers)
+        # места в очереди исполнителя, общие для всех соединений
+        self.slots = threading.BoundedSemaphore(QUEUE_DEPTH * workers)
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.jobs = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, request: dict, respond):
+        """Постановка задания в очередь, `respond` вызывается с ответом."""
+        submitted = time.perf_counter()
+        if not isinstance(request, dict):
+            respond({"error": "TypeError: request must be a JSON object"})
+            return
+        if request.get("op") == "stats":
+            respond({"id": request.get("id"), "stats": self.stats()})
+            return
+        future = self.executor.submit(self.run_job, request, submitted)
+        future.add_done_callback(lambda done: respond(done.result()))
+
+    def run_job(self, request: dict, submitted: float) -> dict:
+        started = time.perf_counter()
+        response = {"id": request.get("id")}
+        translated = None
+        try:
+            if "source" in request:
+                key, program, cached = self.registry.register(request["source"])
+            else:
+                key = request["program"]
+                program, cached = self.registry.get(key), True
+            response.update(program=key, cached=cached)
+            translated = time.perf_counter()
+
+            engine = request.get("engine", DEFAULT_ENGINE)
+            worker = program.acquire(engine)
+            try:
+                text = request.get("input", "")
+                output, instructions, ticks = worker.execute(
+                    BufferInput(list(text) + [chr(0)]),
+                    request.get("limit", DEFAULT_LIMIT),
+                )
+            finally:
+                program.release(engine, worker)
+            response.update(output=output, instructions=instructions, ticks=ticks)
+        except Exception as e:
+            response["error"] = f"{type(e).__name__}: {e}"
+        finished = time.perf_counter()
+        if translated is None:
+            translated = finished
+
+        response["latency_ms"] = {
+            "queue": _ms(started - submitted),
+            "translate": _ms(translated - started),
+            "run": _ms(finished - translated),
+            "total": _ms(finished - submitted),
+        }
+        with self.lock:
+            self.jobs += 1
+            self.errors += "error" in response
+            self.latencies.append(finished - submitted)
+        return response
+
+    def stats(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            jobs, errors = self.jobs, self.errors
+        uptime = time.perf_counter() - self.started
+
+        def percentile(share: float) -> float:
+            if not latencies:
+                return 0.0
+            return _ms(latencies[min(len(latencies) - 1, int(share * len(latencies)))])
+
+        return {
+            "jobs": jobs,
+            "errors": errors,
+            "uptime_s": round(uptime, 3),
+            "jobs_per_s": round(jobs / uptime, 1) if uptime else 0.0,
+            "latency_ms": {
+                "mean": _ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": _ms(latencies[-1]) if latencies else 0.0,
+            },
+            "registry": self.registry.stats(),
+        }
+
+    def serve_lines(self, lines, write):
+        """Задания из итератора строк, ответы - строками JSON через `write`."""
+        lock = threading.Lock()
+        # число заданий соединения, ответ на которые ещё не отправлен
+        in_flight = threading.Condition()
+        pending = 0
+
+        def respond(response: dict):
+            line = json.dumps(response, ensure_ascii=False) + "\n"
+            with lock:
+                write(line)
+
+        def finish(response: dict):
+            nonlocal pending
+            try:
+                respond(response)
+            finally:
+                self.slots.release()
+                with in_flight:
+                    pending -= 1
+                    in_flight.notify_all()
+
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                respond({"error": f"JSONDecodeError: {e}"})
+                continue
+            self.slots.acquire()
+            with in_flight:
+                pending += 1
+            self.submit(request, finish)
+        with in_flight:
+            in_flight.wait_for(lambda: pending == 0)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+def serve_stdio(server: Server):
+    def write(line: str):
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+    server.serve_lines(sys.stdin, write)
+
+
+def serve_socket(server: Server, path: str):
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    logging.info("Listening on %s", path)
+
+    def handle(connection: socket.socket):
+        with connection, connection.makefile("r") as reader:
+            server.serve_lines(reader, lambda line: connection.sendall(line.encode()))
+
+    try:
+        while True:
+            connection, _ = listener.accept()
+            threading.Thread(target=handle, args=(connection,), daemon=True).start()
+    finally:
+        listener.close()
+        os.unlink(path)
+
+
+def main(
+    socket_path: str = None, workers: int = None, registry_size: int = REGISTRY_SIZE
+):
+    server = Server(workers, registry_size)
+    try:
+        if socket_path:
+            serve_socket(server, socket_path)
+        else:
+            serve_stdio(server)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(json.dumps(server.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.ERROR)
+
+    parser = argparse.ArgumentParser(
+        description="Сервер симуляции: задания JSONL через stdin/stdout или Unix-сокет"
+    )
+    parser.add_argument("--socket", help="Путь Unix-сокета (по умолчанию stdin/stdout)")
+    parser.add_argument(
+        "--workers", type=int, help="Число потоков исполнения (по умолчанию по CPU)"
+    )
+    parser.add_argument(
+        "--registry-size",
+        type=int,
+        default=REGISTRY_SIZE,
+        help=f"Число программ в реестре (по умолчанию {REGISTRY_SIZE})",
+    )
+
+    args = parser.parse_args()
+
+    main(args.socket, args.workers, args.registry_size)
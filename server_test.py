@@ -0,0 +1,136 @@
+"""Тесты сервера симуляции."""
+
+import io
+import json
+import threading
+from collections import deque
+
+import pytest
+
+import simulation
+import translator
+from server import QUEUE_DEPTH, ProgramRegistry, Server
+
+LIMIT = 100000
+
+
+def source(task):
+    with open(f"tasks/{task}.txt") as f:
+        return f.read()
+
+
+def serve(server, requests):
+    output = io.StringIO()
+    server.serve_lines([json.dumps(request) for request in requests], output.write)
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+    return {response.get("id"): response for response in responses}
+
+
+@pytest.fixture
+def server():
+    server = Server(workers=2)
+    yield server
+    server.shutdown()
+
+
+@pytest.mark.parametrize("engine", ["reference", "predecoded", "compiled"])
+def test_server_matches_simulation(server, engine):
+    requests = [
+        {"id": name, "source": source("hello_user"), "input": name, "engine": engine}
+        for name in ("Alice", "Bob", "Eve")
+    ]
+    responses = serve(server, requests)
+
+    for name in ("Alice", "Bob", "Eve"):
+        data, code = translator.translate(source("hello_user"))
+        expected = simulation.simulation(data, code, list(name) + [chr(0)], 0, LIMIT)
+        response = responses[name]
+        assert (response["output"], response["instructions"], response["ticks"]) == (
+            expected
+        )
+        assert set(response["latency_ms"]) == {"queue", "translate", "run", "total"}
+
+
+def test_program_id_reuses_translation(server):
+    first = serve(server, [{"id": 1, "source": source("cat"), "input": "abc"}])[1]
+    second = serve(server, [{"id": 2, "program": first["program"], "input": "xy"}])[2]
+
+    assert (first["cached"], first["output"]) == (False, "abc")
+    assert (second["cached"], second["output"]) == (True, "xy")
+    registry = server.stats()["registry"]
+    assert (registry["hits"], registry["misses"]) == (1, 1)
+
+
+def test_errors_are_reported(server):
+    responses = serve(
+        server,
+        [
+            {"id": "unknown", "program": "0" * 64},
+            {"id": "engine", "source": source("cat"), "engine": "quantum"},
+            {"id": "stats", "op": "stats"},
+        ],
+    )
+
+    assert responses["unknown"]["error"].startswith("KeyError")
+    assert responses["engine"]["error"].startswith("KeyError")
+    assert responses["stats"]["stats"]["registry"]["programs"] in (0, 1)
+    assert server.stats()["errors"] == 2
+
+
+def test_non_object_requests_are_rejected(server):
+    output = io.StringIO()
+    server.serve_lines(["[1, 2]", '"cat"', "42"], output.write)
+    responses = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert len(responses) == 3
+    assert all(response["error"].startswith("TypeError") for response in responses)
+
+
+def test_latencies_are_bounded(server, monkeypatch):
+    monkeypatch.setattr(server, "latencies", deque(maxlen=2))
+    serve(server, [{"id": i, "source": source("cat")} for i in range(5)])
+
+    assert len(server.latencies) == 2
+    assert server.stats()["jobs"] == 5
+
+
+def test_reading_waits_for_free_slots(monkeypatch):
+    server = Server(workers=1)
+    release = threading.Event()
+    run_job = server.run_job
+
+    def blocked_job(request, submitted):
+        release.wait()
+        return run_job(request, submitted)
+
+    monkeypatch.setattr(server, "run_job", blocked_job)
+    read = []
+
+    def lines():
+        for index in range(QUEUE_DEPTH * 3):
+            read.append(index)
+            yield json.dumps({"id": index, "source": source("cat")})
+
+    output = io.StringIO()
+    reader = threading.Thread(target=server.serve_lines, args=(lines(), output.write))
+    reader.start()
+    reader.join(0.2)
+
+    # пока задания не исполняются, прочитано не больше мест очереди и одно ждущее
+    assert len(read) <= QUEUE_DEPTH + 1
+    release.set()
+    reader.join()
+    server.shutdown()
+    assert len(output.getvalue().splitlines()) == QUEUE_DEPTH * 3
+
+
+def test_registry_evicts_least_recently_used():
+    registry = ProgramRegistry(2)
+    cat, _, _ = registry.register(source("cat"))
+    registry.register(source("hello"))
+    registry.get(cat)
+    registry.register(source("prob1"))
+
+    assert registry.register(source("cat"))[2]
+    assert not registry.register(source("hello"))[2]
+    assert registry.stats()["evictions"] == 2
@@ -1,74 +1,311 @@
 import argparse
 import logging
+import sys
 
+from processor.block_compiler import CompiledControlUnit
+from processor.cache import EVICTIONS, WRITE_POLICIES, DataCache
 from processor.control_unit import ControlUnit
 from processor.data_path import DataPath
+from processor.functional import FunctionalControlUnit
+from processor.fusion import Fusion, FusedControlUnit
+from processor.devices import (
+    BufferInput,
+    InputDevice,
+    OutputDevice,
+    StreamInput,
+    StreamOutput,
+    read_all,
+)
 from processor.isa import read_code
+from processor.pipeline import BRANCH_POLICIES, Pipeline, PipelinedControlUnit
+from processor.predecoded import PredecodedControlUnit
+from processor.profiler import Profiler
+from processor.snapshot import Checkpointer, Snapshot, read_snapshot
+from processor.trace import TraceFileRecorder, TraceRecorder
+
+# доступные реализации Control Unit
+ENGINES = {
+    "reference": ControlUnit,
+    "predecoded": PredecodedControlUnit,
+    "compiled": CompiledControlUnit,
+    "functional": FunctionalControlUnit,
+    # functional со слиянием частых последовательностей инструкций
+    "fused": FusedControlUnit,
+    # вывод и инструкции как у reference, такты - по модели конвейера
+    "pipelined": PipelinedControlUnit,
+}
+# реализация Control Unit, на которой работает модель
+MODEL_ENGINES = {
+    "profiler": "reference",
+    "pipeline": "pipelined",
+    "cache": "reference",
+    "fusion": "fused",
+}
+REGISTERS = 4
+# интервал автоматических снимков в тактах
+CHECKPOINT_EVERY = 1000000
 
 
 def simulation(
     data: list,
     program: list,
-    input_buffer: list,
+    input_device: InputDevice,
     debug_limit: int,
     limit: int,
+    engine: str = None,
+    output_device: OutputDevice = None,
+    profiler: Profiler = None,
+    trace_file: str = None,
+    trace_size: int = 0,
+    checkpoint: Checkpointer = None,
+    resume: Snapshot = None,
+    pipeline: Pipeline = None,
+    cache: DataCache = None,
+    fusion: Fusion = None,
 ):
-    REGISTERS = 4
-    datapath = DataPath(data, REGISTERS, input_buffer)
-    control_unit = ControlUnit(program, datapath)
+    # модель создаёт свой Control Unit, поэтому задаётся не больше одной, и
+    # реализация, если указана, должна совпадать с реализацией модели
+    models = {
+        name: model
+        for name, model in (
+            ("profiler", profiler),
+            ("pipeline", pipeline),
+            ("cache", cache),
+            ("fusion", fusion),
+        )
+        if model is not None
+    }
+    if len(models) > 1:
+        raise ValueError(f"Incompatible models: {', '.join(models)}")
+    for name in models:
+        if engine is not None and engine != MODEL_ENGINES[name]:
+            raise ValueError(
+                f"{name} runs on the {MODEL_ENGINES[name]} engine, not {engine}"
+            )
+    # состояние конвейера в снимок не попадает, а такты без него не продолжить
+    if "pipeline" in models or engine == "pipelined":
+        if checkpoint is not None or resume is not None:
+            raise ValueError("pipelined engine does not support checkpoints")
+
+    datapath = DataPath(data, REGISTERS, input_device, output_device)
+    if models:
+        (model,) = models.values()
+        control_unit = model.create_control_unit(program, datapath)
+    else:
+        control_unit = ENGINES[engine or "reference"](program, datapath)
+
+    # трасса пишется в кольцевой буфер из trace_size записей или целиком в файл
+    if trace_file is None:
+        recorder = None
+    elif trace_size:
+        recorder = TraceRecorder(control_unit, trace_size)
+    else:
+        recorder = TraceFileRecorder(control_unit, trace_file)
 
     instructions = 0
+    if resume is not None:
+        instructions = resume.restore(control_unit)
+
+    try:
+        return execute(
+            control_unit, debug_limit, limit, recorder, checkpoint, instructions
+        )
+    finally:
+        if recorder is not None:
+            recorder.close(trace_file)
+
+
+def execute(
+    control_unit: ControlUnit,
+    debug_limit: int,
+    limit: int,
+    recorder=None,
+    checkpoint: Checkpointer = None,
+    instructions: int = 0,
+):
+    """Исполнение программы на подготовленном Control Unit до остановки или лимита."""
+    datapath = control_unit.data_path
+    # блочные реализации исполняют программу сами, без журнала по инструкциям,
+    # поэтому до такта debug_limit и при записи трассы исполнение идёт по
+    # одной инструкции
+    run = getattr(control_unit, "run", None)
+    if recorder is not None:
+        run = None
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
     try:
-        while control_unit.current_tick() < limit:
-            instructions += 1
-            control_unit.decode_and_execute_instruction()
-            if control_unit.current_tick() < debug_limit:
-                logging.debug(control_unit)
-            elif control_unit.current_tick() == debug_limit:
-                logging.warning("Debug limit exceeded!")
+        while True:
+            # снимок делается, когда такт доходит до очередной границы
+            bound = limit
+            if checkpoint is not None:
+                bound = min(limit, checkpoint.next_tick(control_unit.current_tick()))
+            # журнал по инструкциям ведётся только до такта debug_limit,
+            # дальше цикл исполнения обходится без проверок
+            while control_unit.current_tick() < min(bound, debug_limit):
+                instructions += 1
+                control_unit.decode_and_execute_instruction()
+                if recorder is not None:
+                    recorder()
+                if control_unit.current_tick() < debug_limit:
+                    if debug:
+                        logging.debug(control_unit)
+                elif control_unit.current_tick() == debug_limit:
+                    logging.warning("Debug limit exceeded!")
+            if run is not None:
+                control_unit.instructions = instructions
+                try:
+                    run(bound)
+                finally:
+                    instructions = control_unit.instructions
+            else:
+                while control_unit.current_tick() < bound:
+                    instructions += 1
+                    control_unit.decode_and_execute_instruction()
+                    if recorder is not None:
+                        recorder()
+            if checkpoint is None:
+                break
+            checkpoint.save(control_unit, instructions)
+            if control_unit.current_tick() >= limit:
+                break
 
     except EOFError:
         logging.warning("Input buffer is empty!")
     except StopIteration:
         pass
+    finally:
+        datapath.output_device.flush()
 
     if control_unit.current_tick() >= limit:
         logging.warning("Limit exceeded!")
         pass
 
-    output = "".join(
-        map(lambda x: chr(x) if x < 256 else str(x), datapath.output_buffer)
-    )
+    output = datapath.output_device.getvalue()
     logging.info(f"output_buffer: {output}")
 
     return output, instructions, control_unit.current_tick()
 
 
+def self_check(data, code, input_symbols: list, limit: int, engine: str):
+    """Сравнение реализации с эталонной пошаговой моделью на одних данных."""
+    if engine == "reference":
+        engine = "functional"
+    results = {}
+    for name in ("reference", engine):
+        results[name] = simulation(
+            data.copy(), code, BufferInput(input_symbols), 0, limit, name
+        )
+    # такты pipelined считаются по модели конвейера и с эталоном не совпадают
+    compared = slice(0, 2) if engine == "pipelined" else slice(None)
+    assert results["reference"][compared] == results[engine][compared], (
+        f"Self-check failed: reference {results['reference'][1:]}, "
+        f"{engine} {results[engine][1:]}"
+    )
+    logging.info(f"Self-check passed: {engine} matches reference")
+    return results[engine]
+
+
 def main(
     code_file: str,
     input_file: str,
     debug_limit: int,
     limit: int,
+    engine: str = "reference",
+    output_file: str = None,
+    check: bool = False,
+    profile_file: str = None,
+    trace_file: str = None,
+    trace_size: int = 0,
+    checkpoint_file: str = None,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+    resume_file: str = None,
+    branch: str = "static",
+    forwarding: bool = True,
+    cache: DataCache = None,
 ):
     data, code = read_code(code_file)
+    # снимки сравниваются с исходным образом, поэтому он копируется до восстановления
+    checkpoint = None
+    if checkpoint_file:
+        checkpoint = Checkpointer(checkpoint_file, checkpoint_every, data)
+    resume = read_snapshot(resume_file) if resume_file else None
+
+    # "-" - чтение из стандартного ввода
     if input_file is None:
-        input_buffer = []
+        input_stream = None
+        input_device = BufferInput([])
+    elif input_file == "-":
+        input_stream = None
+        input_device = StreamInput(sys.stdin)
+    else:
+        input_stream = open(input_file, "r")
+        input_device = StreamInput(input_stream)
+
+    # при потоковом выводе результат пишется по ходу моделирования
+    if output_file is None:
+        output_stream = output_device = None
+    elif output_file == "-":
+        output_stream = None
+        output_device = StreamOutput(sys.stdout)
     else:
-        with open(input_file, "r") as f:
-            input_buffer = list(f.read()) + [chr(0)]
+        if resume is not None and resume.output_offset >= 0:
+            # вывод до снимка уже записан в файл, записанное после - отбрасывается
+            output_stream = open(output_file, "r+")
+            output_stream.seek(resume.output_offset)
+            output_stream.truncate()
+        else:
+            # без потокового вывода выведенное до снимка хранится в самом снимке
+            output_stream = open(output_file, "w")
+        output_device = StreamOutput(output_stream)
 
+    fusion = None
     logging.info("Start simulation")
-    output, instructions, ticks = simulation(
-        data,
-        code,
-        input_buffer,
-        debug_limit,
-        limit,
-    )
+    try:
+        if check:
+            # ввод читается целиком, чтобы подать его обеим моделям
+            output, instructions, ticks = self_check(
+                data, code, read_all(input_device), limit, engine
+            )
+        else:
+            profiler = Profiler() if profile_file else None
+            pipeline = Pipeline(branch, forwarding) if engine == "pipelined" else None
+            fusion = Fusion() if engine == "fused" else None
+            output, instructions, ticks = simulation(
+                data,
+                code,
+                input_device,
+                debug_limit,
+                limit,
+                engine,
+                output_device,
+                profiler,
+                trace_file,
+                trace_size,
+                checkpoint,
+                resume,
+                pipeline,
+                cache,
+                fusion,
+            )
+    finally:
+        if input_stream is not None:
+            input_stream.close()
+        if output_stream is not None:
+            output_stream.close()
     logging.info("End simulation")
 
     print(output)
     print(f"Instructions: {instructions} Ticks: {ticks}")
+    if engine == "pipelined" and not check:
+        print(pipeline.report())
+    if cache is not None and not check:
+        print(cache.report())
+    if fusion is not None and fusion.control_unit is not None:
+        print(fusion.report())
+
+    if profile_file:
+        profile = profiler.profile()
+        profile.dump(profile_file)
+        print(profile.report())
 
 
 if __name__ == "__main__":
@@ -77,7 +314,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Симуляция процессора")
     parser.add_argument("code_file", help="Имя файла бинарным с кодом")
     parser.add_argument(
-        "input_file", nargs="?", help="Имя входного файла (опционально)"
+        "input_file",
+        nargs="?",
+        help="Имя входного файла, '-' для стандартного ввода (опционально)",
     )
     parser.add_argument(
         "--debug_limit", type=int, default=200, help="Лимит отладки (по умолчанию 200)"
@@ -86,11 +325,151 @@ if __name__ == "__main__":
         "--limit", type=int, default=100000, help="Лимит тиков (по умолчанию 100000)"
     )
 
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES.keys(),
+        default="reference",
+        help="Реализация Control Unit (по умолчанию reference)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Потоковый вывод в файл по ходу моделирования, '-' для стандартного вывода",
+    )
+    parser.add_argument(
+        "--self-check",
+        action="store_true",
+        help="Сравнить выбранную реализацию (по умолчанию functional) с эталонной",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PROFILE_JSON",
+        help="Профилировать программу: вывести горячие точки и сохранить профиль в JSON",
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="TRACE_FILE",
+        help="Записать двоичную трассу исполнения (просмотр: python -m processor.trace)",
+    )
+    parser.add_argument(
+        "--trace-size",
+        type=int,
+        default=0,
+        help="Хранить только последние TRACE_SIZE записей трассы (по умолчанию все)",
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        metavar="SNAPSHOT_FILE",
+        help="Периодически сохранять снимок состояния, в том числе при превышении лимита",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=CHECKPOINT_EVERY,
+        help=f"Интервал снимков в тактах (по умолчанию {CHECKPOINT_EVERY})",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="SNAPSHOT_FILE",
+        help="Продолжить моделирование со снимка (с тем же кодом и входом)",
+    )
+
+    parser.add_argument(
+        "--branch",
+        choices=BRANCH_POLICIES,
+        default="static",
+        help="Обработка переходов в конвейере pipelined: сброс или статическое "
+        "предсказание (по умолчанию static)",
+    )
+    parser.add_argument(
+        "--no-forwarding",
+        dest="forwarding",
+        action="store_false",
+        help="Отключить проброс результатов в конвейере pipelined",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="Размер кэша данных в словах, 0 - без кэша (по умолчанию 0)",
+    )
+    parser.add_argument(
+        "--cache-line", type=int, default=4, help="Размер строки кэша в словах"
+    )
+    parser.add_argument(
+        "--cache-ways", type=int, default=2, help="Ассоциативность кэша"
+    )
+    parser.add_argument(
+        "--cache-eviction",
+        choices=EVICTIONS,
+        default="lru",
+        help="Вытеснение строк кэша (по умолчанию lru)",
+    )
+    parser.add_argument(
+        "--cache-write",
+        choices=WRITE_POLICIES,
+        default="back",
+        help="Политика записи кэша (по умолчанию back)",
+    )
+    parser.add_argument(
+        "--cache-miss-penalty",
+        type=int,
+        default=10,
+        help="Такты на загрузку строки или запись в память (по умолчанию 10)",
+    )
+
     args = parser.parse_args()
+    # профилировщик и кэш данных работают на эталонной модели, самопроверка -
+    # без профиля, кэша, трассы, снимков и потокового вывода
+    options = {
+        "--profile": args.profile,
+        "--cache-size": args.cache_size,
+        "--trace": args.trace,
+        "--checkpoint": args.checkpoint,
+        "--resume": args.resume,
+        "--output": args.output,
+    }
+    for option in ("--profile", "--cache-size"):
+        if options[option] and args.engine != "reference":
+            parser.error(f"{option} runs on the reference engine, not {args.engine}")
+    if args.profile and args.cache_size:
+        parser.error("--profile cannot be combined with --cache-size")
+    if args.engine == "pipelined":
+        for option in ("--checkpoint", "--resume"):
+            if options[option]:
+                parser.error(f"{option} is not supported by the pipelined engine")
+    if args.self_check:
+        for option, value in options.items():
+            if value:
+                parser.error(f"--self-check cannot be combined with {option}")
+    cache = None
+    if args.cache_size:
+        cache = DataCache(
+            args.cache_size,
+            args.cache_line,
+            args.cache_ways,
+            args.cache_eviction,
+            args.cache_write,
+            args.cache_miss_penalty,
+        )
 
     main(
         args.code_file,
         args.input_file,
         args.debug_limit,
         args.limit,
+        args.engine,
+        args.output,
+        args.self_check,
+        args.profile,
+        args.trace,
+        args.trace_size,
+        args.checkpoint,
+        args.checkpoint_every,
+        args.resume,
+        args.branch,
+        args.forwarding,
+        cache,
     )
@@ -0,0 +1,116 @@
+"""Тесты снимков состояния и продолжения моделирования."""
+
+import io
+
+import pytest
+
+import simulation
+import translator
+from processor.devices import StreamInput
+from processor.isa import write_code
+from processor.pipeline import Pipeline
+from processor.snapshot import Checkpointer, read_snapshot
+
+LIMIT = 100000
+TASKS = {
+    "prob1": "",
+    "cat": "Hello, World!\n" * 5,
+    "hello_user": "Alice\n",
+}
+
+
+def translate(task):
+    with open(f"tasks/{task}.txt") as f:
+        return translator.translate(f.read())
+
+
+def run(task, engine, limit, **kwargs):
+    data, code = translate(task)
+    input_device = StreamInput(io.StringIO(TASKS[task]), chunk_size=3)
+    return simulation.simulation(data, code, input_device, 0, limit, engine, **kwargs)
+
+
+@pytest.mark.parametrize("engine", ["reference", "compiled", "functional"])
+@pytest.mark.parametrize("task", TASKS)
+@pytest.mark.parametrize("stop", [1, 30, 150])
+def test_resume_matches_full_run(tmp_path, engine, task, stop):
+    expected = run(task, engine, LIMIT)
+    snapshot_file = tmp_path / "state.snap"
+
+    checkpoint = Checkpointer(snapshot_file, 7, translate(task)[0])
+    run(task, engine, stop, checkpoint=checkpoint)
+    snapshot = read_snapshot(snapshot_file)
+    assert snapshot.tick >= stop
+
+    assert run(task, engine, LIMIT, resume=snapshot) == expected
+
+
+@pytest.mark.parametrize("engine", ["reference", "compiled"])
+def test_checkpoints_do_not_change_result(tmp_path, engine):
+    expected = run("prob1", engine, LIMIT)
+    checkpoint = Checkpointer(tmp_path / "state.snap", 1000, translate("prob1")[0])
+
+    assert run("prob1", engine, LIMIT, checkpoint=checkpoint) == expected
+
+
+def test_pipelined_checkpoints_rejected(tmp_path):
+    checkpoint = Checkpointer(str(tmp_path / "snap"), 100, translate("prob1")[0])
+    with pytest.raises(ValueError, match="does not support checkpoints"):
+        run("prob1", "pipelined", LIMIT, checkpoint=checkpoint)
+    run("prob1", "reference", 500, checkpoint=checkpoint)
+    with pytest.raises(ValueError, match="does not support checkpoints"):
+        run(
+            "prob1",
+            None,
+            LIMIT,
+            resume=read_snapshot(checkpoint.filename),
+            pipeline=Pipeline(),
+        )
+
+
+def test_resume_on_another_engine_rejected(tmp_path):
+    checkpoint = Checkpointer(str(tmp_path / "snap"), 100, translate("prob1")[0])
+    run("prob1", "compiled", 500, checkpoint=checkpoint)
+    snapshot = read_snapshot(checkpoint.filename)
+
+    assert snapshot.engine == "CompiledControlUnit"
+    with pytest.raises(ValueError, match="CompiledControlUnit cannot be resumed"):
+        run("prob1", "reference", LIMIT, resume=snapshot)
+
+
+def test_snapshot_stores_only_touched_pages(tmp_path):
+    source = (
+        ".data:\n BUFFER big 100000\n NUMBER n 0\n"
+        ".code:\nloop:\n INC r1\n STORE_V n r1\n JMP loop\n"
+    )
+    data, code = translator.translate(source)
+    checkpoint = Checkpointer(tmp_path / "state.snap", 100, data)
+    simulation.simulation(data, code, [], 0, 1000, checkpoint=checkpoint)
+
+    # изменена только страница с переменной n
+    assert list(read_snapshot(tmp_path / "state.snap").pages) == [100002 // 512]
+    assert (tmp_path / "state.snap").stat().st_size < 5000
+
+
+def test_resume_truncates_streamed_output(tmp_path):
+    code_file, input_file = tmp_path / "cat.json", tmp_path / "input.txt"
+    output_file, snapshot_file = tmp_path / "output.txt", tmp_path / "state.snap"
+    with open("tasks/cat.txt") as f:
+        write_code(code_file, *translator.translate(f.read()))
+    input_file.write_text("Hello, World!\n" * 20)
+
+    def main(limit, **kwargs):
+        simulation.main(
+            code_file, input_file, 0, limit, output_file=output_file, **kwargs
+        )
+
+    main(LIMIT)
+    expected = output_file.read_text()
+    main(500, checkpoint_file=snapshot_file, checkpoint_every=100)
+    # процесс остановлен после снимка, успев вывести ещё часть
+    with open(output_file, "a") as f:
+        f.write("written after the snapshot")
+    main(LIMIT, resume_file=snapshot_file)
+
+    assert read_snapshot(snapshot_file).output_offset > 0
+    assert output_file.read_text() == expected
@@ -0,0 +1,70 @@
+"""Тесты двоичной трассы исполнения."""
+
+import logging
+
+import pytest
+
+import simulation
+import translator
+from processor.trace import format_entry, read_trace
+
+LIMIT = 100000
+
+
+def debug_trace(golden, caplog, **kwargs):
+    caplog.set_level(logging.DEBUG)
+    data, code = translator.translate(golden["in_source"])
+    input_buffer = list(golden["in_stdin"]) + [chr(0)]
+    result = simulation.simulation(data, code, input_buffer, LIMIT, LIMIT, **kwargs)
+    # сообщение журнала форматируется при записи, в нём состояние на тот момент
+    lines = [
+        line[line.index("TICK:") :]
+        for line in caplog.text.splitlines()
+        if "TICK:" in line
+    ]
+    caplog.clear()
+    return result, lines
+
+
+@pytest.mark.golden_test("golden/*.yml")
+@pytest.mark.parametrize("engine", ["reference", "compiled"])
+def test_trace_matches_debug_log(golden, tmp_path, caplog, engine):
+    expected, expected_lines = debug_trace(golden, caplog)
+    trace_file = tmp_path / "trace.bin"
+
+    result, _ = debug_trace(golden, caplog, engine=engine, trace_file=trace_file)
+
+    assert result == expected
+    assert [format_entry(entry) for entry in read_trace(trace_file)] == expected_lines
+
+
+@pytest.mark.golden_test("golden/*.yml")
+@pytest.mark.parametrize("size", [1, 5, 100000])
+def test_ring_buffer_keeps_last_records(golden, tmp_path, caplog, size):
+    _, expected_lines = debug_trace(golden, caplog)
+    trace_file = tmp_path / "trace.bin"
+
+    debug_trace(golden, caplog, trace_file=trace_file, trace_size=size)
+
+    lines = [format_entry(entry) for entry in read_trace(trace_file)]
+    assert lines == expected_lines[-size:]
+    assert [format_entry(entry) for entry in read_trace(trace_file, tail=1)] == (
+        expected_lines[-1:]
+    )
+
+
+@pytest.mark.parametrize("size", [0, 2])
+def test_register_overflow_keeps_trace_readable(tmp_path, size):
+    data, code = translator.translate(
+        ".code:\n    MOV r2 1\n    MOV r1 9223372036854775807\n    INC r1\n    HLT\n"
+    )
+    trace_file = tmp_path / "trace.bin"
+
+    with pytest.raises(OverflowError, match="trace value out of int64 range at tick 3"):
+        simulation.simulation(
+            data, code, [], 0, LIMIT, trace_file=trace_file, trace_size=size
+        )
+
+    entries = read_trace(trace_file)
+    assert entries[-1][3] == [2**63 - 1, 1, 0, 0]
+    assert len(entries) == (2 if size == 0 else 1)
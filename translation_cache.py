@@ -0,0 +1,146 @@
+import functools
+import hashlib
+import json
+import os
+
+# Кэш трансляции: объектные файлы в каталоге кэша, имя записи - хэш исходного
+# кода, версии транслятора, формата и флага оптимизации. Запись - строка JSON
+# с метаданными (число слов объектного файла, отчёт оптимизатора) и байты
+# объектного файла. Записи пишутся во временный файл и атомарно переименовываются,
+# при превышении размера каталога удаляются давно не использованные.
+
+CACHE_ENV = "TRANSLATOR_CACHE"
+# размер кэша по умолчанию, байт
+CACHE_SIZE = 64 * 1024 * 1024
+ENTRY_SUFFIX = ".o"
+
+# модули, от которых зависит результат трансляции
+SOURCES = ("translator.py", "optimizer.py", "processor/isa.py", "processor/memory.py")
+
+
+@functools.cache
+def translator_version() -> str:
+    """Хэш исходного кода транслятора: любое его изменение делает кэш недействительным."""
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCES:
+        with open(os.path.join(root, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class TranslationCache:
+    """Дисковый кэш объектных файлов с вытеснением давно не использованных записей."""
+
+    directory: str = None
+    max_size: int = None
+
+    hits: int = None
+    misses: int = None
+    evictions: int = None
+
+    def __init__(self, directory: str, max_size: int = CACHE_SIZE):
+        assert max_size > 0, "Cache size must be positive"
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, max_size: int = CACHE_SIZE):
+        """Кэш в каталоге из переменной окружения `TRANSLATOR_CACHE` или None."""
+        directory = os.environ.get(CACHE_ENV)
+        return cls(directory, max_size) if directory else None
+
+    @staticmethod
+    def key(text: str, fmt: str, optimized: bool) -> str:
+        digest = hashlib.sha256()
+        for part in (translator_version(), fmt, str(optimized), text):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key: str):
+        """(метаданные, байты объектного файла) или None при промахе."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                meta = json.loads(file.readline())
+                content = file.read()
+            # время доступа для вытеснения: atime может не обновляться ФС
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return meta, content
+
+    def put(self, key: str, meta: dict, content: bytes):
+        path = self._path(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp, "wb") as file:
+                file.write(json.dumps(meta).encode() + b"\n")
+                file.write(content)
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.unlink(temp)
+            raise
+        self.evict()
+
+    def entries(self) -> list:
+        """(время использования, размер, путь) записей от старых к новым."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        # самая новая запись остаётся, даже если она больше всего кэша
+        for _, entry_size, path in entries[:-1]:
+            if size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            self.evictions += 1
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.unlink(path)
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "size": sum(entry_size for _, entry_size, _ in entries),
+            "max_size": self.max_size,
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (
+            f"Translation cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['evictions']} evictions, {stats['entries']} entries, "
+            f"{stats['size']}/{stats['max_size']} bytes"
+        )
@@ -0,0 +1,65 @@
+"""Тесты кэша трансляции."""
+
+import contextlib
+import io
+import os
+import time
+
+import pytest
+
+import translator
+from translation_cache import TranslationCache
+
+
+def translate(tmp_path, task, cache, fmt="json", optimized=False):
+    target = tmp_path / f"{task}.o"
+    with contextlib.redirect_stdout(io.StringIO()) as stdout:
+        translator.main(f"tasks/{task}.txt", target, fmt, optimized, cache)
+    return target.read_bytes(), stdout.getvalue()
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary"])
+@pytest.mark.parametrize("optimized", [False, True])
+def test_hit_matches_translation(tmp_path, fmt, optimized):
+    cache = TranslationCache(tmp_path / "cache")
+    expected = translate(tmp_path, "prob1", None, fmt, optimized)
+
+    assert translate(tmp_path, "prob1", cache, fmt, optimized) == expected
+    assert translate(tmp_path, "prob1", cache, fmt, optimized) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+    # временные файлы атомарной записи не остаются
+    assert [name.endswith(".o") for name in os.listdir(cache.directory)] == [True]
+
+
+def test_key_depends_on_source_and_options():
+    keys = {
+        TranslationCache.key("HLT", "json", False),
+        TranslationCache.key("HLT ", "json", False),
+        TranslationCache.key("HLT", "binary", False),
+        TranslationCache.key("HLT", "json", True),
+    }
+
+    assert len(keys) == 4
+
+
+def test_eviction_keeps_recently_used(tmp_path):
+    cache = TranslationCache(tmp_path / "cache")
+    for task in ("cat", "hello", "prob1", "cat"):
+        translate(tmp_path, task, cache)
+        time.sleep(0.01)
+
+    # без одного байта не помещаются: вытесняется давно не использованная hello
+    cache.max_size = cache.stats()["size"] - 1
+    cache.evict()
+
+    assert (cache.evictions, cache.stats()["entries"]) == (1, 2)
+    translate(tmp_path, "cat", cache)
+    translate(tmp_path, "hello", cache)
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_env_enables_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSLATOR_CACHE", str(tmp_path / "env"))
+    translate(tmp_path, "cat", None)
+
+    assert len(os.listdir(tmp_path / "env")) == 1
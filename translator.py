@@ -1,5 +1,17 @@
 import argparse
-from processor.isa import Opcode, MachineCode, write_code, INPUT_MAP, OUTPUT_MAP
+import io
+from processor.isa import (
+    Opcode,
+    MachineCode,
+    InstructionTable,
+    write_code,
+    write_binary_code,
+    INPUT_MAP,
+    OUTPUT_MAP,
+)
+from processor.memory import DataMemory
+from optimizer import optimize
+from translation_cache import CACHE_SIZE, TranslationCache
 
 
 # input и output замена на адрес 1 0
@@ -10,31 +22,27 @@ def get_meaningful_token(line: str) -> str:
     return line.split(";", 1)[0].strip()
 
 
-# перевод секции данных из ассемблерного кода в словарь переменных
+# перевод секции данных из ассемблерного кода в словарь переменных и память данных
 def translate_data_part(lines: list):
     variables = {}
-    data_tokens = [
-        MachineCode(0, "NUMBER", [1234]),
-        MachineCode(1, "NUMBER", [1234]),
-    ]  # длина + input + output
+    data = DataMemory()
+    data.extend([1234, 1234], Opcode.NUMBER)  # input + output
     for line in lines:
         opcode, name, value = line.split(" ", 2)
 
-        variables[name] = len(data_tokens)
+        if name in variables:
+            raise ValueError(f"Redefinition of {name}")
+        variables[name] = len(data)
         if opcode == "STRING":
             value = value.strip('"')
-            for c in value:
-                data_tokens.append(MachineCode(len(data_tokens), opcode, [ord(c)]))
-            data_tokens.append(MachineCode(len(data_tokens), opcode, [0]))
+            data.extend([ord(c) for c in value] + [0], Opcode.STRING)
         elif opcode == "BUFFER":
-            for i in range(int(value)):
-                data_tokens.append(MachineCode(len(data_tokens), opcode, [0]))
+            data.reserve(int(value), Opcode.BUFFER)
         elif opcode == "NUMBER":
-            data_tokens.append(MachineCode(len(data_tokens), opcode, [0]))
+            data.append(0, Opcode.NUMBER)
         else:
             raise ValueError("No data opcode")
-    data_tokens = [len(data_tokens)] + data_tokens
-    return variables, data_tokens
+    return variables, data
 
 
 # перевод инструкций в MachineCode
@@ -47,6 +55,8 @@ def translate_code_part(lines: list):
     for line in lines:
         if line.endswith(":"):
             line = line.strip(":")
+            if line in labels:
+                raise ValueError(f"Redefinition of {line}")
             labels[line] = len(tokens)
             continue
 
@@ -88,8 +98,6 @@ def translate_code_part(lines: list):
 def translate_stage_1(code: str):
     lines = code.split("\n")
 
-    tokens = []
-
     data_lines = []
     code_lines = []
 
@@ -117,29 +125,25 @@ def translate_stage_1(code: str):
             raise ValueError("Incorrect section type!!")
 
     # Переводим часть данных
-    variables, data_tokens = translate_data_part(data_lines)
-    tokens.extend(data_tokens)
+    variables, data = translate_data_part(data_lines)
 
     # Переводим часть кода
     labels, code_tokens = translate_code_part(code_lines)
+    # метки и переменные - одно пространство имён, как в однопроходной трансляции
+    redefined = sorted(labels.keys() & variables.keys())
+    if redefined:
+        raise ValueError(f"Redefinition of {redefined[0]}")
 
-    # Объединяем токены
-    tokens.extend(code_tokens)
-
-    return labels, variables, tokens
+    return labels, variables, data, code_tokens
 
 
 # Генерация машинного кода.
 def translate_stage_2(labels: dict, variables: dict, tokens: list):
     code = []
+    table = InstructionTable()
     for token in tokens:
-        if isinstance(token, int):
-            code.append(token)
-            continue
-
-        # token is MachineCode
         # преобразование в Opcode
-        token.opcode = Opcode[token.opcode]
+        opcode = Opcode[token.opcode]
         args = token.args
 
         # обработка аргументов
@@ -154,33 +158,258 @@ def translate_stage_2(labels: dict, variables: dict, tokens: list):
                 args[ind] = variables[arg]
             else:
                 raise ValueError(f"Incorrect argument!!: {args}: {arg}")
-        token.args = args
-        code.append(token)
+        code.append(table.get(opcode, args))
 
     return code
 
 
+# Потоковая трансляция: строки читаются по одной, инструкции сразу
+# становятся Instruction. Имена, ещё не определённые к моменту обращения
+# (метки впереди по коду, переменные секции .data после .code), попадают в
+# таблицу исправлений и подставляются при определении; до этого инструкция
+# хранится как MachineCode. Кроме результата в памяти хранятся только имена,
+# неразрешённые ссылки и таблица одинаковых инструкций.
+
+REGISTERS = {"r1": 0, "r2": 1, "r3": 2, "r4": 3}
+OPCODES = {opcode.name: opcode for opcode in Opcode}
+
+
+# значимые строки исходного кода: (секция, строка)
+def tokenize(lines):
+    section = None
+    for line in lines:
+        line = line.split(";", 1)[0].strip()
+        if not line:
+            continue
+        if line[0] == "." and line.startswith((".data", ".code")):
+            section = line[1:5]
+        elif section is None:
+            raise ValueError("Incorrect section type!!")
+        else:
+            yield section, line
+
+
+# машинные слова строки кода: (код операции, аргументы)
+def expand_instruction(opcode: str, args: list) -> list:
+    if opcode == "INPUT":
+        return [(Opcode.LOAD_V, args + [INPUT_MAP])]
+    if opcode == "OUTPUT":
+        return [(Opcode.STORE_V, [OUTPUT_MAP] + args)]
+    if opcode == "LINEAR":  # multiple machine words
+        assert len(args) % 2 == 1 and len(args) >= 3, "Incorrect args amount"
+        words = [(Opcode.LINEAR, args[:3])]
+        for ind in range(3, len(args), 2):
+            words.append((Opcode.LINEAR_CONT, [args[0]] + args[ind : ind + 2]))
+        return words
+    return [(Opcode[opcode], args)]
+
+
+# размещение переменной в памяти данных, возвращает (имя, адрес)
+def allocate_variable(data: DataMemory, line: str):
+    opcode, name, value = line.split(" ", 2)
+    address = len(data)
+    if opcode == "STRING":
+        value = value.strip('"')
+        data.extend([ord(c) for c in value] + [0], Opcode.STRING)
+    elif opcode == "BUFFER":
+        data.reserve(int(value), Opcode.BUFFER)
+    elif opcode == "NUMBER":
+        data.append(0, Opcode.NUMBER)
+    else:
+        raise ValueError("No data opcode")
+    return name, address
+
+
+# однопроходная трансляция итератора строк (например, открытого файла)
+def translate_stream(lines):
+    data = DataMemory()
+    data.extend([1234, 1234], Opcode.NUMBER)  # input + output
+    code = []
+    table = InstructionTable()
+    # регистры, адреса меток и переменных; регистры не переопределяются
+    symbols = dict(REGISTERS)
+    names = set()
+    # имя -> [(адрес инструкции, номер аргумента)] до определения имени
+    fixups = {}
+    # адрес -> число неразрешённых имён в аргументах инструкции
+    pending = {}
+
+    def define(name: str, address: int):
+        if name in names:
+            raise ValueError(f"Redefinition of {name}")
+        names.add(name)
+        symbols.setdefault(name, address)
+        for pc, ind in fixups.pop(name, ()):
+            token = code[pc]
+            token.args[ind] = address
+            pending[pc] -= 1
+            if not pending[pc]:
+                del pending[pc]
+                code[pc] = table.get(token.opcode, token.args)
+
+    for section, line in tokenize(lines):
+        if section == "data":
+            define(*allocate_variable(data, line))
+            continue
+        if line[-1] == ":":
+            define(line.strip(":"), len(code))
+            continue
+
+        parts = line.split()
+        opcode = parts[0].upper()
+        args = [
+            int(arg) if arg.isnumeric() else symbols.get(arg, arg) for arg in parts[1:]
+        ]
+        # большинство инструкций - одно машинное слово без замен
+        if opcode in OPCODES and opcode != "LINEAR":
+            words = ((OPCODES[opcode], args),)
+        else:
+            words = expand_instruction(opcode, args)
+        for opcode, args in words:
+            pc = len(code)
+            unresolved = 0
+            for ind, arg in enumerate(args):
+                if arg.__class__ is str:
+                    fixups.setdefault(arg, []).append((pc, ind))
+                    unresolved += 1
+            if unresolved:
+                pending[pc] = unresolved
+                code.append(MachineCode(pc, opcode, args))
+            else:
+                code.append(table.get(opcode, args))
+
+    for name, refs in fixups.items():
+        raise ValueError(f"Incorrect argument!!: {code[refs[0][0]].args}: {name}")
+    return data, code
+
+
 # полная трансляция кода
-def translate(code: str):
-    labels, variables, code_tokens = translate_stage_1(code)
-    code = translate_stage_2(labels, variables, code_tokens)
-    return code
+def translate(code: str, optimized: bool = False):
+    if optimized:
+        return translate_optimized(code)[:2]
+    return translate_stream(code.split("\n"))
 
 
-def main(source: str, target: str):
-    with open(source, "r") as f:
-        text = f.read()
+# трансляция с оптимизацией токенов первой стадии, возвращает и отчёт
+def translate_optimized(code: str):
+    labels, variables, data, code_tokens = translate_stage_1(code)
+    labels, code_tokens, report = optimize(labels, code_tokens, variables, len(data))
+    code = translate_stage_2(labels, variables, code_tokens)
+    return data, code, report
+
+
+# форматы объектного файла
+WRITERS = {
+    "json": write_code,
+    "binary": write_binary_code,
+}
+
+
+# строки файла с подсчётом LoC, как у text.split("\n")
+class CountedLines:
+    def __init__(self, lines):
+        self.lines = lines
+        self.count = 1
+
+    def __iter__(self):
+        for line in self.lines:
+            self.count += line.endswith("\n")
+            yield line
+
+
+# трансляция строк в объектный файл, возвращает (LoC, число слов, отчёт оптимизатора)
+def translate_lines(lines, target: str, fmt: str, optimized: bool):
+    report = None
+    if optimized:
+        text = "".join(lines)
+        loc = len(text.split("\n"))
+        data, code, report = translate_optimized(text)
+    else:
+        # без оптимизатора исходный код не собирается в память целиком
+        lines = CountedLines(lines)
+        data, code = translate_stream(lines)
+        loc = lines.count
+    WRITERS[fmt](target, data, code)
+    # длина части данных + слова данных + инструкции
+    return loc, 1 + len(data) + len(code), report
+
+
+def main(
+    source: str,
+    target: str,
+    fmt: str = "json",
+    optimized: bool = False,
+    cache: TranslationCache = None,
+):
+    if cache is None:
+        cache = TranslationCache.from_env()
+    if cache is None:
+        with open(source, "r") as f:
+            loc, words, report = translate_lines(f, target, fmt, optimized)
+    else:
+        with open(source, "r") as f:
+            text = f.read()
+        key = cache.key(text, fmt, optimized)
+        entry = cache.get(key)
+        if entry is not None:
+            meta, content = entry
+            with open(target, "wb") as f:
+                f.write(content)
+            words, report = meta["words"], meta["report"]
+        else:
+            lines = io.StringIO(text)
+            _, words, report = translate_lines(lines, target, fmt, optimized)
+            meta = {"words": words, "report": None if report is None else str(report)}
+            with open(target, "rb") as f:
+                cache.put(key, meta, f.read())
+        loc = len(text.split("\n"))
 
-    code = translate(text)
-    write_code(target, code)
-    print("LoC:", len(text.split("\n")), "Instr:", len(code))
+    print("LoC:", loc, "Instr:", words)
+    if report is not None:
+        print(report)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Трансляция кода")
     parser.add_argument("source_file", help="Имя файла с кодом")
     parser.add_argument("target_file", help="Имя выходного файла")
+    parser.add_argument(
+        "--format",
+        choices=WRITERS.keys(),
+        default="json",
+        help="Формат объектного файла (по умолчанию json)",
+    )
+
+    parser.add_argument(
+        "-O",
+        dest="optimized",
+        action="store_true",
+        help="Оптимизировать код и вывести отчёт об экономии тактов",
+    )
+
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="Каталог кэша трансляции (по умолчанию $TRANSLATOR_CACHE, без неё кэша нет)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=CACHE_SIZE,
+        help=f"Размер кэша трансляции в байтах (по умолчанию {CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Вывести статистику кэша трансляции",
+    )
 
     args = parser.parse_args()
 
-    main(args.source_file, args.target_file)
+    cache = TranslationCache.from_env(args.cache_size)
+    if args.cache:
+        cache = TranslationCache(args.cache, args.cache_size)
+
+    main(args.source_file, args.target_file, args.format, args.optimized, cache)
+    if args.cache_stats and cache is not None:
+        print(cache.report())
@@ -0,0 +1,77 @@
+"""Тесты потоковой трансляции."""
+
+import glob
+import io
+
+import pytest
+import yaml
+
+import translator
+
+
+def staged(text):
+    labels, variables, data, tokens = translator.translate_stage_1(text)
+    return data, translator.translate_stage_2(labels, variables, tokens)
+
+
+def words(data, code):
+    return list(data.words), [(instr.opcode, instr.args) for instr in code]
+
+
+def sources():
+    for task in sorted(glob.glob("tasks/*.txt")):
+        with open(task) as f:
+            yield f.read()
+    for golden in sorted(glob.glob("golden/*.yml")):
+        with open(golden) as f:
+            yield yaml.safe_load(f)["in_source"]
+
+
+@pytest.mark.parametrize("text", list(sources()))
+def test_stream_matches_staged(text):
+    lines = translator.CountedLines(io.StringIO(text))
+
+    assert words(*translator.translate_stream(lines)) == words(*staged(text))
+    assert lines.count == len(text.split("\n"))
+
+
+def test_forward_references():
+    text = """.code:
+    LOAD_V r1 value
+    JZ end
+    OUTPUT r1
+end:
+    HLT
+.data:
+    NUMBER value 0
+"""
+    data, code = translator.translate_stream(io.StringIO(text))
+
+    assert [instr.args for instr in code] == [(0, 2), (3,), (1, 0), ()]
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        (".code:\nloop:\nloop:\n    JMP loop", "Redefinition"),
+        (".code:\n    JMP nowhere", "Incorrect argument"),
+        ("    HLT", "Incorrect section"),
+    ],
+)
+def test_stream_errors(text, message):
+    with pytest.raises(ValueError, match=message):
+        translator.translate_stream(text.split("\n"))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        ".code:\nloop:\n    JMP loop\nloop:\n    HLT",
+        ".data:\n    NUMBER n 0\n    NUMBER n 0\n.code:\n    HLT",
+        ".data:\n    NUMBER n 0\n.code:\nn:\n    HLT",
+    ],
+)
+@pytest.mark.parametrize("optimized", [False, True])
+def test_redefinition_is_rejected(text, optimized):
+    with pytest.raises(ValueError, match="Redefinition"):
+        translator.translate(text, optimized)
@@ -0,0 +1,45 @@
+"""Тесты векторной модели нескольких экземпляров."""
+
+import pytest
+
+import simulation
+import translator
+
+pytest.importorskip("numpy")
+
+from processor.vector import simulate_many  # noqa: E402
+
+INPUTS = ["", "a", "Alice\n", "Bob Marley\n", "x" * 20, "\n\n"]
+
+
+@pytest.mark.parametrize(
+    "task", ["cat", "hello_user", "hello_user_block", "hello", "prob1"]
+)
+@pytest.mark.parametrize("limit", [1, 7, 100, 100000])
+def test_vector_matches_simulation(task, limit):
+    with open(f"tasks/{task}.txt") as f:
+        data, code = translator.translate(f.read())
+
+    results = simulate_many(data, code, INPUTS, limit)
+
+    for result, text in zip(results, INPUTS):
+        expected = simulation.simulation(
+            data.copy(), code, list(text) + [chr(0)], 0, limit
+        )
+        assert result == expected
+
+
+def test_vector_block_input_end_of_input():
+    from engines_test import READ_TWICE
+
+    data, code = translator.translate(READ_TWICE)
+
+    inputs = ["", "a", "Alice\n", "\n\n"]
+
+    results = simulate_many(data, code, inputs, 1000)
+
+    for result, text in zip(results, inputs):
+        expected = simulation.simulation(
+            data.copy(), code, list(text) + [chr(0)], 0, 1000
+        )
+        assert result == expected